@@ -0,0 +1 @@
+"""Пакет содержит нагрузочные тесты и микробенчмарки API пользователей."""
@@ -0,0 +1,78 @@
+"""
+Модуль сравнивает два отчёта бенчмарков.
+
+Запуск: `python -m benchmarks.compare base.json new.json --threshold 10`.
+Для каждого сценария выводится изменение показателей в процентах.
+Код возврата 1 означает, что задержка выросла или пропускная способность
+упала больше чем на `--threshold` процентов.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+# Показатели, рост которых означает ухудшение, и показатели, где хуже — падение.
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms", "p50_us", "p95_us", "p99_us")
+HIGHER_IS_BETTER = ("rps", "ops")
+
+
+def compare(base: dict, new: dict, threshold: float) -> tuple[list[str], bool]:
+    """
+    Сравнить результаты двух отчётов.
+
+    :param base: Базовый отчёт.
+    :type base: dict
+    :param new: Новый отчёт.
+    :type new: dict
+    :param threshold: Допустимое ухудшение в процентах.
+    :type threshold: float
+    :return: Строки сравнения и признак регрессии.
+    :rtype: tuple[list[str], bool]
+    """
+
+    lines = []
+    regressed = False
+    for scenario, stats in new["results"].items():
+        before = base["results"].get(scenario)
+        if before is None:
+            lines.append(f"{scenario}: new scenario")
+            continue
+        parts = []
+        for metric in (*HIGHER_IS_BETTER, *LOWER_IS_BETTER):
+            if metric not in stats or not before.get(metric):
+                continue
+            change = (stats[metric] - before[metric]) / before[metric] * 100
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            flag = ""
+            if worse > threshold:
+                flag = " !"
+                regressed = True
+            parts.append(
+                f"{metric} {before[metric]} -> {stats[metric]} ({change:+.1f}%){flag}"
+            )
+        lines.append(f"{scenario}: " + ", ".join(parts))
+    return lines, regressed
+
+
+def main() -> None:
+    """Разобрать аргументы командной строки и сравнить отчёты."""
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0)
+    args = parser.parse_args()
+
+    base = json.loads(Path(args.base).read_text())
+    new = json.loads(Path(args.new).read_text())
+    if base["kind"] != new["kind"]:
+        sys.exit(f"Cannot compare {base['kind']} report with {new['kind']} report")
+    lines, regressed = compare(base, new, args.threshold)
+    print("\n".join(lines))
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
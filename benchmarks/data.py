@@ -0,0 +1,63 @@
+"""Модуль содержит генерацию тестовых данных пользователей."""
+
+import random
+from src.schemas.users import RelationshipStatus
+
+
+NAMES = (
+    "Ivan",
+    "Petr",
+    "Anna",
+    "Maria",
+    "Olga",
+    "Sergey",
+    "Elena",
+    "Dmitry",
+    "Irina",
+    "Alexey",
+    "Natalia",
+    "Pavel",
+)
+SURNAMES = (
+    "Ivanov",
+    "Petrov",
+    "Sidorov",
+    "Smirnov",
+    "Kuznetsov",
+    "Popov",
+    "Volkov",
+    "Sokolov",
+    "Lebedev",
+    "Kozlov",
+)
+HOBBIES = (
+    "chess",
+    "football",
+    "reading",
+    "hiking",
+    "cooking",
+    "painting",
+    "music",
+    "swimming",
+    "photography",
+    "travelling",
+)
+
+
+def generate_user(rng: random.Random) -> dict:
+    """
+    Сгенерировать значения полей одного пользователя.
+
+    :param rng: Генератор случайных чисел.
+    :type rng: random.Random
+    :return: Значения полей пользователя.
+    :rtype: dict
+    """
+
+    return {
+        "name": rng.choice(NAMES),
+        "surname": rng.choice(SURNAMES),
+        "age": rng.randint(18, 99),
+        "hobbies": ", ".join(rng.sample(HOBBIES, rng.randint(1, 3))),
+        "relationship_status": rng.choice(list(RelationshipStatus)),
+    }
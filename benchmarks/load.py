@@ -0,0 +1,297 @@
+"""
+Модуль содержит нагрузочный тест эндпоинтов `/users`.
+
+Запуск: `python -m benchmarks.load --url http://127.0.0.1:8000 --duration 30`.
+Каждый из `--concurrency` клиентов держит собственное keep-alive соединение
+и выполняет запросы в пропорциях `--mix`. Удаляются только пользователи,
+созданные во время теста, поэтому повторные запуски работают с тем же
+набором данных.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from urllib.parse import urlsplit
+from benchmarks.report import summarize, write_report
+from benchmarks.data import generate_user
+
+
+SCENARIOS = ("list", "get", "create", "update", "delete")
+
+DEFAULT_MIX = "list=15,get=65,create=10,update=7,delete=3"
+
+
+class HttpConnection:
+    """Минимальный HTTP/1.1-клиент с keep-alive соединением."""
+
+    def __init__(self, host: str, port: int) -> None:
+        """
+        :param host: Адрес сервера.
+        :type host: str
+        :param port: Порт сервера.
+        :type port: int
+        """
+
+        self.host = host
+        self.port = port
+        self.reader: asyncio.StreamReader | None = None
+        self.writer: asyncio.StreamWriter | None = None
+
+    async def request(
+        self, method: str, path: str, body: dict | None = None
+    ) -> tuple[int, bytes]:
+        """
+        Выполнить запрос и прочитать ответ целиком.
+
+        :param method: HTTP-метод.
+        :type method: str
+        :param path: Путь с параметрами запроса.
+        :type path: str
+        :param body: Тело запроса, кодируется в JSON.
+        :type body: dict | None
+        :raises ConnectionError: Если соединение закрыто сервером.
+        :return: Код ответа и тело.
+        :rtype: tuple[int, bytes]
+        """
+
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port
+            )
+        payload = b"" if body is None else json.dumps(body).encode()
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+        if body is not None:
+            head += "Content-Type: application/json\r\n"
+        head += f"Content-Length: {len(payload)}\r\n\r\n"
+        self.writer.write(head.encode() + payload)
+        try:
+            return await self._read_response()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            await self.close()
+            raise ConnectionError("Connection closed by server")
+
+    async def _read_response(self) -> tuple[int, bytes]:
+        raw = await self.reader.readuntil(b"\r\n\r\n")
+        lines = raw.decode("latin-1").split("\r\n")
+        status = int(lines[0].split(" ", 2)[1])
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding") == "chunked":
+            body = b""
+            while True:
+                size = int((await self.reader.readuntil(b"\r\n")).strip(), 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                body += chunk[:-2]
+        else:
+            body = await self.reader.readexactly(int(headers.get("content-length", 0)))
+        if headers.get("connection") == "close":
+            await self.close()
+        return status, body
+
+    async def close(self) -> None:
+        """Закрыть соединение."""
+
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    """
+    Разобрать пропорции сценариев вида `list=15,get=65`.
+
+    :param value: Пропорции через запятую.
+    :type value: str
+    :raises argparse.ArgumentTypeError: Если сценарий неизвестен.
+    :return: Вес каждого сценария.
+    :rtype: dict[str, int]
+    """
+
+    mix = dict.fromkeys(SCENARIOS, 0)
+    for part in filter(None, value.split(",")):
+        name, _, weight = part.partition("=")
+        if name not in mix:
+            raise argparse.ArgumentTypeError(f"Unknown scenario: {name}")
+        mix[name] = int(weight)
+    return mix
+
+
+class LoadTest:
+    """Нагрузочный тест с общим набором ID пользователей и результатами."""
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        url = urlsplit(args.url)
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.prefix = url.path.rstrip("/")
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.scenarios = [name for name, weight in args.mix.items() if weight]
+        self.weights = [args.mix[name] for name in self.scenarios]
+        self.ids: list[int] = []
+        self.created: list[int] = []
+        self.latencies: dict[str, list[float]] = {name: [] for name in SCENARIOS}
+        self.errors: dict[str, int] = dict.fromkeys(SCENARIOS, 0)
+        self.recording = False
+
+    async def load_ids(self) -> None:
+        """Получить ID существующих пользователей для чтения и обновления."""
+
+        connection = HttpConnection(self.host, self.port)
+        status, body = await connection.request(
+            "GET", f"{self.prefix}/users/?limit={self.args.id_pool}"
+        )
+        await connection.close()
+        if status != 200:
+            raise SystemExit(f"Cannot list users: HTTP {status}")
+        self.ids = [item["id"] for item in json.loads(body)["items"]]
+        if not self.ids:
+            raise SystemExit("No users found, run `python -m benchmarks.seed` first")
+
+    def choose(self) -> tuple[str, str, str, dict | None]:
+        """
+        Выбрать сценарий и сформировать запрос.
+
+        :return: Сценарий, метод, путь и тело запроса.
+        :rtype: tuple[str, str, str, dict | None]
+        """
+
+        scenario = self.rng.choices(self.scenarios, self.weights)[0]
+        if scenario == "delete" and not self.created:
+            scenario = "create"
+        if scenario == "list":
+            return scenario, "GET", f"/users/?limit={self.args.page_size}", None
+        if scenario == "get":
+            return scenario, "GET", f"/users/{self.rng.choice(self.ids)}", None
+        if scenario == "create":
+            return scenario, "POST", "/users/", generate_user(self.rng)
+        if scenario == "update":
+            user_id = self.rng.choice(self.ids)
+            return scenario, "PUT", f"/users/{user_id}", generate_user(self.rng)
+        user_id = self.created.pop(self.rng.randrange(len(self.created)))
+        return scenario, "DELETE", f"/users/{user_id}", None
+
+    async def worker(self, deadline: float) -> None:
+        """
+        Выполнять запросы до наступления `deadline`.
+
+        :param deadline: Момент окончания по `time.perf_counter`.
+        :type deadline: float
+        """
+
+        connection = HttpConnection(self.host, self.port)
+        while time.perf_counter() < deadline:
+            scenario, method, path, body = self.choose()
+            start = time.perf_counter()
+            try:
+                status, response = await connection.request(
+                    method, self.prefix + path, body
+                )
+            except (OSError, ConnectionError):
+                status, response = 0, b""
+            latency = time.perf_counter() - start
+            if scenario == "create" and status == 201:
+                self.created.append(json.loads(response)["id"])
+            if not self.recording:
+                continue
+            if status == 0 or status >= 400:
+                self.errors[scenario] += 1
+            else:
+                self.latencies[scenario].append(latency)
+        await connection.close()
+
+    async def run(self) -> dict:
+        """
+        Провести прогрев и измерение.
+
+        :return: Показатели по сценариям и общий итог.
+        :rtype: dict
+        """
+
+        await self.load_ids()
+        start = time.perf_counter()
+        deadline = start + self.args.warmup + self.args.duration
+        workers = [
+            asyncio.create_task(self.worker(deadline))
+            for _ in range(self.args.concurrency)
+        ]
+        await asyncio.sleep(self.args.warmup)
+        self.recording = True
+        measured = time.perf_counter()
+        await asyncio.gather(*workers)
+        elapsed = time.perf_counter() - measured
+        self.recording = False
+        results = {
+            name: summarize(self.latencies[name], self.errors[name], elapsed)
+            for name in SCENARIOS
+            if self.latencies[name] or self.errors[name]
+        }
+        results["total"] = summarize(
+            [value for values in self.latencies.values() for value in values],
+            sum(self.errors.values()),
+            elapsed,
+        )
+        await self.cleanup()
+        return results
+
+    async def cleanup(self) -> None:
+        """Удалить пользователей, созданных во время теста."""
+
+        connection = HttpConnection(self.host, self.port)
+        for user_id in self.created:
+            await connection.request("DELETE", f"{self.prefix}/users/{user_id}")
+        await connection.close()
+
+
+def print_results(results: dict) -> None:
+    """
+    Вывести показатели в виде таблицы.
+
+    :param results: Показатели по сценариям.
+    :type results: dict
+    """
+
+    print(
+        f"{'scenario':<10}{'requests':>10}{'errors':>8}{'rps':>10}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    )
+    for name, stats in results.items():
+        print(
+            f"{name:<10}{stats['requests']:>10}{stats['errors']:>8}"
+            f"{stats['rps']:>10.1f}{stats['p50_ms']:>10.2f}"
+            f"{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+        )
+
+
+def main() -> None:
+    """Разобрать аргументы командной строки и провести нагрузочный тест."""
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=5.0)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX))
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--id-pool", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="benchmarks/results/load.json")
+    args = parser.parse_args()
+
+    results = asyncio.run(LoadTest(args).run())
+    print_results(results)
+    parameters = {
+        key: value for key, value in vars(args).items() if key not in ("output",)
+    }
+    write_report(args.output, "load", parameters, results)
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Модуль содержит микробенчмарки схем и сериализации пользователей.
+
+Запуск: `python -m benchmarks.micro`. База данных не требуется: объекты
+моделей создаются в памяти. Каждый бенчмарк выполняется сериями по
+`--number` вызовов, перцентили считаются по времени одного вызова в серии.
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timezone
+from collections.abc import Callable
+from fastapi.responses import JSONResponse
+from benchmarks.report import percentile, write_report
+from benchmarks.data import generate_user
+from src.models.users import UsersOrm
+from src.schemas.users import User, UserCreate, UsersPage
+from src.utils.serializers import USER_FIELDS, encode_users_page
+
+
+def measure(function: Callable[[], object], number: int, repeat: int) -> dict:
+    """
+    Измерить время вызова функции.
+
+    :param function: Измеряемая функция без аргументов.
+    :type function: Callable[[], object]
+    :param number: Количество вызовов в серии.
+    :type number: int
+    :param repeat: Количество серий.
+    :type repeat: int
+    :return: Количество операций в секунду и перцентили в микросекундах.
+    :rtype: dict
+    """
+
+    for _ in range(number):
+        function()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - start) / number)
+    timings.sort()
+    mean = sum(timings) / len(timings)
+    return {
+        "ops": round(1 / mean, 1),
+        "mean_us": round(mean * 1e6, 3),
+        "p50_us": round(percentile(timings, 50) * 1e6, 3),
+        "p95_us": round(percentile(timings, 95) * 1e6, 3),
+        "p99_us": round(percentile(timings, 99) * 1e6, 3),
+    }
+
+
+def build_benchmarks(page_size: int, seed: int) -> dict[str, Callable[[], object]]:
+    """
+    Подготовить данные и функции бенчмарков.
+
+    :param page_size: Количество пользователей в сериализуемом списке.
+    :type page_size: int
+    :param seed: Начальное значение генератора случайных чисел.
+    :type seed: int
+    :return: Функции бенчмарков по именам.
+    :rtype: dict[str, Callable[[], object]]
+    """
+
+    rng = random.Random(seed)
+    payload = generate_user(rng)
+    now = datetime.now(timezone.utc)
+    users = [
+        UsersOrm(id=index, updated_at=now, version=1, **generate_user(rng))
+        for index in range(1, page_size + 1)
+    ]
+    rows = [tuple(getattr(user, name) for name in USER_FIELDS) for user in users]
+    page = {"items": users, "next_cursor": None}
+
+    def list_orm():
+        # Путь FastAPI: валидация `response_model`, `model_dump` и `json.dumps`.
+        content = UsersPage.model_validate(page).model_dump(mode="json")
+        return JSONResponse(content).body
+
+    return {
+        "user_create_validate": lambda: UserCreate.model_validate(payload),
+        "user_from_orm": lambda: User.model_validate(users[0]),
+        "list_serialize_orm": list_orm,
+        "list_serialize_fast": lambda: encode_users_page(rows, None),
+        "list_serialize_ndjson": lambda: b"".join(
+            User.model_validate(user).model_dump_json().encode() + b"\n"
+            for user in users
+        ),
+    }
+
+
+def main() -> None:
+    """Разобрать аргументы командной строки и выполнить микробенчмарки."""
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--number", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--filter", default="", help="Подстрока имени бенчмарка")
+    parser.add_argument("--output", default="benchmarks/results/micro.json")
+    args = parser.parse_args()
+
+    results = {}
+    benchmarks = build_benchmarks(args.page_size, args.seed)
+    for name, function in benchmarks.items():
+        if args.filter not in name:
+            continue
+        results[name] = stats = measure(function, args.number, args.repeat)
+        print(
+            f"{name:<24}{stats['ops']:>12.1f} ops/s"
+            f"{stats['p50_us']:>12.2f} us p50{stats['p99_us']:>12.2f} us p99"
+        )
+    parameters = {
+        key: value for key, value in vars(args).items() if key not in ("output",)
+    }
+    write_report(args.output, "micro", parameters, results)
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
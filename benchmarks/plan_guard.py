@@ -0,0 +1,386 @@
+"""
+Модуль проверяет планы запросов `UsersCRUD` на заполненной базе данных.
+
+Запуск: `python -m benchmarks.plan_guard --count 100000`. Если в таблице
+`users` меньше `--count` пользователей, недостающие добавляются так же,
+как в `benchmarks.seed`, и статистика таблиц обновляется. Каждый сценарий
+вызывает метод `UsersCRUD`, перехватывает выполненные им SELECT и получает
+их планы через `EXPLAIN (FORMAT JSON)`.
+
+Код возврата 1 означает, что хотя бы в одном плане большая таблица
+читается последовательно, не используется ожидаемый индекс или оценка
+стоимости превышает долю `--max-cost-share` от полного чтения `users`.
+Стоимость сравнивается с полным чтением, поэтому пороги не зависят
+от количества пользователей.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from collections.abc import Awaitable, Callable, Iterator
+from typing import NamedTuple
+from sqlalchemy import event, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from benchmarks.report import write_report
+from benchmarks.seed import seed
+from src.config.config import get_engine, get_session_factory, init_engines
+from src.crud.users import UsersCRUD
+from src.models.users import UsersChangeOrm, UsersOrm
+from src.schemas.users import HobbyMatch, UsersFilter, UsersSort
+
+
+# Таблицы, последовательное чтение которых считается регрессией.
+# Таблицы счётчиков малы и читаются целиком.
+LARGE_TABLES = ("users", "users_changes")
+PAGE_SIZE = 100
+
+
+class Positions(NamedTuple):
+    """Позиции в заполненных таблицах, от которых строятся сценарии."""
+
+    middle_id: int
+    last_seq: int
+
+
+class PlanCase(NamedTuple):
+    """
+    Сценарий проверки.
+
+    Атрибуты:
+        name: Имя сценария.
+        run: Вызов метода `UsersCRUD` с сессией и позициями.
+        indexes: Индексы, хотя бы один из которых должен использоваться
+            в плане.
+        max_cost_share: Допустимая доля стоимости полного чтения `users`
+            вместо `--max-cost-share`.
+    """
+
+    name: str
+    run: Callable[[AsyncSession, Positions], Awaitable[object]]
+    indexes: tuple[str, ...] = ()
+    max_cost_share: float | None = None
+
+
+def _page(**filters) -> Callable[[AsyncSession, Positions], Awaitable[object]]:
+    """Сценарий первой страницы списка с отбором `filters`."""
+
+    return lambda session, _: UsersCRUD.get_users_rows(
+        session, UsersFilter(**filters), limit=PAGE_SIZE
+    )
+
+
+CASES = (
+    PlanCase("list", _page(), ("users_pkey",)),
+    PlanCase(
+        "list_after_id",
+        lambda session, positions: UsersCRUD.get_users_rows(
+            session, after_id=positions.middle_id, limit=PAGE_SIZE
+        ),
+        ("users_pkey",),
+    ),
+    PlanCase("list_id_desc", _page(sort=UsersSort.ID_DESC), ("users_pkey",)),
+    PlanCase(
+        "list_age_after",
+        lambda session, positions: UsersCRUD.get_users_rows(
+            session,
+            UsersFilter(sort=UsersSort.AGE),
+            after_id=positions.middle_id,
+            after_value=50,
+            limit=PAGE_SIZE,
+        ),
+        ("ix_users_age_id",),
+    ),
+    PlanCase("list_age_range", _page(age_min=30, age_max=32)),
+    PlanCase("list_status", _page(relationship_status="married")),
+    PlanCase("list_name", _page(name="iv", sort=UsersSort.NAME)),
+    PlanCase("list_surname_desc", _page(sort=UsersSort.SURNAME_DESC)),
+    # Редкие значения: без индекса запрос прочитал бы всю таблицу.
+    PlanCase("list_name_rare", _page(name="zzz"), ("ix_users_name_lower",)),
+    PlanCase("list_surname_rare", _page(surname="zzz"), ("ix_users_surname_lower",)),
+    PlanCase("list_hobbies_rare", _page(hobbies="zzz"), ("ix_users_hobbies_trgm",)),
+    # Планировщик не знает, насколько редок тег, и закладывает сортировку
+    # заметной доли таблицы, но это всё равно дешевле полного чтения.
+    PlanCase("list_hobby_rare", _page(hobby=["zzz"]), ("ix_users_hobby_tags",), 0.25),
+    PlanCase(
+        "list_hobby_all_rare",
+        _page(hobby=["chess", "zzz"], hobby_match=HobbyMatch.ALL),
+        ("ix_users_hobby_tags",),
+        0.25,
+    ),
+    PlanCase("list_hobby", _page(hobby=["chess"])),
+    PlanCase(
+        "page_validators",
+        lambda session, _: UsersCRUD.get_users_validators(session, limit=PAGE_SIZE),
+        ("users_pkey",),
+    ),
+    PlanCase(
+        "get_user",
+        lambda session, positions: UsersCRUD.get_user_json(
+            positions.middle_id, session
+        ),
+        ("users_pkey",),
+    ),
+    PlanCase(
+        "get_users_by_ids",
+        lambda session, positions: UsersCRUD.get_users_by_ids(
+            range(positions.middle_id, positions.middle_id + PAGE_SIZE), session
+        ),
+        ("users_pkey",),
+        # Стоимость растёт с количеством ID, а не с размером таблицы.
+        0.15,
+    ),
+    PlanCase("stats", lambda session, _: UsersCRUD.get_stats(session)),
+    PlanCase("hobbies", lambda session, _: UsersCRUD.get_hobbies(session)),
+    PlanCase(
+        "changes",
+        lambda session, positions: UsersCRUD.get_changes(
+            session, max(positions.last_seq - PAGE_SIZE, 0), PAGE_SIZE
+        ),
+        ("users_changes_pkey",),
+    ),
+    PlanCase(
+        "changes_snapshot",
+        lambda session, positions: UsersCRUD.get_changes_snapshot(
+            session, max(positions.last_seq - PAGE_SIZE, 0), PAGE_SIZE
+        ),
+        ("users_changes_pkey",),
+    ),
+    PlanCase(
+        "changes_range",
+        lambda session, _: UsersCRUD.get_changes_range(session),
+        ("users_changes_pkey",),
+    ),
+)
+
+
+def walk(node: dict) -> Iterator[dict]:
+    """
+    Обойти узлы плана в глубину.
+
+    :param node: Узел плана `EXPLAIN (FORMAT JSON)`.
+    :type node: dict
+    :return: Итератор узлов, начиная с `node`.
+    :rtype: Iterator[dict]
+    """
+
+    yield node
+    for child in node.get("Plans", ()):
+        yield from walk(child)
+
+
+def check_plan(plan: dict, max_cost: float) -> tuple[list[str], set[str]]:
+    """
+    Проверить план одного запроса.
+
+    :param plan: Корневой узел плана.
+    :type plan: dict
+    :param max_cost: Допустимая оценка стоимости.
+    :type max_cost: float
+    :return: Описания нарушений и индексы, использованные в плане.
+    :rtype: tuple[list[str], set[str]]
+    """
+
+    problems = []
+    used = set()
+    for node in walk(plan):
+        if "Index Name" in node:
+            used.add(node["Index Name"])
+        if node["Node Type"] == "Seq Scan" and node["Relation Name"] in LARGE_TABLES:
+            problems.append(f"Seq Scan on {node['Relation Name']}")
+    if plan["Total Cost"] > max_cost:
+        problems.append(f"cost {plan['Total Cost']} > {max_cost:.2f}")
+    return problems, used
+
+
+async def capture(
+    session: AsyncSession, case: PlanCase, positions: Positions
+) -> list[tuple[str, object]]:
+    """
+    Выполнить сценарий и перехватить выполненные им SELECT.
+
+    :param session: Асинхронная сессия SQLAlchemy.
+    :type session: AsyncSession
+    :param case: Сценарий проверки.
+    :type case: PlanCase
+    :param positions: Позиции в заполненных таблицах.
+    :type positions: Positions
+    :return: Тексты запросов и их параметры в формате драйвера.
+    :rtype: list[tuple[str, object]]
+    """
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        if statement.lstrip()[:6].upper() == "SELECT":
+            statements.append((statement, parameters))
+
+    engine = get_engine().sync_engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        await case.run(session, positions)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return statements
+
+
+async def explain(
+    session: AsyncSession, statement: str, parameters, analyze: bool
+) -> dict:
+    """
+    Получить план запроса.
+
+    :param session: Асинхронная сессия SQLAlchemy.
+    :type session: AsyncSession
+    :param statement: Текст запроса.
+    :type statement: str
+    :param parameters: Параметры запроса в формате драйвера.
+    :param analyze: Выполнить запрос и добавить фактическое время и буферы.
+    :type analyze: bool
+    :return: Корневой узел плана.
+    :rtype: dict
+    """
+
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    connection = await session.connection()
+    result = await connection.exec_driver_sql(
+        f"EXPLAIN ({options}) {statement}", parameters
+    )
+    value = result.scalar_one()
+    document = json.loads(value) if isinstance(value, str) else value
+    return document[0]["Plan"]
+
+
+async def prepare(count: int, batch_size: int, seed_value: int) -> None:
+    """
+    Дополнить таблицу `users` до `count` пользователей и обновить статистику.
+
+    Таблицы очищаются от старых версий строк, как это со временем делает
+    autovacuum. Таблицы счётчиков триггеры обновляют на каждую вставку
+    заполнения, поэтому они небольшие, но разрастаются, и переписываются
+    целиком (VACUUM FULL), иначе оценка стоимости их чтения завышена.
+    Проверка рассчитана на отдельную базу данных: VACUUM FULL
+    блокирует таблицы счётчиков.
+
+    :param count: Необходимое количество пользователей.
+    :type count: int
+    :param batch_size: Размер пакета вставки.
+    :type batch_size: int
+    :param seed_value: Начальное значение генератора случайных чисел.
+    :type seed_value: int
+    """
+
+    async with get_engine().connect() as connection:
+        existing = await connection.scalar(select(func.count()).select_from(UsersOrm))
+    if existing < count:
+        await seed(count - existing, batch_size, False, seed_value)
+    async with get_engine().connect() as connection:
+        # VACUUM не выполняется внутри транзакции.
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        await connection.execute(text("VACUUM FULL users_stats, users_hobby_stats"))
+        await connection.execute(
+            text("VACUUM ANALYZE users, users_changes, users_stats, users_hobby_stats")
+        )
+
+
+async def guard(max_cost_share: float, analyze: bool) -> tuple[dict, bool]:
+    """
+    Проверить планы запросов всех сценариев.
+
+    :param max_cost_share: Допустимая стоимость запроса как доля
+        от стоимости полного чтения `users`.
+    :type max_cost_share: float
+    :param analyze: Выполнять запросы в `EXPLAIN ANALYZE`.
+    :type analyze: bool
+    :return: Результаты по сценариям и признак регрессии.
+    :rtype: tuple[dict, bool]
+    """
+
+    results = {}
+    regressed = False
+    async with get_session_factory()() as session:
+        full_scan = (await explain(session, "SELECT * FROM users", (), False))[
+            "Total Cost"
+        ]
+        middle_id, last_seq = (
+            await session.execute(
+                select(
+                    select(
+                        func.percentile_disc(0.5).within_group(UsersOrm.id)
+                    ).scalar_subquery(),
+                    select(
+                        func.coalesce(func.max(UsersChangeOrm.seq), 0)
+                    ).scalar_subquery(),
+                )
+            )
+        ).one()
+        positions = Positions(middle_id, last_seq)
+        print(f"Full scan of users: cost {full_scan}")
+        for case in CASES:
+            max_cost = full_scan * (case.max_cost_share or max_cost_share)
+            statements = await capture(session, case, positions)
+            if not statements:
+                regressed = True
+                print(f"{case.name}: no queries captured !")
+                continue
+            problems = []
+            used = set()
+            plans = []
+            for statement, parameters in statements:
+                plan = await explain(session, statement, parameters, analyze)
+                plan_problems, plan_used = check_plan(plan, max_cost)
+                problems += plan_problems
+                used |= plan_used
+                plans.append({"statement": statement, "plan": plan})
+            if case.indexes and not used.intersection(case.indexes):
+                problems.append(f"none of {', '.join(case.indexes)} used")
+            cost = max(plan["plan"]["Total Cost"] for plan in plans)
+            results[case.name] = {
+                "cost": cost,
+                "cost_share": round(cost / full_scan, 6),
+                "indexes": sorted(used),
+                "problems": problems,
+                "plans": plans,
+            }
+            line = f"{case.name}: cost {cost} ({cost / full_scan:.2%})"
+            if used:
+                line += f", {', '.join(sorted(used))}"
+            if problems:
+                regressed = True
+                line += " ! " + "; ".join(problems)
+            print(line)
+        await session.rollback()
+    return results, regressed
+
+
+def main() -> None:
+    """Разобрать аргументы командной строки и проверить планы запросов."""
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--max-cost-share", type=float, default=0.05)
+    parser.add_argument("--analyze", action="store_true")
+    parser.add_argument("--output", default="benchmarks/results/plans.json")
+    args = parser.parse_args()
+
+    async def run() -> tuple[dict, bool]:
+        init_engines()
+        await prepare(args.count, args.batch_size, args.seed)
+        try:
+            return await guard(args.max_cost_share, args.analyze)
+        finally:
+            await get_engine().dispose()
+
+    results, regressed = asyncio.run(run())
+    parameters = {
+        key: value for key, value in vars(args).items() if key not in ("output",)
+    }
+    write_report(args.output, "plans", parameters, results)
+    print(f"Report written to {args.output}")
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Модуль содержит расчёт статистики и запись отчётов бенчмарков."""
+
+import json
+import platform
+import subprocess
+import time
+from pathlib import Path
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """
+    Вычислить перцентиль методом ближайшего ранга.
+
+    :param values: Отсортированные по возрастанию значения.
+    :type values: list[float]
+    :param percent: Перцентиль от 0 до 100.
+    :type percent: float
+    :return: Значение перцентиля или 0, если значений нет.
+    :rtype: float
+    """
+
+    if not values:
+        return 0.0
+    rank = max(int(round(percent / 100 * len(values) + 0.5)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    """
+    Посчитать показатели серии запросов.
+
+    :param latencies: Длительности успешных запросов в секундах.
+    :type latencies: list[float]
+    :param errors: Количество ошибок.
+    :type errors: int
+    :param elapsed: Длительность серии в секундах.
+    :type elapsed: float
+    :return: Количество запросов, ошибок, запросов в секунду и задержки
+        в миллисекундах.
+    :rtype: dict
+    """
+
+    values = sorted(latencies)
+    count = len(values)
+    return {
+        "requests": count,
+        "errors": errors,
+        "rps": round(count / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(values) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if count else 0.0,
+    }
+
+
+def environment() -> dict:
+    """
+    Собрать сведения об окружении запуска для сравнения отчётов.
+
+    :return: Время запуска, версия Python, платформа и коммит.
+    :rtype: dict
+    """
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "commit": commit,
+    }
+
+
+def write_report(path: str, kind: str, parameters: dict, results: dict) -> None:
+    """
+    Записать отчёт в JSON-файл.
+
+    :param path: Путь к файлу отчёта.
+    :type path: str
+    :param kind: Вид отчёта: `load` или `micro`.
+    :type kind: str
+    :param parameters: Параметры запуска.
+    :type parameters: dict
+    :param results: Результаты по сценариям.
+    :type results: dict
+    """
+
+    report = {
+        "kind": kind,
+        "environment": environment(),
+        "parameters": parameters,
+        "results": results,
+    }
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
@@ -0,0 +1,59 @@
+"""
+Модуль заполняет базу данных тестовыми пользователями.
+
+Запуск: `python -m benchmarks.seed --count 100000`. Подключение
+к базе данных берётся из настроек приложения (`DB_*`).
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from sqlalchemy import insert, text
+from benchmarks.data import generate_user
+from src.config.config import get_engine
+from src.models.users import UsersOrm
+
+
+async def seed(count: int, batch_size: int, truncate: bool, seed_value: int) -> None:
+    """
+    Добавить `count` пользователей пакетами по `batch_size`.
+
+    :param count: Количество пользователей.
+    :type count: int
+    :param batch_size: Размер пакета вставки.
+    :type batch_size: int
+    :param truncate: Очистить таблицу перед заполнением.
+    :type truncate: bool
+    :param seed_value: Начальное значение генератора случайных чисел.
+    :type seed_value: int
+    """
+
+    rng = random.Random(seed_value)
+    start = time.perf_counter()
+    engine = get_engine()
+    async with engine.begin() as connection:
+        if truncate:
+            await connection.execute(text("TRUNCATE users RESTART IDENTITY"))
+        for offset in range(0, count, batch_size):
+            rows = [generate_user(rng) for _ in range(min(batch_size, count - offset))]
+            await connection.execute(insert(UsersOrm), rows)
+    await engine.dispose()
+    elapsed = time.perf_counter() - start
+    print(f"Inserted {count} users in {elapsed:.2f}s ({count / elapsed:.0f} rows/s)")
+
+
+def main() -> None:
+    """Разобрать аргументы командной строки и заполнить базу данных."""
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--truncate", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    asyncio.run(seed(args.count, args.batch_size, args.truncate, args.seed))
+
+
+if __name__ == "__main__":
+    main()
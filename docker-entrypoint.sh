@@ -1,3 +1,3 @@
 poetry run alembic upgrade head
 
-exec poetry run uvicorn src.main:app --host 0.0.0.0 --port 8000
\ No newline at end of file
+exec poetry run python -m src.server
\ No newline at end of file
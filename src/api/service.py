@@ -0,0 +1,227 @@
+"""Модуль содержит служебные эндпоинты для наблюдения за работой сервиса."""
+
+from fastapi import APIRouter, Request, Response, status
+from fastapi.responses import JSONResponse
+from src.cache.users import get_page_reads, get_user_reads, get_users_cache
+from src.config.config import get_engine, get_replica_router
+from src.config.pool import InstrumentedAsyncPool, pool_status
+from src.crud.changes import get_change_feed
+from src.crud.ingest import get_users_ingest
+from src.monitoring.metrics import (
+    CACHE_ERRORS,
+    CACHE_EVICTIONS,
+    CACHE_REQUESTS,
+    CONCURRENCY_IN_FLIGHT,
+    CONCURRENCY_LIMIT,
+    CONCURRENCY_QUEUED,
+    CONCURRENCY_REJECTED,
+    DB_POOL_CONNECTIONS,
+    DB_POOL_TIMEOUTS,
+    DB_POOL_WAITS,
+    SINGLEFLIGHT_RATIO,
+    SINGLEFLIGHT_REQUESTS,
+    USERS_CHANGES_GAP,
+    USERS_CHANGES_SUBSCRIBERS,
+    USERS_INGEST_QUEUE,
+    registry,
+)
+from src.repositories.users import uses_memory_storage
+
+
+router = APIRouter(tags=["Service"])
+
+
+@router.get(
+    "/health/live",
+    status_code=status.HTTP_200_OK,
+    summary="Проверка работоспособности",
+    description="Возвращает 200, пока процесс обрабатывает запросы",
+)
+async def get_liveness():
+    """
+    Проверить, что процесс обрабатывает запросы.
+
+    :return: Статус процесса.
+    :rtype: dict
+    """
+
+    return {"status": "ok"}
+
+
+@router.get(
+    "/health/ready",
+    status_code=status.HTTP_200_OK,
+    summary="Проверка готовности",
+    description=(
+        "Возвращает 200 после прогрева пула соединений и 503 во время "
+        "запуска или остановки процесса"
+    ),
+    responses={status.HTTP_503_SERVICE_UNAVAILABLE: {"description": "Не готов"}},
+)
+async def get_readiness(request: Request):
+    """
+    Проверить готовность процесса принимать трафик.
+
+    :param request: Текущий HTTP-запрос.
+    :type request: Request
+    :return: Статус готовности.
+    :rtype: dict | JSONResponse
+    """
+
+    if getattr(request.app.state, "ready", False):
+        return {"status": "ready"}
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"status": "starting"},
+    )
+
+
+@router.get(
+    "/cache/stats",
+    status_code=status.HTTP_200_OK,
+    summary="Статистика кеша пользователей",
+    description=(
+        "Возвращает счётчики попаданий, промахов и вытеснений кеша "
+        "и долю объединённых одновременных чтений"
+    ),
+)
+async def get_cache_stats():
+    """
+    Получить статистику кеша пользователей.
+
+    :return: Имя бэкенда, значения счётчиков и статистика объединения чтений.
+    :rtype: dict
+    """
+
+    return {
+        **await get_users_cache().backend.stats(),
+        "singleflight": {
+            flight.name: flight.counters.as_dict()
+            for flight in (get_user_reads(), get_page_reads())
+        },
+    }
+
+
+@router.get(
+    "/pool/stats",
+    status_code=status.HTTP_200_OK,
+    summary="Статистика пулов соединений",
+    description=(
+        "Возвращает занятые и переполняющие соединения пула, "
+        "гистограммы времени получения и ожидания соединения"
+    ),
+)
+async def get_pool_stats():
+    """
+    Получить статистику пулов соединений основной базы данных и реплик.
+
+    :return: Состояние и статистика пулов.
+    :rtype: dict
+    """
+
+    if uses_memory_storage():
+        return {"primary": None, "replicas": []}
+    return {
+        "primary": pool_status(get_engine().pool),
+        "replicas": [
+            {
+                "host": replica.engine.url.host,
+                "port": replica.engine.url.port,
+                "healthy": replica.healthy,
+                "in_use": replica.in_use,
+                **pool_status(replica.engine.pool),
+            }
+            for replica in get_replica_router().replicas
+        ],
+    }
+
+
+@router.get(
+    "/limits",
+    status_code=status.HTTP_200_OK,
+    summary="Лимиты одновременных запросов",
+    description=(
+        "Возвращает текущие адаптивные лимиты запросов на чтение и запись, "
+        "количество запросов в обработке и в ожидании, сглаженное время "
+        "до начала ответа и счётчики принятых и отклонённых запросов"
+    ),
+)
+async def get_limits(request: Request):
+    """
+    Получить состояние лимитов одновременных запросов процесса.
+
+    :param request: Текущий HTTP-запрос.
+    :type request: Request
+    :return: Состояние лимитов по классам запросов.
+    :rtype: dict
+    """
+
+    return {
+        name: limit.status()
+        for name, limit in request.app.state.concurrency_limits.items()
+    }
+
+
+@router.get(
+    "/metrics",
+    status_code=status.HTTP_200_OK,
+    summary="Метрики Prometheus",
+    description=(
+        "Возвращает метрики процесса в текстовом формате Prometheus: "
+        "время обработки запросов по маршрутам, запросы в обработке, "
+        "количество и время запросов к базе данных, время сериализации, "
+        "состояние пулов соединений, кеша и лимитов одновременных запросов"
+    ),
+    response_class=Response,
+)
+async def get_metrics(request: Request):
+    """
+    Получить метрики процесса в текстовом формате Prometheus.
+
+    :param request: Текущий HTTP-запрос.
+    :type request: Request
+    :return: Ответ с метриками.
+    :rtype: Response
+    """
+
+    if not uses_memory_storage():
+        _collect_pool("primary", get_engine().pool)
+        for replica in get_replica_router().replicas:
+            url = replica.engine.url
+            _collect_pool(f"replica:{url.host}:{url.port}", replica.engine.pool)
+    backend = get_users_cache().backend
+    counters = backend.counters
+    CACHE_REQUESTS.set(counters.hits, (backend.name, "hit"))
+    CACHE_REQUESTS.set(counters.misses, (backend.name, "miss"))
+    CACHE_EVICTIONS.set(counters.evictions, (backend.name,))
+    CACHE_ERRORS.set(counters.errors, (backend.name,))
+    USERS_INGEST_QUEUE.set(get_users_ingest().size)
+    USERS_CHANGES_SUBSCRIBERS.set(get_change_feed().subscribers)
+    USERS_CHANGES_GAP.set(get_change_feed().gap_seconds)
+    for flight in (get_user_reads(), get_page_reads()):
+        SINGLEFLIGHT_REQUESTS.set(flight.counters.executed, (flight.name, "executed"))
+        SINGLEFLIGHT_REQUESTS.set(flight.counters.shared, (flight.name, "shared"))
+        SINGLEFLIGHT_RATIO.set(flight.counters.coalesce_ratio, (flight.name,))
+    for name, limit in request.app.state.concurrency_limits.items():
+        CONCURRENCY_LIMIT.set(int(limit.limit), (name,))
+        CONCURRENCY_IN_FLIGHT.set(limit.in_flight, (name,))
+        CONCURRENCY_QUEUED.set(limit.queued, (name,))
+        CONCURRENCY_REJECTED.set(limit.rejected, (name,))
+    return Response(content=registry.render(), media_type="text/plain; version=0.0.4")
+
+
+def _collect_pool(name: str, pool: InstrumentedAsyncPool) -> None:
+    """
+    Обновить метрики пула соединений перед выдачей.
+
+    :param name: Имя пула в метке `pool`.
+    :type name: str
+    :param pool: Пул соединений.
+    :type pool: InstrumentedAsyncPool
+    """
+
+    DB_POOL_CONNECTIONS.set(pool.checkedout(), (name, "checked_out"))
+    DB_POOL_CONNECTIONS.set(pool.checkedin(), (name, "checked_in"))
+    DB_POOL_CONNECTIONS.set(max(pool.overflow(), 0), (name, "overflow"))
+    DB_POOL_WAITS.set(pool.stats.waits, (name,))
+    DB_POOL_TIMEOUTS.set(pool.stats.timeouts, (name,))
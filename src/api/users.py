@@ -1,35 +1,981 @@
 """Модуль содержит эндпоинты, связанные с пользователем."""
 
-from fastapi import APIRouter, status, Depends, Response
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator
+from fastapi import (
+    APIRouter,
+    status,
+    Depends,
+    Request,
+    Response,
+    Query,
+    Body,
+    Header,
+)
+from fastapi.responses import JSONResponse, StreamingResponse
 from typing import Annotated
-from sqlalchemy.ext.asyncio import AsyncSession
-from src.crud.users import UsersCRUD
-from src.schemas.users import UserCreate, User, UserUpdate
-from src.config.config import get_session
-from src.exceptions.exceptions import not_found
+from src.crud.changes import get_change_feed
+from src.crud.ingest import get_users_ingest
+from src.schemas.users import (
+    UserCreate,
+    User,
+    UserUpdate,
+    UsersPage,
+    UsersLayout,
+    UserBulkUpdate,
+    BulkResult,
+    UsersFilter,
+    UsersSort,
+    RelationshipStatus,
+    IngestTicket,
+    ImportResult,
+    TransferFormat,
+    UsersStats,
+    UsersLookup,
+    UsersHobbies,
+    HobbyMatch,
+    UserChange,
+    hobby_tags,
+)
+from src.exceptions.exceptions import (
+    not_found,
+    bad_request,
+    service_unavailable,
+    invalid_input,
+)
+from src.repositories.base import UsersRepository
+from src.repositories.users import (
+    get_read_users_repository,
+    get_users_repository,
+    users_repository,
+)
+from src.monitoring.requests import serialization_timer
+from src.settings.settings import get_settings
+from src.utils.etag import (
+    PageValidators,
+    is_not_modified,
+    make_etag,
+    not_modified,
+    parse_if_match,
+    validator_headers,
+    variant_etag,
+)
+from src.utils.pagination import encode_cursor, decode_cursor
+from src.utils.responses import (
+    MSGPACK_MEDIA_TYPE,
+    FastJSONResponse,
+    MsgPackResponse,
+    msgpack_available,
+)
+from src.utils.serializers import (
+    encode_users_page,
+    encoded_user_validators,
+    users_columns,
+    users_records,
+)
+from src.utils.transfer import csv_records, iter_lines, ndjson_records
+
+
+router = APIRouter(
+    prefix="/users", tags=["Users"], default_response_class=FastJSONResponse
+)
+
+logger = logging.getLogger(__name__)
+
+
+def get_users_filter(
+    age_min: Annotated[int | None, Query(description="Минимальный возраст")] = None,
+    age_max: Annotated[int | None, Query(description="Максимальный возраст")] = None,
+    relationship_status: Annotated[
+        RelationshipStatus | None, Query(description="Семейное положение")
+    ] = None,
+    name: Annotated[
+        str | None,
+        Query(min_length=1, max_length=15, description="Начало имени"),
+    ] = None,
+    surname: Annotated[
+        str | None,
+        Query(min_length=1, max_length=15, description="Начало фамилии"),
+    ] = None,
+    hobbies: Annotated[
+        str | None,
+        Query(min_length=3, max_length=100, description="Подстрока хобби"),
+    ] = None,
+    hobby: Annotated[
+        list[str] | None,
+        Query(max_length=20, description="Тег хобби, можно указать несколько"),
+    ] = None,
+    hobby_match: Annotated[
+        HobbyMatch, Query(description="Нужно любое из хобби `hobby` или все")
+    ] = HobbyMatch.ANY,
+    sort: Annotated[UsersSort, Query(description="Ключ сортировки")] = UsersSort.ID,
+) -> UsersFilter:
+    """
+    Собрать условия отбора и сортировки списка из параметров запроса.
 
+    Поиск по хобби требует не менее трёх символов, чтобы запрос
+    мог использовать триграммный индекс. Отбор по тегам `hobby`
+    использует GIN индекс столбца `hobby_tags`.
 
-router = APIRouter(prefix="/users", tags=["Users"])
+    :return: Условия отбора и сортировки.
+    :rtype: UsersFilter
+    """
+
+    return UsersFilter(
+        age_min=age_min,
+        age_max=age_max,
+        relationship_status=relationship_status,
+        name=name,
+        surname=surname,
+        hobbies=hobbies,
+        hobby=hobby,
+        hobby_match=hobby_match,
+        sort=sort,
+    )
 
 
 @router.get(
     "/",
-    response_model=list[User],
+    response_model=UsersPage,
     status_code=status.HTTP_200_OK,
     summary="Получить всех пользователей",
-    description="Возвращает список всех пользователей",
+    description=(
+        "Возвращает страницу пользователей с отбором и сортировкой. "
+        "Для получения следующей страницы передайте `next_cursor` в параметре "
+        "`cursor`. С параметром `stream=true` возвращает всех подходящих "
+        "пользователей в формате NDJSON. С параметром `ids=1,2,3` возвращает "
+        "пользователей с указанными ID в порядке запроса и список "
+        "ненайденных ID. С параметром `layout=columns` значения каждого поля "
+        "передаются одним списком. При заголовке `Accept: application/x-msgpack` "
+        "страница кодируется в MessagePack."
+    ),
+)
+async def get_users(
+    request: Request,
+    response: Response,
+    repository: Annotated[UsersRepository, Depends(get_read_users_repository)],
+    users_filter: Annotated[UsersFilter, Depends(get_users_filter)],
+    after_id: Annotated[int | None, Query()] = None,
+    cursor: Annotated[str | None, Query()] = None,
+    limit: Annotated[
+        int | None,
+        Query(ge=1, description="Размер страницы, не больше USERS_MAX_PAGE_SIZE"),
+    ] = None,
+    stream: Annotated[bool, Query()] = False,
+    ids: Annotated[
+        str | None, Query(description="ID пользователей через запятую")
+    ] = None,
+    layout: Annotated[
+        UsersLayout, Query(description="Представление страницы")
+    ] = UsersLayout.OBJECTS,
+):
+    """
+    Получить страницу пользователей, поток всех подходящих пользователей
+    или пользователей по списку ID.
+
+    Страница сопровождается заголовками ETag и Last-Modified. Если запрос
+    содержит If-None-Match или If-Modified-Since, сначала выполняется
+    агрегатный запрос по странице, и при совпадении возвращается 304
+    без выборки и сериализации строк.
+
+    :param request: Текущий HTTP-запрос.
+    :type request: Request
+    :param response: Ответ, в который добавляются заголовки ETag
+        и Last-Modified.
+    :type response: Response
+    :param repository: Хранилище пользователей.
+    :type repository: UsersRepository
+    :param users_filter: Условия отбора и сортировки.
+    :type users_filter: UsersFilter
+    :param after_id: ID, после которого начинается страница.
+        Допустим только при сортировке по ID.
+    :type after_id: int | None
+    :param cursor: Непрозрачный курсор из поля `next_cursor` предыдущей страницы.
+    :type cursor: str | None
+    :param limit: Размер страницы, по умолчанию `USERS_PAGE_SIZE`.
+    :type limit: int | None
+    :param stream: Вернуть всех подходящих пользователей потоком NDJSON.
+    :type stream: bool
+    :param ids: ID пользователей через запятую. Если задан, остальные
+        параметры не используются.
+    :type ids: str | None
+    :param layout: Представление страницы: список объектов или столбцы.
+    :type layout: UsersLayout
+    :raises HTTPException: 400, если позиция страницы или список ID
+        заданы некорректно.
+    :return: Страница пользователей, потоковый ответ, пользователи
+        по списку ID или ответ 304.
+    :rtype: UsersPage | Response
+    """
+
+    if ids is not None:
+        # Ответ формируется здесь, чтобы схема страницы не проверялась
+        # как объединение двух моделей в основном сценарии.
+        result = await _lookup_users(_parse_ids(ids), repository)
+        with serialization_timer():
+            content = result.model_dump_json()
+        return Response(content=content, media_type="application/json")
+    settings = get_settings()
+    if limit is None:
+        limit = settings.USERS_PAGE_SIZE
+    elif limit > settings.USERS_MAX_PAGE_SIZE:
+        raise invalid_input(
+            ("query", "limit"),
+            "less_than_equal",
+            f"Input should be less than or equal to {settings.USERS_MAX_PAGE_SIZE}",
+            limit,
+            le=settings.USERS_MAX_PAGE_SIZE,
+        )
+    sort = users_filter.sort
+    after_value = None
+    if after_id is not None and cursor is not None:
+        raise bad_request(detail="Use either after_id or cursor")
+    if after_id is not None and sort.field != "id":
+        raise bad_request(detail="after_id requires sort by id")
+    if cursor is not None:
+        after_id, after_value = decode_cursor(cursor, sort=sort.value)
+        expected = int if sort.field == "age" else str
+        if sort.field != "id" and not isinstance(after_value, expected):
+            raise bad_request(detail="Invalid cursor")
+    if stream:
+        return StreamingResponse(
+            _stream_users_ndjson(users_filter, after_id, after_value),
+            media_type="application/x-ndjson",
+        )
+    use_msgpack = msgpack_available() and MSGPACK_MEDIA_TYPE in request.headers.get(
+        "accept", ""
+    )
+    variant = _page_variant(layout, use_msgpack)
+    if "if-none-match" in request.headers or "if-modified-since" in request.headers:
+        validators = await repository.get_users_validators(
+            users_filter=users_filter,
+            after_id=after_id,
+            after_value=after_value,
+            limit=limit + 1,
+        )
+        etag = (
+            validators.etag
+            if variant is None
+            else variant_etag(validators.etag, variant)
+        )
+        if is_not_modified(request.headers, etag, validators.updated_at):
+            return not_modified(etag, validators.updated_at)
+    if variant is not None or settings.USERS_FAST_READ_PATH:
+        rows = await repository.get_users_rows(
+            users_filter=users_filter,
+            after_id=after_id,
+            after_value=after_value,
+            limit=limit + 1,
+        )
+        validators = PageValidators.from_rows(rows)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(
+                last.id, sort=sort.value, last_value=getattr(last, sort.field)
+            )
+        if variant is not None:
+            headers = validator_headers(
+                variant_etag(validators.etag, variant), validators.updated_at
+            )
+            headers["Vary"] = "Accept"
+            return _users_page_response(rows, next_cursor, layout, use_msgpack, headers)
+        with serialization_timer():
+            content = encode_users_page(rows, next_cursor)
+        return Response(
+            content=content,
+            media_type="application/json",
+            headers=validator_headers(validators.etag, validators.updated_at),
+        )
+    users = await repository.get_users(
+        users_filter=users_filter,
+        after_id=after_id,
+        after_value=after_value,
+        limit=limit + 1,
+    )
+    validators = PageValidators.from_rows(users)
+    response.headers.update(validator_headers(validators.etag, validators.updated_at))
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        last = users[-1]
+        next_cursor = encode_cursor(
+            last.id, sort=sort.value, last_value=getattr(last, sort.field)
+        )
+    return {"items": users, "next_cursor": next_cursor}
+
+
+def _page_variant(layout: UsersLayout, use_msgpack: bool) -> str | None:
+    """
+    Получить имя представления страницы для ETag.
+
+    :param layout: Представление страницы.
+    :type layout: UsersLayout
+    :param use_msgpack: Страница кодируется в MessagePack.
+    :type use_msgpack: bool
+    :return: Имя представления или None для JSON-списка объектов.
+    :rtype: str | None
+    """
+
+    if use_msgpack:
+        return f"msgpack-{layout.value}"
+    if layout is UsersLayout.COLUMNS:
+        return layout.value
+    return None
+
+
+def _users_page_response(
+    rows: list,
+    next_cursor: str | None,
+    layout: UsersLayout,
+    use_msgpack: bool,
+    headers: dict[str, str],
+) -> Response:
+    """
+    Сформировать ответ со страницей в компактном представлении.
+
+    :param rows: Строки пользователей страницы.
+    :type rows: list
+    :param next_cursor: Курсор следующей страницы.
+    :type next_cursor: str | None
+    :param layout: Представление страницы.
+    :type layout: UsersLayout
+    :param use_msgpack: Кодировать страницу в MessagePack.
+    :type use_msgpack: bool
+    :param headers: Заголовки ответа.
+    :type headers: dict[str, str]
+    :return: Ответ в JSON или MessagePack.
+    :rtype: Response
+    """
+
+    with serialization_timer():
+        if layout is UsersLayout.COLUMNS:
+            content = {
+                "columns": users_columns(rows),
+                "count": len(rows),
+                "next_cursor": next_cursor,
+            }
+        else:
+            content = {"items": users_records(rows), "next_cursor": next_cursor}
+    response_class = MsgPackResponse if use_msgpack else FastJSONResponse
+    return response_class(content, headers=headers)
+
+
+async def _stream_users_ndjson(
+    users_filter: UsersFilter, after_id: int | None, after_value: int | str | None
+) -> AsyncIterator[bytes]:
+    """
+    Сформировать тело NDJSON-ответа со всеми подходящими пользователями.
+
+    Генератор открывает собственную сессию: сессия из зависимости
+    закрывается до начала отправки потокового ответа.
+
+    :param users_filter: Условия отбора и сортировки.
+    :type users_filter: UsersFilter
+    :param after_id: ID, после которого начинается выборка.
+    :type after_id: int | None
+    :param after_value: Значение поля сортировки, после которого
+        начинается выборка.
+    :type after_value: int | str | None
+    :return: Асинхронный итератор порций NDJSON.
+    :rtype: AsyncIterator[bytes]
+    """
+
+    async with users_repository(read=True) as repository:
+        async for users in repository.stream_users(
+            users_filter=users_filter,
+            after_id=after_id,
+            after_value=after_value,
+            chunk_size=get_settings().USERS_STREAM_CHUNK_SIZE,
+        ):
+            with serialization_timer():
+                chunk = b"".join(
+                    User.model_validate(user).model_dump_json().encode() + b"\n"
+                    for user in users
+                )
+            yield chunk
+
+
+@router.post(
+    "/lookup",
+    response_model=UsersLookup,
+    status_code=status.HTTP_200_OK,
+    summary="Получить пользователей по списку ID",
+    description=(
+        "Возвращает пользователей с ID из тела запроса одним запросом "
+        "к базе данных в порядке запроса и список ненайденных ID. "
+        "Вариант `GET /users?ids=` для больших списков"
+    ),
+)
+async def lookup_users(
+    ids: Annotated[
+        list[int],
+        Body(embed=True, min_length=1),
+    ],
+    repository: Annotated[UsersRepository, Depends(get_read_users_repository)],
+):
+    """
+    Получить пользователей по списку ID.
+
+    :param ids: Идентификаторы пользователей.
+    :type ids: list[int]
+    :param repository: Хранилище пользователей.
+    :type repository: UsersRepository
+    :return: Найденные пользователи и ненайденные ID.
+    :rtype: UsersLookup
+    """
+
+    _check_items(ids, get_settings().USERS_LOOKUP_MAX_IDS, ("body", "ids"))
+    return await _lookup_users(ids, repository)
+
+
+def _check_items(items: list, max_items: int, location: tuple[str, ...]) -> None:
+    """
+    Проверить количество элементов тела запроса.
+
+    Граница берётся из настроек при запросе, а не при объявлении
+    маршрута, поэтому ошибка повторяет ответ 422 проверки `max_length`.
+
+    :param items: Элементы тела запроса.
+    :type items: list
+    :param max_items: Максимальное количество элементов.
+    :type max_items: int
+    :param location: Положение значения в запросе.
+    :type location: tuple[str, ...]
+    :raises RequestValidationError: Если элементов больше `max_items`.
+    """
+
+    if len(items) > max_items:
+        raise invalid_input(
+            location,
+            "too_long",
+            f"List should have at most {max_items} items after validation, "
+            f"not {len(items)}",
+            None,
+            field_type="List",
+            max_length=max_items,
+            actual_length=len(items),
+        )
+
+
+def _parse_ids(value: str) -> list[int]:
+    """
+    Разобрать список ID из параметра запроса.
+
+    :param value: ID через запятую.
+    :type value: str
+    :raises HTTPException: 400, если список пуст, слишком длинный
+        или содержит не числа.
+    :return: Идентификаторы в порядке запроса.
+    :rtype: list[int]
+    """
+
+    try:
+        ids = [int(part) for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise bad_request(detail="ids must be comma-separated integers")
+    if not ids:
+        raise bad_request(detail="ids must not be empty")
+    max_ids = get_settings().USERS_LOOKUP_MAX_IDS
+    if len(ids) > max_ids:
+        raise bad_request(detail=f"Too many ids, at most {max_ids} allowed")
+    return ids
+
+
+async def _lookup_users(ids: list[int], repository: UsersRepository) -> UsersLookup:
+    """
+    Загрузить пользователей одним запросом и упорядочить по запросу.
+
+    Повторяющиеся ID возвращаются один раз, в позиции первого вхождения.
+
+    :param ids: Идентификаторы пользователей.
+    :type ids: list[int]
+    :param repository: Хранилище пользователей.
+    :type repository: UsersRepository
+    :return: Найденные пользователи и ненайденные ID.
+    :rtype: UsersLookup
+    """
+
+    users = await repository.get_users_by_ids(ids)
+    items = []
+    missing = []
+    for user_id in dict.fromkeys(ids):
+        user = users.get(user_id)
+        if user is None:
+            missing.append(user_id)
+        else:
+            items.append(user)
+    return UsersLookup(items=items, missing=missing)
+
+
+@router.post(
+    "/bulk",
+    response_model=BulkResult,
+    status_code=status.HTTP_200_OK,
+    summary="Создать пользователей пакетом",
+    description=(
+        "Создает пользователей одним запросом к базе данных "
+        "и возвращает результат по каждому элементу"
+    ),
+)
+async def create_users(
+    users_data: Annotated[list[UserCreate], Body(min_length=1)],
+    repository: Annotated[UsersRepository, Depends(get_users_repository)],
+):
+    """
+    Создать пользователей пакетом.
+
+    :param users_data: Данные новых пользователей.
+    :type users_data: list[UserCreate]
+    :param repository: Хранилище пользователей.
+    :type repository: UsersRepository
+    :return: Результат по каждому элементу.
+    :rtype: BulkResult
+    """
+
+    _check_items(users_data, get_settings().USERS_BULK_MAX_ITEMS, ("body",))
+    return await repository.create_users(users_data=users_data)
+
+
+@router.patch(
+    "/bulk",
+    response_model=BulkResult,
+    status_code=status.HTTP_200_OK,
+    summary="Обновить пользователей пакетом",
+    description=(
+        "Обновляет пользователей одним запросом к базе данных "
+        "и возвращает результат по каждому элементу"
+    ),
+)
+async def update_users(
+    users_data: Annotated[
+        list[UserBulkUpdate],
+        Body(min_length=1),
+    ],
+    repository: Annotated[UsersRepository, Depends(get_users_repository)],
+):
+    """
+    Обновить пользователей пакетом.
+
+    :param users_data: Обновлённые данные пользователей вместе с ID.
+    :type users_data: list[UserBulkUpdate]
+    :param repository: Хранилище пользователей.
+    :type repository: UsersRepository
+    :return: Результат по каждому элементу.
+    :rtype: BulkResult
+    """
+
+    _check_items(users_data, get_settings().USERS_BULK_MAX_ITEMS, ("body",))
+    return await repository.update_users(users_data=users_data)
+
+
+@router.delete(
+    "/bulk",
+    response_model=BulkResult,
+    status_code=status.HTTP_200_OK,
+    summary="Удалить пользователей пакетом",
+    description=(
+        "Удаляет пользователей одним запросом к базе данных "
+        "и возвращает результат по каждому элементу"
+    ),
+)
+async def delete_users(
+    ids: Annotated[
+        list[int],
+        Body(embed=True, min_length=1),
+    ],
+    repository: Annotated[UsersRepository, Depends(get_users_repository)],
+):
+    """
+    Удалить пользователей пакетом.
+
+    :param ids: Идентификаторы удаляемых пользователей.
+    :type ids: list[int]
+    :param repository: Хранилище пользователей.
+    :type repository: UsersRepository
+    :return: Результат по каждому элементу.
+    :rtype: BulkResult
+    """
+
+    _check_items(ids, get_settings().USERS_BULK_MAX_ITEMS, ("body", "ids"))
+    return await repository.delete_users(user_ids=ids)
+
+
+@router.post(
+    "/import",
+    response_model=ImportResult,
+    status_code=status.HTTP_200_OK,
+    summary="Импортировать пользователей",
+    description=(
+        "Загружает пользователей из тела запроса в формате CSV с заголовком "
+        "или NDJSON. Формат задаётся параметром `format` или заголовком "
+        "Content-Type (`text/csv`, `application/x-ndjson`). Тело читается "
+        "потоком, записи проверяются и копируются в базу данных порциями "
+        "через COPY. В ответе — скорость импорта и отклонённые записи"
+    ),
+)
+async def import_users(
+    request: Request,
+    repository: Annotated[UsersRepository, Depends(get_users_repository)],
+    data_format: Annotated[
+        TransferFormat | None, Query(alias="format", description="Формат данных")
+    ] = None,
+):
+    """
+    Импортировать пользователей из CSV или NDJSON.
+
+    :param request: Текущий HTTP-запрос с данными в теле.
+    :type request: Request
+    :param repository: Хранилище пользователей.
+    :type repository: UsersRepository
+    :param data_format: Формат данных. По умолчанию определяется
+        по заголовку Content-Type.
+    :type data_format: TransferFormat | None
+    :raises HTTPException: 400, если формат не определён или база данных
+        отклонила данные.
+    :return: Итог импорта.
+    :rtype: ImportResult
+    """
+
+    if data_format is None:
+        content_type = request.headers.get("content-type", "")
+        if "csv" in content_type:
+            data_format = TransferFormat.CSV
+        elif "ndjson" in content_type or "jsonl" in content_type:
+            data_format = TransferFormat.NDJSON
+        else:
+            raise bad_request(detail="Unknown import format")
+    parse = csv_records if data_format == TransferFormat.CSV else ndjson_records
+    settings = get_settings()
+    return await repository.import_users(
+        records=parse(iter_lines(request.stream())),
+        chunk_size=settings.USERS_IMPORT_CHUNK_SIZE,
+        max_errors=settings.USERS_IMPORT_MAX_ERRORS,
+    )
+
+
+@router.get(
+    "/export",
+    status_code=status.HTTP_200_OK,
+    summary="Экспортировать пользователей",
+    description=(
+        "Выгружает подходящих пользователей потоком в формате CSV "
+        "с заголовком или NDJSON через COPY ... TO STDOUT"
+    ),
+    response_class=StreamingResponse,
+)
+async def export_users(
+    users_filter: Annotated[UsersFilter, Depends(get_users_filter)],
+    data_format: Annotated[
+        TransferFormat, Query(alias="format", description="Формат данных")
+    ] = TransferFormat.CSV,
+):
+    """
+    Экспортировать пользователей в CSV или NDJSON.
+
+    :param users_filter: Условия отбора и сортировки.
+    :type users_filter: UsersFilter
+    :param data_format: Формат данных.
+    :type data_format: TransferFormat
+    :return: Потоковый ответ с файлом.
+    :rtype: StreamingResponse
+    """
+
+    if data_format == TransferFormat.CSV:
+        media_type = "text/csv"
+    else:
+        media_type = "application/x-ndjson"
+    return StreamingResponse(
+        _export_users(users_filter, data_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="users.{data_format}"'},
+    )
+
+
+async def _export_users(
+    users_filter: UsersFilter, data_format: TransferFormat
+) -> AsyncIterator[bytes]:
+    """
+    Сформировать тело выгрузки из порций, получаемых от COPY.
+
+    COPY выполняется в отдельной задаче и передаёт порции через
+    ограниченную очередь: если клиент читает медленнее, чем отдаёт
+    база данных, задача ждёт, а не накапливает данные в памяти.
+
+    :param users_filter: Условия отбора и сортировки.
+    :type users_filter: UsersFilter
+    :param data_format: Формат данных.
+    :type data_format: TransferFormat
+    :return: Асинхронный итератор порций файла.
+    :rtype: AsyncIterator[bytes]
+    """
+
+    chunks: asyncio.Queue[bytes | None] = asyncio.Queue(maxsize=16)
+
+    async def put(data: bytes) -> None:
+        # asyncpg может переиспользовать буфер, поэтому порция копируется.
+        await chunks.put(bytes(data))
+
+    async def copy() -> None:
+        start = time.perf_counter()
+        try:
+            async with users_repository(read=True) as repository:
+                rows = await repository.export_users(users_filter, data_format, put)
+        finally:
+            await chunks.put(None)
+        seconds = time.perf_counter() - start
+        logger.info(
+            "Exported %d users in %.2fs (%.0f rows/s)",
+            rows,
+            seconds,
+            rows / seconds if seconds else 0,
+        )
+
+    task = asyncio.create_task(copy())
+    try:
+        while (chunk := await chunks.get()) is not None:
+            yield chunk
+        await task
+    finally:
+        task.cancel()
+
+
+@router.get(
+    "/ingest/{tracking_id}",
+    response_model=IngestTicket,
+    status_code=status.HTTP_200_OK,
+    summary="Состояние пользователя в очереди",
+    description=(
+        "Возвращает состояние пользователя, принятого в очередь на создание. "
+        "Состояние хранится в процессе, принявшем запрос"
+    ),
+)
+async def get_ingest_status(tracking_id: str):
+    """
+    Получить состояние пользователя по идентификатору отслеживания.
+
+    :param tracking_id: Идентификатор отслеживания из ответа 202.
+    :type tracking_id: str
+    :raises HTTPException: 404, если идентификатор неизвестен.
+    :return: Состояние пользователя в очереди.
+    :rtype: IngestTicket
+    """
+
+    ticket = get_users_ingest().status(tracking_id)
+    if ticket is None:
+        raise not_found(entity="Ingest ticket")
+    return ticket
+
+
+@router.get(
+    "/stats",
+    response_model=UsersStats,
+    status_code=status.HTTP_200_OK,
+    summary="Статистика пользователей",
+    description=(
+        "Возвращает общее количество пользователей, средний возраст, "
+        "количество по семейному положению и гистограмму возрастов. "
+        "Значения берутся из таблицы счётчиков, которую поддерживают "
+        "триггеры, без просмотра таблицы пользователей"
+    ),
+)
+async def get_users_stats(
+    repository: Annotated[UsersRepository, Depends(get_read_users_repository)],
+    bucket_size: Annotated[
+        int, Query(ge=1, le=100, description="Ширина интервала возрастов")
+    ] = 10,
+):
+    """
+    Получить сводную статистику пользователей.
+
+    :param repository: Хранилище пользователей.
+    :type repository: UsersRepository
+    :param bucket_size: Ширина интервала гистограммы возрастов.
+    :type bucket_size: int
+    :return: Статистика пользователей.
+    :rtype: UsersStats
+    """
+
+    return await repository.get_stats(bucket_size)
+
+
+@router.get(
+    "/hobbies",
+    response_model=UsersHobbies,
+    status_code=status.HTTP_200_OK,
+    summary="Количество пользователей по хобби",
+    description=(
+        "Возвращает количество пользователей по тегам хобби `hobby` "
+        "или по самым частым тегам. Значения берутся из таблицы счётчиков, "
+        "которую поддерживают триггеры"
+    ),
+)
+async def get_users_hobbies(
+    repository: Annotated[UsersRepository, Depends(get_read_users_repository)],
+    hobby: Annotated[
+        list[str] | None,
+        Query(max_length=100, description="Тег хобби, можно указать несколько"),
+    ] = None,
+    limit: Annotated[
+        int, Query(ge=1, le=1000, description="Количество самых частых тегов")
+    ] = 20,
+):
+    """
+    Получить количество пользователей по тегам хобби.
+
+    :param repository: Хранилище пользователей.
+    :type repository: UsersRepository
+    :param hobby: Теги хобби. Без них возвращаются самые частые теги.
+    :type hobby: list[str] | None
+    :param limit: Количество самых частых тегов.
+    :type limit: int
+    :return: Количество пользователей по тегам.
+    :rtype: UsersHobbies
+    """
+
+    hobbies = hobby_tags(",".join(hobby or ()))
+    return await repository.get_hobbies(hobbies or None, limit)
+
+
+@router.get(
+    "/changes",
+    status_code=status.HTTP_200_OK,
+    summary="Лента изменений пользователей",
+    description=(
+        "Поток Server-Sent Events с изменениями пользователей: событие "
+        "`create`, `update` или `delete` с номером изменения в `id`. "
+        "После переподключения с заголовком `Last-Event-ID` или параметром "
+        "`since` сначала передаются пропущенные изменения. Если они уже "
+        "удалены из журнала, передаётся событие `reset`, и данные нужно "
+        "перечитать"
+    ),
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}},
 )
-async def get_users(session: Annotated[AsyncSession, Depends(get_session)]):
+async def get_users_changes(
+    last_event_id: Annotated[str | None, Header()] = None,
+    since: Annotated[
+        int | None, Query(ge=0, description="Номер, после которого продолжить")
+    ] = None,
+):
+    """
+    Подписаться на изменения пользователей.
+
+    :param last_event_id: Номер последнего полученного события,
+        браузер передаёт его при переподключении.
+    :type last_event_id: str | None
+    :param since: Номер, после которого продолжить, если нет
+        `Last-Event-ID`.
+    :type since: int | None
+    :raises HTTPException: 400 при неверном `Last-Event-ID`,
+        503, если лента не запущена.
+    :return: Потоковый ответ text/event-stream.
+    :rtype: StreamingResponse
+    """
+
+    if not get_change_feed().running:
+        raise service_unavailable(detail="Change feed is not running")
+    after = since
+    if last_event_id is not None:
+        try:
+            after = int(last_event_id)
+        except ValueError:
+            raise bad_request(detail="Invalid Last-Event-ID")
+    return StreamingResponse(
+        _stream_changes(after),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _stream_changes(after: int | None) -> AsyncIterator[bytes]:
+    """
+    Передать пропущенные изменения из журнала, затем новые из ленты.
+
+    Подписка оформляется до чтения журнала, поэтому изменение,
+    зафиксированное между чтением журнала и ожиданием ленты, не теряется,
+    а повторы отбрасываются по номеру. Журнал читается только до номера,
+    который уже разослала лента: выше него ещё могут появиться изменения
+    с меньшими номерами из незафиксированных транзакций.
+
+    :param after: Номер, после которого продолжить, или None — только
+        новые изменения.
+    :type after: int | None
+    :return: Асинхронный итератор событий.
+    :rtype: AsyncIterator[bytes]
+    """
+
+    settings = get_settings()
+    feed = get_change_feed()
+    queue = feed.subscribe()
+    try:
+        yield b"retry: 3000\n\n"
+        async with users_repository() as repository:
+            first, last = await repository.get_changes_range()
+        position = last if feed.position is None else min(feed.position, last)
+        if after is not None and first - 1 <= after <= last:
+            end, position = position, after
+            while position < end:
+                async with users_repository() as repository:
+                    changes = await repository.get_changes(
+                        position, settings.USERS_CHANGES_BATCH_SIZE
+                    )
+                changes = [change for change in changes if change.seq <= end]
+                for change in changes:
+                    yield _change_event(change)
+                    position = change.seq
+                if len(changes) < settings.USERS_CHANGES_BATCH_SIZE:
+                    break
+        elif after is not None:
+            yield _sse("reset", f'{{"seq":{position}}}', position)
+        while True:
+            try:
+                change = await asyncio.wait_for(
+                    queue.get(), settings.USERS_CHANGES_KEEPALIVE
+                )
+            except TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            if change is None:
+                return
+            if change.seq > position:
+                yield _change_event(change)
+                position = change.seq
+    finally:
+        feed.unsubscribe(queue)
+
+
+def _change_event(change: UserChange) -> bytes:
+    """
+    Сформировать событие изменения пользователя.
+
+    :param change: Изменение пользователя.
+    :type change: UserChange
+    :return: Событие в формате text/event-stream.
+    :rtype: bytes
+    """
+
+    return _sse(change.operation, change.model_dump_json(), change.seq)
+
+
+def _sse(event: str, data: str, event_id: int) -> bytes:
     """
-    Получить список всех пользователей.
+    Сформировать событие Server-Sent Events.
 
-    :param session: Асинхронная сессия SQLAlchemy.
-    :type session: AsyncSession
-    :return: Список пользователей.
-    :rtype: list[User]
+    :param event: Тип события.
+    :type event: str
+    :param data: Данные события в одну строку.
+    :type data: str
+    :param event_id: ID события.
+    :type event_id: int
+    :return: Событие в формате text/event-stream.
+    :rtype: bytes
     """
 
-    return await UsersCRUD.get_users(session=session)
+    return f"id: {event_id}\nevent: {event}\ndata: {data}\n\n".encode()
 
 
 @router.get(
@@ -40,24 +986,54 @@ async def get_users(session: Annotated[AsyncSession, Depends(get_session)]):
     description="Возвращает информацию о конкретном пользователе",
 )
 async def get_user(
-    user_id: int, session: Annotated[AsyncSession, Depends(get_session)]
+    user_id: int,
+    request: Request,
+    response: Response,
+    repository: Annotated[UsersRepository, Depends(get_read_users_repository)],
 ):
     """
     Получить пользователя по ID.
 
+    Версия записи возвращается в заголовке ETag, время изменения —
+    в Last-Modified. При совпадении If-None-Match или If-Modified-Since
+    возвращается 304 без тела.
+
     :param user_id: Идентификатор пользователя.
     :type user_id: int
-    :param session: Асинхронная сессия SQLAlchemy.
-    :type session: AsyncSession
+    :param request: Текущий HTTP-запрос.
+    :type request: Request
+    :param response: Ответ, в который добавляются заголовки ETag
+        и Last-Modified.
+    :type response: Response
+    :param repository: Хранилище пользователей.
+    :type repository: UsersRepository
     :raises HTTPException: 404, если пользователь не найден.
-    :return: Пользователь.
-    :rtype: User
+    :return: Пользователь, готовый JSON-ответ в режиме быстрого чтения
+        или ответ 304.
+    :rtype: User | Response
     """
 
-    user = await UsersCRUD.get_user(user_id, session)
-    if user:
-        return user
-    raise not_found(entity="User")
+    if get_settings().USERS_FAST_READ_PATH:
+        content = await repository.get_user_json(user_id)
+        if content is None:
+            raise not_found(entity="User")
+        version, updated_at = encoded_user_validators(content)
+        etag = make_etag(version)
+        if is_not_modified(request.headers, etag, updated_at):
+            return not_modified(etag, updated_at)
+        return Response(
+            content=content,
+            media_type="application/json",
+            headers=validator_headers(etag, updated_at),
+        )
+    user = await repository.get_user(user_id)
+    if user is None:
+        raise not_found(entity="User")
+    etag = make_etag(user.version)
+    if is_not_modified(request.headers, etag, user.updated_at):
+        return not_modified(etag, user.updated_at)
+    response.headers.update(validator_headers(etag, user.updated_at))
+    return user
 
 
 @router.post(
@@ -65,23 +1041,65 @@ async def get_user(
     response_model=User,
     status_code=status.HTTP_201_CREATED,
     summary="Создать нового пользователя",
-    description="Создает нового пользователя",
+    description=(
+        "Создает нового пользователя. Если включён приём через очередь "
+        "(`USERS_INGEST_ENABLED`), пользователь записывается в базу пакетом "
+        "вместе с другими: с `wait=false` сразу возвращается 202 "
+        "с идентификатором отслеживания, с `wait=true` — 201 после записи. "
+        "При заполненной очереди возвращается 429"
+    ),
+    responses={
+        status.HTTP_202_ACCEPTED: {"model": IngestTicket},
+        status.HTTP_429_TOO_MANY_REQUESTS: {"description": "Очередь заполнена"},
+    },
 )
 async def create_user(
-    user_data: UserCreate, session: Annotated[AsyncSession, Depends(get_session)]
+    user_data: UserCreate,
+    response: Response,
+    repository: Annotated[UsersRepository, Depends(get_users_repository)],
+    wait: Annotated[
+        bool | None, Query(description="Дождаться записи в режиме очереди")
+    ] = None,
 ):
     """
     Создать нового пользователя.
 
     :param user_data: Данные нового пользователя.
     :type user_data: UserCreate
-    :param session: Асинхронная сессия SQLAlchemy.
-    :type session: AsyncSession
-    :return: Созданный пользователь.
-    :rtype: User
+    :param response: Ответ, в который добавляются заголовки ETag
+        и Last-Modified.
+    :type response: Response
+    :param repository: Хранилище пользователей.
+    :type repository: UsersRepository
+    :param wait: Дождаться записи в режиме очереди. По умолчанию
+        берётся из `USERS_INGEST_WAIT`.
+    :type wait: bool | None
+    :raises HTTPException: 400 при ошибке создания, 429 при заполненной
+        очереди, 503, если очередь остановлена.
+    :return: Созданный пользователь или состояние в очереди.
+    :rtype: User | JSONResponse
     """
 
-    return await UsersCRUD.create_user(user_data, session)
+    settings = get_settings()
+    if not settings.USERS_INGEST_ENABLED:
+        user = await repository.create_user(user_data)
+    else:
+        pending = get_users_ingest().submit(user_data)
+        if not (settings.USERS_INGEST_WAIT if wait is None else wait):
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content=pending.ticket.model_dump(mode="json"),
+                headers={
+                    "Location": f"{router.prefix}/ingest/{pending.ticket.tracking_id}"
+                },
+            )
+        # Отмена запроса не должна отменять запись пакета.
+        item = await asyncio.shield(pending.future)
+        if not item.success:
+            raise bad_request(detail=item.error)
+        user = item.user
+    response.headers.update(validator_headers(make_etag(user.version), user.updated_at))
+    return user
 
 
 @router.put(
@@ -89,12 +1107,18 @@ async def create_user(
     response_model=User,
     status_code=status.HTTP_200_OK,
     summary="Обновить данные пользователя",
-    description="Обновляет данные существующего пользователя",
+    description=(
+        "Обновляет данные существующего пользователя. Поля со значением null "
+        "не изменяются. С заголовком `If-Match` обновление выполняется, только "
+        "если версия записи совпадает с переданным ETag, иначе возвращается 412"
+    ),
 )
 async def update_user(
     user_id: int,
     user_data: UserUpdate,
-    session: Annotated[AsyncSession, Depends(get_session)],
+    response: Response,
+    repository: Annotated[UsersRepository, Depends(get_users_repository)],
+    if_match: Annotated[str | None, Header()] = None,
 ):
     """
     Обновить данные пользователя.
@@ -103,17 +1127,79 @@ async def update_user(
     :type user_data: UserUpdate
     :param user_id: Идентификатор пользователя.
     :type user_id: int
-    :param session: Асинхронная сессия SQLAlchemy.
-    :type session: AsyncSession
-    :raises HTTPException: 404, если пользователь не найден.
+    :param response: Ответ, в который добавляются заголовки ETag
+        и Last-Modified.
+    :type response: Response
+    :param repository: Хранилище пользователей.
+    :type repository: UsersRepository
+    :param if_match: Ожидаемые ETag записи.
+    :type if_match: str | None
+    :raises HTTPException: 404, если пользователь не найден,
+        412, если версия записи не совпадает с If-Match.
+    :return: Обновленный пользователь.
+    :rtype: User
+    """
+
+    user = await repository.update_user(
+        user_data=user_data,
+        user_id=user_id,
+        versions=parse_if_match(if_match),
+    )
+    if user:
+        response.headers.update(
+            validator_headers(make_etag(user.version), user.updated_at)
+        )
+        return user
+    raise not_found(entity="User")
+
+
+@router.patch(
+    "/{user_id}",
+    response_model=User,
+    status_code=status.HTTP_200_OK,
+    summary="Частично обновить пользователя",
+    description=(
+        "Изменяет только переданные в теле поля. С заголовком `If-Match` "
+        "изменение выполняется, только если версия записи совпадает "
+        "с переданным ETag, иначе возвращается 412"
+    ),
+)
+async def patch_user(
+    user_id: int,
+    user_data: UserUpdate,
+    response: Response,
+    repository: Annotated[UsersRepository, Depends(get_users_repository)],
+    if_match: Annotated[str | None, Header()] = None,
+):
+    """
+    Частично обновить пользователя.
+
+    :param user_id: Идентификатор пользователя.
+    :type user_id: int
+    :param user_data: Изменяемые поля пользователя.
+    :type user_data: UserUpdate
+    :param response: Ответ, в который добавляются заголовки ETag
+        и Last-Modified.
+    :type response: Response
+    :param repository: Хранилище пользователей.
+    :type repository: UsersRepository
+    :param if_match: Ожидаемые ETag записи.
+    :type if_match: str | None
+    :raises HTTPException: 404, если пользователь не найден,
+        412, если версия записи не совпадает с If-Match.
     :return: Обновленный пользователь.
     :rtype: User
     """
 
-    user = await UsersCRUD.update_user(
-        user_data=user_data, user_id=user_id, session=session
+    user = await repository.patch_user(
+        user_id=user_id,
+        user_data=user_data,
+        versions=parse_if_match(if_match),
     )
     if user:
+        response.headers.update(
+            validator_headers(make_etag(user.version), user.updated_at)
+        )
         return user
     raise not_found(entity="User")
 
@@ -122,24 +1208,34 @@ async def update_user(
     "/{user_id}",
     status_code=status.HTTP_204_NO_CONTENT,
     summary="Удалить пользователя",
-    description="Удаляет пользователя из системы",
+    description=(
+        "Удаляет пользователя из системы. С заголовком `If-Match` удаление "
+        "выполняется, только если версия записи совпадает с переданным ETag"
+    ),
 )
 async def delete_user(
-    user_id: int, session: Annotated[AsyncSession, Depends(get_session)]
+    user_id: int,
+    repository: Annotated[UsersRepository, Depends(get_users_repository)],
+    if_match: Annotated[str | None, Header()] = None,
 ):
     """
     Удалить пользователя по ID.
 
     :param user_id: Идентификатор пользователя.
     :type user_id: int
-    :param session: Асинхронная сессия SQLAlchemy.
-    :type session: AsyncSession
-    :raises HTTPException: 404, если пользователь не найден.
+    :param repository: Хранилище пользователей.
+    :type repository: UsersRepository
+    :param if_match: Ожидаемые ETag записи.
+    :type if_match: str | None
+    :raises HTTPException: 404, если пользователь не найден,
+        412, если версия записи не совпадает с If-Match.
     :return: Пустой ответ с HTTP статусом 204.
     :rtype: Response
     """
 
-    success = await UsersCRUD.delete_user(user_id=user_id, session=session)
+    success = await repository.delete_user(
+        user_id=user_id, versions=parse_if_match(if_match)
+    )
     if success:
         return Response(status_code=status.HTTP_204_NO_CONTENT)
     raise not_found(entity="User")
@@ -0,0 +1 @@
+"""Пакет содержит кеш пользователей и его бэкенды."""
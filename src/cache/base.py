@@ -0,0 +1,109 @@
+"""Модуль содержит базовый интерфейс бэкенда кеша и счётчики его работы."""
+
+from abc import ABC, abstractmethod
+
+
+class CacheStats:
+    """
+    Счётчики работы кеша.
+
+    Атрибуты:
+        hits: Количество попаданий.
+        misses: Количество промахов.
+        evictions: Количество вытесненных или истёкших записей.
+        errors: Количество ошибок обращения к хранилищу.
+    """
+
+    __slots__ = ("hits", "misses", "evictions", "errors")
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def as_dict(self) -> dict[str, int | float]:
+        """
+        Вернуть счётчики и долю попаданий в виде словаря.
+
+        :return: Значения счётчиков.
+        :rtype: dict[str, int | float]
+        """
+
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "errors": self.errors,
+            "hit_ratio": self.hits / requests if requests else 0.0,
+        }
+
+
+class CacheBackend(ABC):
+    """Базовый класс бэкенда кеша, хранящего строковые значения по ключу."""
+
+    name: str = "base"
+
+    def __init__(self) -> None:
+        self.counters = CacheStats()
+
+    @abstractmethod
+    async def get(self, key: str) -> str | None:
+        """
+        Получить значение по ключу.
+
+        :param key: Ключ записи.
+        :type key: str
+        :return: Значение или None, если запись отсутствует или истекла.
+        :rtype: str | None
+        """
+
+    @abstractmethod
+    async def set(self, key: str, value: str) -> None:
+        """
+        Сохранить значение по ключу.
+
+        :param key: Ключ записи.
+        :type key: str
+        :param value: Сохраняемое значение.
+        :type value: str
+        """
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """
+        Удалить запись по ключу.
+
+        :param key: Ключ записи.
+        :type key: str
+        """
+
+    async def stats(self) -> dict[str, int | float | str]:
+        """
+        Получить статистику работы кеша.
+
+        :return: Имя бэкенда и значения счётчиков.
+        :rtype: dict[str, int | float | str]
+        """
+
+        return {"backend": self.name, **self.counters.as_dict()}
+
+    async def close(self) -> None:
+        """Освободить ресурсы бэкенда."""
+
+
+class NullCacheBackend(CacheBackend):
+    """Бэкенд, который ничего не хранит. Используется при отключённом кеше."""
+
+    name = "none"
+
+    async def get(self, key: str) -> str | None:
+        self.counters.misses += 1
+        return None
+
+    async def set(self, key: str, value: str) -> None:
+        pass
+
+    async def delete(self, key: str) -> None:
+        pass
@@ -0,0 +1,62 @@
+"""Модуль содержит бэкенд кеша в памяти процесса с вытеснением LRU и TTL."""
+
+import time
+from collections import OrderedDict
+from src.cache.base import CacheBackend
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    Кеш в памяти процесса.
+
+    Записи упорядочены по времени последнего обращения. При превышении
+    `max_size` вытесняется самая давно использованная запись, а записи
+    старше `ttl` секунд считаются отсутствующими.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        """
+        :param max_size: Максимальное количество записей.
+        :type max_size: int
+        :param ttl: Время жизни записи в секундах.
+        :type ttl: float
+        """
+
+        super().__init__()
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    async def get(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.counters.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.counters.evictions += 1
+            self.counters.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.counters.hits += 1
+        return value
+
+    async def set(self, key: str, value: str) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.counters.evictions += 1
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def stats(self) -> dict[str, int | float | str]:
+        return {
+            **await super().stats(),
+            "size": len(self._entries),
+            "max_size": self.max_size,
+        }
@@ -0,0 +1,203 @@
+"""
+Модуль содержит бэкенд кеша, работающий с сервером по протоколу Redis (RESP).
+
+Клиент реализован поверх asyncio-потоков и использует только команды
+GET, SET, DEL, AUTH, SELECT и INFO, поэтому совместим с Redis, Valkey,
+KeyDB, Dragonfly и локальными заглушками, реализующими этот протокол.
+"""
+
+import asyncio
+from urllib.parse import urlsplit
+from src.cache.base import CacheBackend
+
+
+class RedisError(Exception):
+    """Ошибка, полученная от сервера или вызванная нарушением протокола."""
+
+
+class _Connection:
+    """Одно соединение с сервером по протоколу RESP."""
+
+    def __init__(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.reader = reader
+        self.writer = writer
+
+    async def execute(self, *args: str) -> str | int | list | None:
+        """
+        Отправить команду и прочитать ответ.
+
+        :param args: Команда и её аргументы.
+        :type args: str
+        :raises RedisError: Если сервер вернул ошибку.
+        :return: Ответ сервера.
+        :rtype: str | int | list | None
+        """
+
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg.encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self.writer.write(b"".join(parts))
+        await self.writer.drain()
+        return await self._read_reply()
+
+    async def _read_reply(self) -> str | int | list | None:
+        line = await self.reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise RedisError("Connection closed")
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b"+":
+            return payload.decode()
+        if prefix == b"-":
+            raise RedisError(payload.decode())
+        if prefix == b":":
+            return int(payload)
+        if prefix == b"$":
+            length = int(payload)
+            if length == -1:
+                return None
+            data = await self.reader.readexactly(length + 2)
+            return data[:-2].decode()
+        if prefix == b"*":
+            length = int(payload)
+            if length == -1:
+                return None
+            return [await self._read_reply() for _ in range(length)]
+        raise RedisError("Unexpected reply")
+
+    def close(self) -> None:
+        """Закрыть соединение."""
+
+        self.writer.close()
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Кеш во внешнем хранилище с протоколом Redis.
+
+    Соединения открываются лениво и переиспользуются через пул. Ошибки
+    хранилища не прерывают запрос: чтение считается промахом, а ошибка
+    учитывается в счётчике `errors`.
+    """
+
+    name = "redis"
+
+    def __init__(
+        self, url: str, ttl: float, pool_size: int, timeout: float = 0.5
+    ) -> None:
+        """
+        :param url: Адрес сервера вида `redis://[:password@]host:port/db`.
+        :type url: str
+        :param ttl: Время жизни записи в секундах.
+        :type ttl: float
+        :param pool_size: Максимальное количество соединений.
+        :type pool_size: int
+        :param timeout: Таймаут одной команды в секундах.
+        :type timeout: float
+        """
+
+        super().__init__()
+        parsed = urlsplit(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.ttl = ttl
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._idle: asyncio.LifoQueue[_Connection] = asyncio.LifoQueue()
+        self._opened = 0
+
+    async def _connect(self) -> _Connection:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        connection = _Connection(reader, writer)
+        try:
+            if self.password:
+                await connection.execute("AUTH", self.password)
+            if self.db:
+                await connection.execute("SELECT", str(self.db))
+        except BaseException:
+            connection.close()
+            raise
+        return connection
+
+    async def _execute(self, *args: str) -> str | int | list | None:
+        if not self._idle.empty() or self._opened >= self.pool_size:
+            connection = await asyncio.wait_for(self._idle.get(), self.timeout)
+        else:
+            self._opened += 1
+            try:
+                connection = await asyncio.wait_for(self._connect(), self.timeout)
+            except BaseException:
+                self._opened -= 1
+                raise
+        try:
+            reply = await asyncio.wait_for(connection.execute(*args), self.timeout)
+        except RedisError as error:
+            if str(error) == "Connection closed":
+                self._discard(connection)
+            else:
+                self._idle.put_nowait(connection)
+            raise
+        except BaseException:
+            self._discard(connection)
+            raise
+        self._idle.put_nowait(connection)
+        return reply
+
+    def _discard(self, connection: _Connection) -> None:
+        connection.close()
+        self._opened -= 1
+
+    async def get(self, key: str) -> str | None:
+        try:
+            value = await self._execute("GET", key)
+        except (OSError, asyncio.TimeoutError, RedisError):
+            self.counters.errors += 1
+            value = None
+        if value is None:
+            self.counters.misses += 1
+            return None
+        self.counters.hits += 1
+        return value
+
+    async def set(self, key: str, value: str) -> None:
+        try:
+            await self._execute("SET", key, value, "PX", str(int(self.ttl * 1000)))
+        except (OSError, asyncio.TimeoutError, RedisError):
+            self.counters.errors += 1
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self._execute("DEL", key)
+        except (OSError, asyncio.TimeoutError, RedisError):
+            self.counters.errors += 1
+
+    async def stats(self) -> dict[str, int | float | str]:
+        """
+        Получить статистику работы кеша.
+
+        Количество вытеснений берётся из `INFO stats` сервера, так как
+        вытеснение выполняется на его стороне.
+
+        :return: Имя бэкенда и значения счётчиков.
+        :rtype: dict[str, int | float | str]
+        """
+
+        stats = await super().stats()
+        try:
+            info = await self._execute("INFO", "stats")
+        except (OSError, asyncio.TimeoutError, RedisError):
+            self.counters.errors += 1
+            return stats
+        for line in str(info).splitlines():
+            name, _, value = line.partition(":")
+            if name in ("evicted_keys", "expired_keys"):
+                stats[name] = int(value)
+        return stats
+
+    async def close(self) -> None:
+        while not self._idle.empty():
+            self._discard(self._idle.get_nowait())
@@ -0,0 +1,146 @@
+"""
+Модуль содержит объединение одновременных одинаковых запросов на чтение.
+
+Пока запрос с некоторым ключом выполняется, остальные запросы с тем же
+ключом не обращаются к базе данных, а ждут и получают его результат.
+Объединение действует только внутри процесса и только на время
+выполнения запроса: результат после завершения не сохраняется.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import TypeVar
+
+
+T = TypeVar("T")
+
+
+class FlightStats:
+    """
+    Счётчики объединения запросов.
+
+    Атрибуты:
+        executed: Количество выполненных запросов.
+        shared: Количество запросов, получивших чужой результат.
+    """
+
+    __slots__ = ("executed", "shared")
+
+    def __init__(self) -> None:
+        self.executed = 0
+        self.shared = 0
+
+    @property
+    def coalesce_ratio(self) -> float:
+        """Доля запросов, обслуженных без собственного обращения к базе."""
+
+        requests = self.executed + self.shared
+        return self.shared / requests if requests else 0.0
+
+    def as_dict(self) -> dict[str, int | float]:
+        """
+        Вернуть счётчики и долю объединённых запросов в виде словаря.
+
+        :return: Значения счётчиков.
+        :rtype: dict[str, int | float]
+        """
+
+        return {
+            "executed": self.executed,
+            "shared": self.shared,
+            "coalesce_ratio": self.coalesce_ratio,
+        }
+
+
+class SingleFlight:
+    """
+    Объединяет одновременные вызовы с одинаковым ключом в один.
+
+    Первый вызов с ключом выполняет функцию, остальные ждут его результата
+    или исключения. Если первый вызов отменён, ожидающие выполняют
+    функцию заново. После изменения данных ключи сбрасываются через
+    `forget` и `forget_all`, чтобы новые вызовы не получили результат
+    запроса, начатого до изменения.
+    """
+
+    def __init__(self, name: str, enabled: bool = True) -> None:
+        """
+        :param name: Имя для метрик.
+        :type name: str
+        :param enabled: Объединять вызовы. Если False, функция
+            выполняется при каждом вызове.
+        :type enabled: bool
+        """
+
+        self.name = name
+        self.enabled = enabled
+        self.counters = FlightStats()
+        self._calls: dict[Hashable, asyncio.Future] = {}
+
+    @property
+    def in_flight(self) -> int:
+        """Количество выполняющихся запросов."""
+
+        return len(self._calls)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Выполнить функцию или дождаться результата такого же вызова.
+
+        :param key: Ключ вызова, построенный из нормализованных параметров.
+        :type key: Hashable
+        :param func: Функция без аргументов, выполняющая запрос.
+        :type func: Callable[[], Awaitable[T]]
+        :return: Результат функции.
+        :rtype: T
+        """
+
+        if not self.enabled:
+            return await func()
+        call = self._calls.get(key)
+        if call is not None:
+            self.counters.shared += 1
+            try:
+                return await asyncio.shield(call)
+            except asyncio.CancelledError:
+                if call.cancelled() and not asyncio.current_task().cancelling():
+                    return await self.do(key, func)
+                raise
+
+        call = asyncio.get_running_loop().create_future()
+        self._calls[key] = call
+        self.counters.executed += 1
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            self._finish(key, call)
+            call.cancel()
+            raise
+        except BaseException as error:
+            self._finish(key, call)
+            call.set_exception(error)
+            # Исключение уже передано вызывающему, ожидающих может не быть.
+            call.exception()
+            raise
+        self._finish(key, call)
+        call.set_result(result)
+        return result
+
+    def forget(self, key: Hashable) -> None:
+        """
+        Не присоединять новые вызовы к выполняющемуся запросу с ключом.
+
+        :param key: Ключ вызова.
+        :type key: Hashable
+        """
+
+        self._calls.pop(key, None)
+
+    def forget_all(self) -> None:
+        """Не присоединять новые вызовы ни к одному выполняющемуся запросу."""
+
+        self._calls.clear()
+
+    def _finish(self, key: Hashable, call: asyncio.Future) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
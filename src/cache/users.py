@@ -0,0 +1,257 @@
+"""
+Модуль содержит кеш пользователей, используемый в CRUD-операциях.
+
+Кеш и объединение запросов создаются по настройкам при первом
+обращении, а не при импорте модуля.
+"""
+
+from collections.abc import Awaitable, Callable
+from functools import lru_cache
+from typing import TypeVar
+from src.cache.base import CacheBackend, NullCacheBackend
+from src.cache.memory import MemoryCacheBackend
+from src.cache.redis import RedisCacheBackend
+from src.cache.singleflight import SingleFlight
+from src.schemas.users import User
+from src.settings.settings import Settings, get_settings
+from src.utils.serializers import encode_user
+
+
+V = TypeVar("V")
+
+
+class UsersCache:
+    """
+    Кеш пользователей по ID поверх произвольного бэкенда.
+
+    В кеше хранится JSON-представление схемы `User` в том же виде,
+    в каком оно отдаётся клиенту, поэтому быстрый путь чтения может
+    вернуть запись без разбора.
+
+    Для ID, которые сейчас загружаются из базы данных через `fill`,
+    кеш ведёт счётчик изменений: запись и удаление пользователя его
+    увеличивают, и загрузка, во время которой счётчик изменился,
+    не сохраняет прочитанное значение. Счётчик действует внутри
+    процесса; между процессами устаревание ограничено `CACHE_TTL`.
+    """
+
+    prefix = "users:"
+
+    def __init__(self, backend: CacheBackend) -> None:
+        """
+        :param backend: Бэкенд, в котором хранятся записи.
+        :type backend: CacheBackend
+        """
+
+        self.backend = backend
+        self._loads: dict[int, int] = {}
+        self._generations: dict[int, int] = {}
+
+    async def get(self, user_id: int) -> User | None:
+        """
+        Получить пользователя из кеша.
+
+        :param user_id: Идентификатор пользователя.
+        :type user_id: int
+        :return: Пользователь или None при промахе.
+        :rtype: User | None
+        """
+
+        value = await self.get_json(user_id)
+        if value is None:
+            return None
+        return User.model_validate_json(value)
+
+    async def get_json(self, user_id: int) -> str | None:
+        """
+        Получить JSON-представление пользователя из кеша.
+
+        :param user_id: Идентификатор пользователя.
+        :type user_id: int
+        :return: JSON пользователя или None при промахе.
+        :rtype: str | None
+        """
+
+        return await self.backend.get(f"{self.prefix}{user_id}")
+
+    async def set(self, user: User) -> None:
+        """
+        Сохранить или обновить пользователя в кеше.
+
+        :param user: Пользователь.
+        :type user: User
+        """
+
+        await self.set_json(user.id, encode_user(user))
+
+    async def fill(
+        self, user_id: int, load: Callable[[], Awaitable[User | None]]
+    ) -> User | None:
+        """
+        Загрузить пользователя и сохранить его в кеш.
+
+        Значение не сохраняется, если за время загрузки пользователь
+        был изменён или удалён.
+
+        :param user_id: Идентификатор пользователя.
+        :type user_id: int
+        :param load: Функция, загружающая пользователя из базы данных.
+        :type load: Callable[[], Awaitable[User | None]]
+        :return: Пользователь или None, если не найден.
+        :rtype: User | None
+        """
+
+        return await self._fill(user_id, load, encode_user)
+
+    async def fill_json(
+        self, user_id: int, load: Callable[[], Awaitable[str | None]]
+    ) -> str | None:
+        """
+        Загрузить JSON-представление пользователя и сохранить его в кеш.
+
+        Значение не сохраняется, если за время загрузки пользователь
+        был изменён или удалён.
+
+        :param user_id: Идентификатор пользователя.
+        :type user_id: int
+        :param load: Функция, загружающая JSON пользователя из базы данных.
+        :type load: Callable[[], Awaitable[str | None]]
+        :return: JSON пользователя или None, если не найден.
+        :rtype: str | None
+        """
+
+        return await self._fill(user_id, load, str)
+
+    async def set_json(self, user_id: int, value: str) -> None:
+        """
+        Сохранить готовое JSON-представление пользователя в кеше.
+
+        :param user_id: Идентификатор пользователя.
+        :type user_id: int
+        :param value: JSON пользователя.
+        :type value: str
+        """
+
+        self._changed(user_id)
+        await self.backend.set(f"{self.prefix}{user_id}", value)
+
+    async def invalidate(self, user_id: int) -> None:
+        """
+        Удалить пользователя из кеша.
+
+        :param user_id: Идентификатор пользователя.
+        :type user_id: int
+        """
+
+        self._changed(user_id)
+        await self.backend.delete(f"{self.prefix}{user_id}")
+
+    async def _fill(
+        self,
+        user_id: int,
+        load: Callable[[], Awaitable[V | None]],
+        encode: Callable[[V], str],
+    ) -> V | None:
+        """
+        Загрузить значение и сохранить его, если пользователь не менялся.
+
+        :param user_id: Идентификатор пользователя.
+        :type user_id: int
+        :param load: Функция загрузки из базы данных.
+        :type load: Callable[[], Awaitable[V | None]]
+        :param encode: Преобразование значения в JSON для кеша.
+        :type encode: Callable[[V], str]
+        :return: Загруженное значение.
+        :rtype: V | None
+        """
+
+        generation = self._generations.get(user_id, 0)
+        self._loads[user_id] = self._loads.get(user_id, 0) + 1
+        try:
+            value = await load()
+            if value is not None and self._generations.get(user_id, 0) == generation:
+                await self.backend.set(f"{self.prefix}{user_id}", encode(value))
+            return value
+        finally:
+            self._loads[user_id] -= 1
+            if not self._loads[user_id]:
+                del self._loads[user_id]
+                self._generations.pop(user_id, None)
+
+    def _changed(self, user_id: int) -> None:
+        """
+        Отметить изменение пользователя для загрузок, которые идут сейчас.
+
+        :param user_id: Идентификатор пользователя.
+        :type user_id: int
+        """
+
+        if user_id in self._loads:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+
+def create_cache_backend(settings: Settings) -> CacheBackend:
+    """
+    Создать бэкенд кеша согласно настройкам.
+
+    :param settings: Настройки приложения.
+    :type settings: Settings
+    :return: Бэкенд кеша.
+    :rtype: CacheBackend
+    """
+
+    if settings.CACHE_BACKEND == "memory":
+        return MemoryCacheBackend(
+            max_size=settings.CACHE_MAX_SIZE, ttl=settings.CACHE_TTL
+        )
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCacheBackend(
+            url=settings.CACHE_REDIS_URL,
+            ttl=settings.CACHE_TTL,
+            pool_size=settings.CACHE_REDIS_POOL_SIZE,
+        )
+    return NullCacheBackend()
+
+
+@lru_cache(maxsize=1)
+def get_users_cache() -> UsersCache:
+    """
+    Получить кеш пользователей, создав бэкенд при первом вызове.
+
+    :return: Кеш пользователей.
+    :rtype: UsersCache
+    """
+
+    return UsersCache(create_cache_backend(get_settings()))
+
+
+@lru_cache(maxsize=1)
+def get_user_reads() -> SingleFlight:
+    """
+    Получить объединение одновременных чтений пользователя по ID.
+
+    :return: Объединение запросов.
+    :rtype: SingleFlight
+    """
+
+    return SingleFlight("user", enabled=get_settings().CACHE_SINGLEFLIGHT)
+
+
+@lru_cache(maxsize=1)
+def get_page_reads() -> SingleFlight:
+    """
+    Получить объединение одновременных чтений страниц списка.
+
+    :return: Объединение запросов.
+    :rtype: SingleFlight
+    """
+
+    return SingleFlight("users_page", enabled=get_settings().CACHE_SINGLEFLIGHT)
+
+
+async def close_users_cache() -> None:
+    """Закрыть бэкенд кеша, если он создавался."""
+
+    if get_users_cache.cache_info().currsize:
+        await get_users_cache().backend.close()
+        get_users_cache.cache_clear()
@@ -0,0 +1,251 @@
+"""
+Модуль содержит служебные команды командной строки.
+
+- `python -m src.cli startup-report` запускает отдельный процесс
+  с `python -X importtime`, импортирует приложение, выполняет запуск
+  (lifespan) и первый запрос и выводит время каждого этапа вместе
+  с самыми медленными при импорте модулями и пакетами;
+- `python -m src.cli rebuild-stats` пересчитывает таблицы счётчиков
+  статистики пользователей по таблице `users`.
+"""
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from typing import NamedTuple
+
+
+# Выполняется в отдельном процессе, чтобы импорт начинался с чистого
+# состояния. Результат печатается последней строкой stdout в JSON.
+_PROBE = """
+import asyncio, json, sys, time
+
+start = time.perf_counter()
+module = __import__(sys.argv[1], fromlist=["app"])
+# `src.main` собирает приложение при первом обращении к `app`.
+app = module.app
+imported = time.perf_counter()
+
+
+async def lifespan(message_type):
+    receive, send = asyncio.Queue(), asyncio.Queue()
+    await receive.put({"type": f"lifespan.{message_type}"})
+    task = asyncio.ensure_future(
+        app({"type": "lifespan", "asgi": {"version": "3.0"}}, receive.get, send.put)
+    )
+    await send.get()
+    return task
+
+
+async def request(path):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path,
+        "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 0), "server": ("localhost", 80),
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages[0]["status"]
+
+
+async def main():
+    started = time.perf_counter()
+    if sys.argv[3] == "1":
+        await lifespan("startup")
+    ready = time.perf_counter()
+    status = await request(sys.argv[2])
+    answered = time.perf_counter()
+    if sys.argv[3] == "1":
+        await lifespan("shutdown")
+    print(json.dumps({
+        "import": imported - start,
+        "startup": ready - started,
+        "request": answered - ready,
+        "total": answered - start,
+        "status": status,
+    }))
+
+
+asyncio.run(main())
+"""
+
+
+class ImportRecord(NamedTuple):
+    """
+    Строка отчёта `python -X importtime`.
+
+    Атрибуты:
+        name: Имя модуля.
+        self_us: Время импорта самого модуля в микросекундах.
+        cumulative_us: Время импорта вместе с зависимостями в микросекундах.
+    """
+
+    name: str
+    self_us: int
+    cumulative_us: int
+
+
+def parse_importtime(output: str) -> list[ImportRecord]:
+    """
+    Разобрать вывод `python -X importtime`.
+
+    :param output: Содержимое stderr процесса.
+    :type output: str
+    :return: Записи о каждом импортированном модуле.
+    :rtype: list[ImportRecord]
+    """
+
+    records = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        records.append(ImportRecord(parts[2].strip(), int(parts[0]), int(parts[1])))
+    return records
+
+
+def startup_report(module: str, path: str, lifespan: bool, top: int) -> int:
+    """
+    Измерить время запуска приложения и вывести отчёт.
+
+    :param module: Модуль, содержащий приложение `app`.
+    :type module: str
+    :param path: Путь первого GET-запроса.
+    :type path: str
+    :param lifespan: Выполнить запуск приложения перед первым запросом.
+    :type lifespan: bool
+    :param top: Количество строк в списках самых медленных модулей и пакетов.
+    :type top: int
+    :return: Код завершения.
+    :rtype: int
+    """
+
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            _PROBE,
+            module,
+            path,
+            "1" if lifespan else "0",
+        ],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr, file=sys.stderr)
+        return result.returncode
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    records = parse_importtime(result.stderr)
+
+    print(f"Import {module}: {timings['import'] * 1000:.1f} ms")
+    if lifespan:
+        print(f"Lifespan startup: {timings['startup'] * 1000:.1f} ms")
+    print(
+        f"First request GET {path}: {timings['request'] * 1000:.1f} ms "
+        f"({timings['status']})"
+    )
+    print(f"Time to first request: {timings['total'] * 1000:.1f} ms")
+
+    packages: dict[str, int] = {}
+    for record in records:
+        package = record.name.split(".")[0]
+        packages[package] = packages.get(package, 0) + record.self_us
+    print(f"\nPackages by import time (self, ms), {len(records)} modules:")
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {self_us / 1000:8.1f}  {package}")
+
+    print("\nSlowest modules (self, ms):")
+    for record in sorted(records, key=lambda item: -item.self_us)[:top]:
+        print(f"  {record.self_us / 1000:8.1f}  {record.name}")
+    return 0
+
+
+def rebuild_stats() -> int:
+    """
+    Пересчитать статистику пользователей в базе данных.
+
+    На время пересчёта изменения пользователей ожидают, поэтому команда
+    запускается вручную, а не из API. Запуск во время другого пересчёта
+    завершается с ошибкой.
+
+    :return: Код завершения.
+    :rtype: int
+    """
+
+    # Приложение и драйвер базы данных нужны только этой команде.
+    from src.config.config import dispose_engines
+    from src.repositories.users import users_repository, uses_memory_storage
+
+    if uses_memory_storage():
+        print(
+            "Stats are kept in process memory with STORAGE_BACKEND=memory",
+            file=sys.stderr,
+        )
+        return 1
+
+    async def run() -> int | None:
+        try:
+            async with users_repository() as repository:
+                return await repository.rebuild_stats()
+        finally:
+            await dispose_engines()
+
+    start = time.perf_counter()
+    total = asyncio.run(run())
+    if total is None:
+        print("Users stats rebuild is already running", file=sys.stderr)
+        return 1
+    print(f"Users stats rebuilt: {total} users in {time.perf_counter() - start:.3f} s")
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Разобрать аргументы командной строки и выполнить команду.
+
+    :param argv: Аргументы командной строки без имени программы.
+    :type argv: list[str] | None
+    :return: Код завершения.
+    :rtype: int
+    """
+
+    parser = argparse.ArgumentParser(prog="python -m src.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+    report = commands.add_parser(
+        "startup-report", help="время импорта, запуска и первого запроса"
+    )
+    report.add_argument("--module", default="src.main")
+    report.add_argument("--path", default="/health/live")
+    report.add_argument(
+        "--no-lifespan",
+        dest="lifespan",
+        action="store_false",
+        help="не выполнять запуск приложения (без базы данных)",
+    )
+    report.add_argument("--top", type=int, default=15)
+    commands.add_parser("rebuild-stats", help="пересчитать статистику пользователей")
+    args = parser.parse_args(argv)
+    if args.command == "rebuild-stats":
+        return rebuild_stats()
+    return startup_report(args.module, args.path, args.lifespan, args.top)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
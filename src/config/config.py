@@ -1,24 +1,254 @@
-"""Модуль содержит настройки для работы с базой данных."""
+"""
+Модуль содержит настройки для работы с базой данных.
 
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
-from src.settings.settings import settings
+Движки основной базы данных и реплик создаются при запуске приложения
+(`init_engines`) или при первом обращении к ним, а не при импорте
+модуля, поэтому импорт моделей и CRUD-операций не требует настроек
+подключения.
+"""
 
-
-async_engine = create_async_engine(
-    url=settings.database_url_asyncpg, echo=False, pool_size=5, max_overflow=10
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import (
+    create_async_engine,
+    async_sessionmaker,
+    AsyncSession,
+    AsyncEngine,
 )
+from src.config.pool import InstrumentedAsyncPool
+from src.config.replicas import Replica, ReplicaRouter
+from src.settings.settings import get_settings
+
+
+if TYPE_CHECKING:
+    import asyncpg
+
+
+def _create_engine(url: str) -> AsyncEngine:
+    """
+    Создать движок SQLAlchemy с настройками пула из настроек приложения.
+
+    :param url: Строка подключения к базе данных.
+    :type url: str
+    :return: Асинхронный движок.
+    :rtype: AsyncEngine
+    """
+
+    settings = get_settings()
+    return create_async_engine(
+        url=url,
+        echo=False,
+        poolclass=InstrumentedAsyncPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={
+            # Кеш подготовленных запросов SQLAlchemy и собственный кеш asyncpg.
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "server_settings": {
+                "statement_timeout": str(settings.DB_STATEMENT_TIMEOUT)
+            },
+        },
+    )
+
+
+async_session_factory = async_sessionmaker(class_=AsyncSession)
+
+_async_engine: AsyncEngine | None = None
+_replica_router: ReplicaRouter | None = None
+
+
+def init_engines() -> None:
+    """
+    Создать движки основной базы данных и реплик, если они ещё не созданы.
+
+    Фабрика сессий `async_session_factory` привязывается к движку
+    основной базы данных.
+    """
+
+    global _async_engine, _replica_router
+    if _async_engine is not None:
+        return
+    settings = get_settings()
+    _async_engine = _create_engine(settings.database_url_asyncpg)
+    _replica_router = ReplicaRouter(
+        replicas=[
+            Replica(_create_engine(url)) for url in settings.replica_urls_asyncpg
+        ],
+        strategy=settings.DB_REPLICA_STRATEGY,
+        retry_after=settings.DB_REPLICA_RETRY_AFTER,
+    )
+    async_session_factory.configure(bind=_async_engine)
+
+
+def get_engine() -> AsyncEngine:
+    """
+    Получить движок основной базы данных.
+
+    :return: Асинхронный движок.
+    :rtype: AsyncEngine
+    """
+
+    init_engines()
+    return _async_engine
+
+
+def get_replica_router() -> ReplicaRouter:
+    """
+    Получить маршрутизатор запросов на чтение между репликами.
+
+    :return: Маршрутизатор реплик.
+    :rtype: ReplicaRouter
+    """
+
+    init_engines()
+    return _replica_router
+
+
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    """
+    Получить фабрику сессий основной базы данных.
+
+    :return: Фабрика сессий, привязанная к движку основной базы данных.
+    :rtype: async_sessionmaker[AsyncSession]
+    """
+
+    init_engines()
+    return async_session_factory
 
-async_session_factory = async_sessionmaker(async_engine, class_=AsyncSession)
 
+def __getattr__(name: str):
+    if name == "async_engine":
+        return get_engine()
+    if name == "replica_router":
+        return get_replica_router()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-async def get_session() -> AsyncSession:
+
+@asynccontextmanager
+async def read_session() -> AsyncIterator[AsyncSession]:
     """
-    Асинхронно создаёт и предоставляет сессию SQLAlchemy.
-    Сессия автоматически закрывается после завершения запроса.
+    Открыть сессию на доступной реплике или на основной базе данных.
+
+    Соединение с репликой устанавливается сразу: если это не удалось,
+    реплика временно исключается и пробуется следующая. Если доступных
+    реплик нет, используется основная база данных.
 
-    :return: AsyncSession: асинхронная сессия SQLAlchemy.
-    :rtype: AsyncSession
+    :return: Асинхронный контекстный менеджер сессии.
+    :rtype: AsyncIterator[AsyncSession]
     """
 
-    async with async_session_factory() as session:
+    replica_router = get_replica_router()
+    for replica in replica_router.candidates():
+        session = replica.session_factory()
+        try:
+            await session.connection()
+        except (OSError, DBAPIError, TimeoutError):
+            await session.close()
+            replica_router.mark_unhealthy(replica)
+            continue
+        replica.in_use += 1
+        try:
+            yield session
+        finally:
+            replica.in_use -= 1
+            await session.close()
+        return
+    async with get_session_factory()() as session:
         yield session
+
+
+async def dispose_engines() -> None:
+    """
+    Закрыть соединения основной базы данных и всех реплик.
+
+    Движки сбрасываются и при следующем обращении создаются заново.
+    """
+
+    global _async_engine, _replica_router
+    if _async_engine is None:
+        return
+    await _async_engine.dispose()
+    for replica in _replica_router.replicas:
+        await replica.engine.dispose()
+    _async_engine = None
+    _replica_router = None
+
+
+async def warm_up_engines() -> None:
+    """
+    Заполнить пулы соединений основной базы данных и реплик.
+
+    В каждом пуле одновременно открывается `DB_POOL_SIZE` соединений
+    и на каждом выполняется `SELECT 1`. Недоступные реплики временно
+    исключаются из выбора, ошибка основной базы данных пробрасывается.
+
+    :raises OSError: Если не удалось подключиться к основной базе данных.
+    :raises DBAPIError: Если не удалось выполнить проверочный запрос.
+    """
+
+    await _warm_up(get_engine())
+    replica_router = get_replica_router()
+    for replica in replica_router.replicas:
+        try:
+            await _warm_up(replica.engine)
+        except (OSError, DBAPIError, TimeoutError):
+            replica_router.mark_unhealthy(replica)
+
+
+async def connect_listener() -> "asyncpg.Connection":
+    """
+    Открыть соединение с основной базой данных вне пула.
+
+    Соединение для LISTEN держится всё время работы процесса,
+    поэтому не занимает место в пуле запросов.
+
+    :return: Соединение asyncpg.
+    :rtype: asyncpg.Connection
+    """
+
+    import asyncpg
+
+    settings = get_settings()
+    return await asyncpg.connect(
+        host=settings.DB_HOST,
+        port=settings.DB_PORT,
+        user=settings.DB_USER,
+        password=settings.DB_PASS,
+        database=settings.DB_NAME,
+    )
+
+
+async def _warm_up(engine: AsyncEngine) -> None:
+    """
+    Открыть `DB_POOL_SIZE` соединений движка и вернуть их в пул.
+
+    :param engine: Асинхронный движок.
+    :type engine: AsyncEngine
+    """
+
+    async def ping():
+        connection = await engine.connect()
+        try:
+            await connection.execute(text("SELECT 1"))
+        except BaseException:
+            await connection.close()
+            raise
+        return connection
+
+    results = await asyncio.gather(
+        *(ping() for _ in range(get_settings().DB_POOL_SIZE)),
+        return_exceptions=True,
+    )
+    connections = [result for result in results if not isinstance(result, Exception)]
+    await asyncio.gather(*(connection.close() for connection in connections))
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
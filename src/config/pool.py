@@ -0,0 +1,80 @@
+"""Модуль содержит пул соединений с метриками выдачи соединений."""
+
+import time
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
+from src.monitoring.histogram import Histogram
+
+
+class PoolStats:
+    """
+    Статистика выдачи соединений из пула.
+
+    Атрибуты:
+        acquire: Гистограмма времени получения соединения в секундах.
+        wait: Гистограмма времени ожидания в случаях, когда свободных
+            соединений не было и пул достиг предела.
+        waits: Количество получений соединения с ожиданием.
+        timeouts: Количество превышений таймаута ожидания.
+    """
+
+    __slots__ = ("acquire", "wait", "waits", "timeouts")
+
+    def __init__(self) -> None:
+        self.acquire = Histogram()
+        self.wait = Histogram()
+        self.waits = 0
+        self.timeouts = 0
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Асинхронный пул очередей, измеряющий время выдачи соединений."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def connect(self) -> PoolProxiedConnection:
+        must_wait = (
+            self.checkedin() == 0
+            and self._max_overflow > -1
+            and self.overflow() >= self._max_overflow
+        )
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            if must_wait:
+                self.stats.waits += 1
+                self.stats.wait.observe(elapsed)
+        self.stats.acquire.observe(elapsed)
+        return connection
+
+
+def pool_status(pool: InstrumentedAsyncPool) -> dict:
+    """
+    Получить текущее состояние и статистику пула.
+
+    :param pool: Пул соединений.
+    :type pool: InstrumentedAsyncPool
+    :return: Размер пула, занятые и переполняющие соединения, гистограммы
+        времени получения и ожидания соединения.
+    :rtype: dict
+    """
+
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": pool._max_overflow,
+        "timeout": pool.timeout(),
+        "waits": pool.stats.waits,
+        "timeouts": pool.stats.timeouts,
+        "acquire_seconds": pool.stats.acquire.snapshot(),
+        "wait_seconds": pool.stats.wait.snapshot(),
+    }
@@ -0,0 +1,90 @@
+"""Модуль содержит маршрутизацию запросов на чтение между репликами."""
+
+import itertools
+import time
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+
+class Replica:
+    """
+    Реплика базы данных для чтения.
+
+    Атрибуты:
+        engine: Движок SQLAlchemy реплики.
+        session_factory: Фабрика сессий реплики.
+        in_use: Количество сессий, выданных в данный момент.
+        unhealthy_until: Момент (по `time.monotonic`), до которого
+            реплика считается недоступной.
+    """
+
+    __slots__ = ("engine", "session_factory", "in_use", "unhealthy_until")
+
+    def __init__(self, engine: AsyncEngine) -> None:
+        """
+        :param engine: Движок SQLAlchemy реплики.
+        :type engine: AsyncEngine
+        """
+
+        self.engine = engine
+        self.session_factory = async_sessionmaker(engine, class_=AsyncSession)
+        self.in_use = 0
+        self.unhealthy_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        """Признак того, что реплика может принимать запросы."""
+
+        return self.unhealthy_until <= time.monotonic()
+
+
+class ReplicaRouter:
+    """
+    Выбирает реплику для очередного запроса на чтение.
+
+    Поддерживаются стратегии `round_robin` (по кругу) и `least_connections`
+    (реплика с наименьшим числом выданных сессий). Недоступные реплики
+    пропускаются до истечения `retry_after` секунд.
+    """
+
+    def __init__(
+        self, replicas: list[Replica], strategy: str, retry_after: float
+    ) -> None:
+        """
+        :param replicas: Реплики для чтения.
+        :type replicas: list[Replica]
+        :param strategy: Стратегия выбора реплики.
+        :type strategy: str
+        :param retry_after: Время исключения недоступной реплики в секундах.
+        :type retry_after: float
+        """
+
+        self.replicas = replicas
+        self.strategy = strategy
+        self.retry_after = retry_after
+        self._counter = itertools.count()
+
+    def candidates(self) -> list[Replica]:
+        """
+        Получить доступные реплики в порядке предпочтения.
+
+        :return: Доступные реплики, первая — предпочтительная.
+        :rtype: list[Replica]
+        """
+
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return []
+        if self.strategy == "least_connections":
+            return sorted(healthy, key=lambda replica: replica.in_use)
+        start = next(self._counter) % len(healthy)
+        return healthy[start:] + healthy[:start]
+
+    def mark_unhealthy(self, replica: Replica) -> None:
+        """
+        Временно исключить реплику из выбора.
+
+        :param replica: Недоступная реплика.
+        :type replica: Replica
+        """
+
+        replica.unhealthy_until = time.monotonic() + self.retry_after
@@ -0,0 +1,361 @@
+"""
+Модуль содержит ленту изменений пользователей.
+
+Триггеры на таблице `users` записывают изменения в журнал `users_changes`
+и отправляют уведомление `NOTIFY users_changes`. В каждом процессе одно
+соединение слушает канал, а фоновая задача по уведомлению читает новые
+изменения из журнала и раздаёт их очередям подписчиков, поэтому нагрузка
+на базу данных не зависит от количества подписчиков. Хранилище в памяти
+будит ленту напрямую через `on_change`.
+
+Номера изменений выдаются без общей блокировки и могут фиксироваться
+не по порядку. Лента останавливается на пропуске в номерах, пока его
+не заполнит зафиксированная транзакция или пока по снимку базы данных
+не станет видно, что все транзакции, которые могли получить пропущенные
+номера, завершились (например, были отменены). Если пропуск держит
+ленту дольше `gap_timeout` секунд (например, из-за долгой транзакции),
+пропущенные номера записываются в журнал приложения и лента идёт дальше:
+изменения с этими номерами, если они всё же появятся, подписчикам
+не раздаются.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import suppress
+from datetime import UTC, datetime, timedelta
+from functools import lru_cache
+from sqlalchemy.exc import DBAPIError
+from src.config.config import connect_listener
+from src.monitoring.metrics import (
+    USERS_CHANGES_DROPPED,
+    USERS_CHANGES_PUBLISHED,
+    USERS_CHANGES_SKIPPED,
+)
+from src.repositories.users import (
+    get_memory_repository,
+    users_repository,
+    uses_memory_storage,
+)
+from src.schemas.users import UserChange
+from src.settings.settings import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "users_changes"
+
+
+class UsersChangeFeed:
+    """
+    Раздача изменений пользователей подписчикам процесса.
+
+    Каждый подписчик получает собственную ограниченную очередь. Подписчик,
+    который не успевает забирать события, отключается: после
+    переподключения с последним полученным номером он дочитывает
+    пропущенное из журнала.
+    """
+
+    # Как часто удалять из журнала изменения старше `retention`, в секундах.
+    prune_interval = 600.0
+
+    def __init__(
+        self,
+        queue_size: int,
+        batch_size: int,
+        poll_interval: float,
+        retention: float,
+        gap_timeout: float,
+    ) -> None:
+        """
+        :param queue_size: Вместимость очереди одного подписчика.
+        :type queue_size: int
+        :param batch_size: Количество изменений, читаемых одним запросом.
+        :type batch_size: int
+        :param poll_interval: Через сколько секунд без уведомлений журнал
+            проверяется повторно.
+        :type poll_interval: float
+        :param retention: Сколько секунд хранятся изменения в журнале.
+        :type retention: float
+        :param gap_timeout: Через сколько секунд ожидания пропуск в номерах
+            пропускается.
+        :type gap_timeout: float
+        """
+
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.gap_timeout = gap_timeout
+        self._subscribers: set[asyncio.Queue[UserChange | None]] = set()
+        self._last_seq: int | None = None
+        # Последний номер, прочитанный при обнаружении пропуска, и `xmax`
+        # снимка, в котором он прочитан.
+        self._gap: tuple[int, int] | None = None
+        # Время `time.monotonic()`, с которого лента стоит на пропуске.
+        self._blocked_since: float | None = None
+        self._wake = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def subscribers(self) -> int:
+        """Количество подписчиков."""
+
+        return len(self._subscribers)
+
+    @property
+    def position(self) -> int | None:
+        """
+        Номер последнего разосланного изменения. Все изменения с меньшими
+        номерами уже есть в журнале, None — раздача ещё не началась.
+        """
+
+        return self._last_seq
+
+    @property
+    def gap_seconds(self) -> float:
+        """Сколько секунд лента стоит на пропуске в номерах, 0 — не стоит."""
+
+        if self._blocked_since is None:
+            return 0.0
+        return time.monotonic() - self._blocked_since
+
+    @property
+    def running(self) -> bool:
+        """Признак запущенной раздачи."""
+
+        return bool(self._tasks)
+
+    def subscribe(self) -> asyncio.Queue[UserChange | None]:
+        """
+        Подписаться на изменения, разосланные после этого вызова.
+
+        None в очереди означает, что подписка закрыта.
+
+        :return: Очередь изменений подписчика.
+        :rtype: asyncio.Queue[UserChange | None]
+        """
+
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue[UserChange | None]) -> None:
+        """
+        Отменить подписку.
+
+        :param queue: Очередь изменений подписчика.
+        :type queue: asyncio.Queue[UserChange | None]
+        """
+
+        self._subscribers.discard(queue)
+
+    def notify(self) -> None:
+        """Сообщить о новых изменениях в журнале."""
+
+        self._wake.set()
+
+    def start(self) -> None:
+        """Запустить чтение журнала и, для базы данных, прослушивание канала."""
+
+        if self._tasks:
+            return
+        self._tasks.append(asyncio.create_task(self._dispatch()))
+        if uses_memory_storage():
+            get_memory_repository().on_change = self.notify
+        else:
+            self._tasks.append(asyncio.create_task(self._listen()))
+
+    async def stop(self) -> None:
+        """Остановить раздачу и закрыть подписки."""
+
+        if uses_memory_storage():
+            get_memory_repository().on_change = None
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+        self._tasks = []
+        self._last_seq = None
+        self._gap = None
+        self._blocked_since = None
+        for queue in self._subscribers:
+            _close(queue)
+        self._subscribers.clear()
+
+    async def _listen(self) -> None:
+        """Держать соединение LISTEN и переподключаться при его потере."""
+
+        import asyncpg
+
+        while True:
+            try:
+                connection = await connect_listener()
+            except (OSError, asyncpg.PostgresError, TimeoutError) as error:
+                logger.warning("Changes listener connection failed: %s", error)
+                await asyncio.sleep(1)
+                continue
+            lost = asyncio.Event()
+            try:
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(CHANNEL, self._on_notification)
+                # Изменения, сделанные без соединения, дочитываются сразу.
+                self.notify()
+                await lost.wait()
+                logger.warning("Changes listener connection lost")
+            finally:
+                connection.terminate()
+
+    def _on_notification(
+        self, connection, pid: int, channel: str, payload: str
+    ) -> None:
+        """Разбудить чтение журнала по уведомлению базы данных."""
+
+        self.notify()
+
+    async def _dispatch(self) -> None:
+        """Читать новые изменения из журнала и раздавать их подписчикам."""
+
+        pruned_at = None
+        while True:
+            try:
+                if self._last_seq is None:
+                    # Подписчики получают только изменения после запуска.
+                    async with users_repository() as users:
+                        self._last_seq = (await users.get_changes_range())[1]
+                else:
+                    await self._fetch()
+                if pruned_at is None or (
+                    time.monotonic() - pruned_at >= self.prune_interval
+                ):
+                    await self._prune()
+                    pruned_at = time.monotonic()
+            except (OSError, DBAPIError, TimeoutError) as error:
+                logger.warning("Changes dispatch failed: %s", error)
+                await asyncio.sleep(1)
+                continue
+            with suppress(TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            self._wake.clear()
+
+    async def _fetch(self) -> None:
+        """Прочитать изменения после последнего разосланного номера."""
+
+        while True:
+            async with users_repository() as users:
+                changes, xmin, xmax = await users.get_changes_snapshot(
+                    self._last_seq, self.batch_size
+                )
+            for change in changes:
+                if change.seq > self._last_seq + 1 and not self._gap_closed(
+                    change.seq, xmin
+                ):
+                    if self._gap is None or change.seq > self._gap[0]:
+                        self._gap = (changes[-1].seq, xmax)
+                    if self._blocked_since is None:
+                        self._blocked_since = time.monotonic()
+                    if self.gap_seconds < self.gap_timeout:
+                        return
+                    self._skip(change.seq)
+                self._publish(change)
+            if len(changes) < self.batch_size:
+                return
+
+    def _gap_closed(self, seq: int, xmin: int) -> bool:
+        """
+        Проверить, что пропущенные перед номером `seq` номера уже
+        не появятся в журнале.
+
+        Транзакция, получившая пропущенный номер, получила его раньше,
+        чем были записаны изменения после пропуска, поэтому она начата
+        до снимка, в котором эти изменения прочитаны, и её номер меньше
+        `xmax` этого снимка. Когда `xmin` текущего снимка достигает этого
+        значения, все такие транзакции завершены.
+
+        :param seq: Номер первого изменения после пропуска.
+        :type seq: int
+        :param xmin: `xmin` снимка, в котором прочитано изменение.
+        :type xmin: int
+        :return: True, если пропуск можно перейти.
+        :rtype: bool
+        """
+
+        return self._gap is not None and seq <= self._gap[0] and xmin >= self._gap[1]
+
+    def _skip(self, seq: int) -> None:
+        """
+        Перейти пропуск перед номером `seq`, не дождавшись его закрытия.
+
+        :param seq: Номер первого изменения после пропуска.
+        :type seq: int
+        """
+
+        USERS_CHANGES_SKIPPED.inc(amount=seq - self._last_seq - 1)
+        logger.warning(
+            "Skipped user changes %d-%d: gap still open after %.1f s",
+            self._last_seq + 1,
+            seq - 1,
+            self.gap_seconds,
+        )
+
+    def _publish(self, change: UserChange) -> None:
+        """
+        Передать изменение в очереди всех подписчиков.
+
+        :param change: Изменение пользователя.
+        :type change: UserChange
+        """
+
+        self._last_seq = change.seq
+        self._blocked_since = None
+        USERS_CHANGES_PUBLISHED.inc()
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(change)
+            except asyncio.QueueFull:
+                USERS_CHANGES_DROPPED.inc()
+                self._subscribers.discard(queue)
+                _close(queue)
+
+    async def _prune(self) -> None:
+        """Удалить из журнала изменения старше `retention`."""
+
+        before = datetime.now(UTC) - timedelta(seconds=self.retention)
+        async with users_repository() as users:
+            pruned = await users.prune_changes(before)
+        if pruned:
+            logger.info("Pruned %d user changes", pruned)
+
+
+def _close(queue: asyncio.Queue[UserChange | None]) -> None:
+    """
+    Закрыть очередь подписчика, заменив непрочитанные изменения меткой конца.
+
+    :param queue: Очередь изменений подписчика.
+    :type queue: asyncio.Queue[UserChange | None]
+    """
+
+    while not queue.empty():
+        queue.get_nowait()
+    queue.put_nowait(None)
+
+
+@lru_cache(maxsize=1)
+def get_change_feed() -> UsersChangeFeed:
+    """
+    Получить ленту изменений процесса, создав её по настройкам
+    при первом вызове.
+
+    :return: Лента изменений.
+    :rtype: UsersChangeFeed
+    """
+
+    settings = get_settings()
+    return UsersChangeFeed(
+        queue_size=settings.USERS_CHANGES_QUEUE_SIZE,
+        batch_size=settings.USERS_CHANGES_BATCH_SIZE,
+        poll_interval=settings.USERS_CHANGES_POLL_INTERVAL,
+        retention=settings.USERS_CHANGES_RETENTION,
+        gap_timeout=settings.USERS_CHANGES_GAP_TIMEOUT,
+    )
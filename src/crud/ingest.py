@@ -0,0 +1,268 @@
+"""
+Модуль содержит очередь отложенного создания пользователей.
+
+Запросы на создание складываются в ограниченную очередь процесса,
+а фоновая задача записывает их в хранилище пакетами через
+`UsersRepository.create_users`. Так время фиксации транзакции делится
+между всеми пользователями пакета.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable
+from contextlib import AbstractAsyncContextManager, suppress
+from functools import lru_cache
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from src.exceptions.exceptions import service_unavailable, too_many_requests
+from src.monitoring.metrics import (
+    USERS_INGEST_BATCH,
+    USERS_INGEST_FLUSH,
+    USERS_INGEST_REJECTED,
+)
+from src.repositories.base import UsersRepository
+from src.repositories.users import users_repository
+from src.schemas.users import BulkItemResult, IngestStatus, IngestTicket, UserCreate
+from src.settings.settings import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+# Ошибки получения соединения: запрос на создание ещё не отправлен.
+_CONNECT_ERRORS = (OSError, DBAPIError, TimeoutError, PoolTimeoutError)
+
+
+class _Pending:
+    """Пользователь в очереди вместе с состоянием и ожидающим результатом."""
+
+    __slots__ = ("ticket", "user_data", "future")
+
+    def __init__(self, ticket: IngestTicket, user_data: UserCreate) -> None:
+        self.ticket = ticket
+        self.user_data = user_data
+        self.future: asyncio.Future[BulkItemResult] = (
+            asyncio.get_running_loop().create_future()
+        )
+
+
+class UsersIngestQueue:
+    """
+    Очередь пакетного создания пользователей.
+
+    Пакет записывается, когда набралось `batch_size` пользователей или
+    прошло `flush_interval` секунд с поступления первого из них.
+    Состояние последних пользователей доступно по идентификатору
+    отслеживания в пределах процесса.
+    """
+
+    # Сколько раз пытаться получить соединение для записи пакета.
+    attempts = 3
+
+    def __init__(
+        self,
+        repository: Callable[[], AbstractAsyncContextManager[UsersRepository]],
+        queue_size: int,
+        batch_size: int,
+        flush_interval: float,
+    ) -> None:
+        """
+        :param repository: Фабрика хранилища пользователей для записи.
+        :type repository: Callable[[], AbstractAsyncContextManager[UsersRepository]]
+        :param queue_size: Вместимость очереди.
+        :type queue_size: int
+        :param batch_size: Максимальный размер пакета.
+        :type batch_size: int
+        :param flush_interval: Максимальное время накопления пакета в секундах.
+        :type flush_interval: float
+        """
+
+        self.repository = repository
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.history_size = queue_size * 2
+        self._queue: asyncio.Queue[_Pending] = asyncio.Queue(maxsize=queue_size)
+        self._tickets: OrderedDict[str, IngestTicket] = OrderedDict()
+        self._task: asyncio.Task | None = None
+        self._closing = False
+
+    @property
+    def size(self) -> int:
+        """Количество пользователей в очереди."""
+
+        return self._queue.qsize()
+
+    def submit(self, user_data: UserCreate) -> _Pending:
+        """
+        Поставить пользователя в очередь на создание.
+
+        :param user_data: Данные нового пользователя.
+        :type user_data: UserCreate
+        :raises HTTPException: 429, если очередь заполнена,
+            503, если очередь не запущена или останавливается.
+        :return: Элемент очереди с состоянием и будущим результатом.
+        :rtype: _Pending
+        """
+
+        if self._task is None or self._closing:
+            raise service_unavailable(detail="Ingest queue is not running")
+        pending = _Pending(IngestTicket(tracking_id=uuid.uuid4().hex), user_data)
+        try:
+            self._queue.put_nowait(pending)
+        except asyncio.QueueFull:
+            USERS_INGEST_REJECTED.inc()
+            raise too_many_requests(
+                detail="Ingest queue is full",
+                retry_after=max(1, round(self.flush_interval)),
+            )
+        self._remember(pending.ticket)
+        return pending
+
+    def status(self, tracking_id: str) -> IngestTicket | None:
+        """
+        Получить состояние пользователя по идентификатору отслеживания.
+
+        :param tracking_id: Идентификатор отслеживания.
+        :type tracking_id: str
+        :return: Состояние или None, если идентификатор неизвестен.
+        :rtype: IngestTicket | None
+        """
+
+        return self._tickets.get(tracking_id)
+
+    def start(self) -> None:
+        """Запустить фоновую запись очереди."""
+
+        self._closing = False
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """
+        Перестать принимать пользователей и записать оставшихся в очереди.
+
+        :param timeout: Максимальное время записи очереди в секундах.
+        :type timeout: float
+        """
+
+        self._closing = True
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except TimeoutError:
+            logger.warning("Ingest queue stopped with %d unsaved users", self.size)
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        """Собирать пакеты из очереди и записывать их в базу данных."""
+
+        while True:
+            first = await self._queue.get()
+            if self._queue.qsize() < self.batch_size - 1 and not self._closing:
+                await asyncio.sleep(self.flush_interval)
+            batch = [first]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _flush(self, batch: list[_Pending]) -> None:
+        """
+        Записать пакет и передать результаты ожидающим запросам.
+
+        :param batch: Пользователи пакета.
+        :type batch: list[_Pending]
+        """
+
+        start = time.perf_counter()
+        items = await self._create(batch)
+        USERS_INGEST_BATCH.observe(len(batch))
+        USERS_INGEST_FLUSH.observe(time.perf_counter() - start)
+        for pending, item in zip(batch, items):
+            ticket = pending.ticket
+            ticket.status = (
+                IngestStatus.CREATED if item.success else IngestStatus.FAILED
+            )
+            ticket.id = item.id
+            ticket.error = item.error
+            if not pending.future.done():
+                pending.future.set_result(item)
+
+    async def _create(self, batch: list[_Pending]) -> list[BulkItemResult]:
+        """
+        Создать пользователей пакета, повторяя попытку при недоступной базе.
+
+        Повторяется только получение соединения: ошибка после отправки
+        запроса могла случиться уже после фиксации транзакции, и повтор
+        создал бы пользователей дважды. Такой пакет завершается ошибкой.
+
+        :param batch: Пользователи пакета.
+        :type batch: list[_Pending]
+        :return: Результаты в порядке пакета.
+        :rtype: list[BulkItemResult]
+        """
+
+        users_data = [pending.user_data for pending in batch]
+        for attempt in range(1, self.attempts + 1):
+            try:
+                async with self.repository() as users:
+                    try:
+                        await users.connect()
+                    except _CONNECT_ERRORS as error:
+                        logger.warning(
+                            "Ingest batch of %d could not connect (attempt %d): %s",
+                            len(batch),
+                            attempt,
+                            error,
+                        )
+                        if attempt < self.attempts:
+                            await asyncio.sleep(attempt * 0.5)
+                        continue
+                    result = await users.create_users(users_data)
+                return result.items
+            except Exception:
+                logger.exception("Ingest batch of %d failed", len(batch))
+                break
+        return [
+            BulkItemResult(index=index, success=False, error="Ingest failed")
+            for index in range(len(batch))
+        ]
+
+    def _remember(self, ticket: IngestTicket) -> None:
+        """
+        Сохранить состояние для запросов по идентификатору отслеживания.
+
+        :param ticket: Состояние пользователя.
+        :type ticket: IngestTicket
+        """
+
+        self._tickets[ticket.tracking_id] = ticket
+        while len(self._tickets) > self.history_size:
+            self._tickets.popitem(last=False)
+
+
+@lru_cache(maxsize=1)
+def get_users_ingest() -> UsersIngestQueue:
+    """
+    Получить очередь создания пользователей процесса, создав её
+    по настройкам при первом вызове.
+
+    :return: Очередь создания пользователей.
+    :rtype: UsersIngestQueue
+    """
+
+    settings = get_settings()
+    return UsersIngestQueue(
+        repository=users_repository,
+        queue_size=settings.USERS_INGEST_QUEUE_SIZE,
+        batch_size=settings.USERS_INGEST_BATCH_SIZE,
+        flush_interval=settings.USERS_INGEST_FLUSH_INTERVAL,
+    )
@@ -0,0 +1,105 @@
+"""
+Модуль содержит пакетную загрузку пользователей по ID в стиле DataLoader.
+
+Вызовы `load`, сделанные в одной итерации цикла событий, собираются
+в пакет и выполняются одним вызовом функции пакетной загрузки.
+Загрузчик пользователей строится на `UsersCRUD.get_users_by_ids`
+в `src.crud.users`.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable, Iterable
+from typing import Generic, TypeVar
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class DataLoader(Generic[K, V]):
+    """
+    Собирает ключи, запрошенные в одной итерации цикла событий, в пакет.
+
+    Одинаковые ключи внутри пакета запрашиваются один раз. Результаты
+    между пакетами не сохраняются, поэтому загрузчик не требует
+    сброса после изменения данных.
+    """
+
+    def __init__(
+        self,
+        batch_load: Callable[[list[K]], Awaitable[dict[K, V]]],
+        max_batch_size: int = 1000,
+    ) -> None:
+        """
+        :param batch_load: Функция, загружающая значения по списку ключей.
+            Отсутствующие ключи в результат не включаются.
+        :type batch_load: Callable[[list[K]], Awaitable[dict[K, V]]]
+        :param max_batch_size: Максимальное количество ключей в одном вызове.
+        :type max_batch_size: int
+        """
+
+        self.batch_load = batch_load
+        self.max_batch_size = max_batch_size
+        self._pending: dict[K, asyncio.Future] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def load(self, key: K) -> V | None:
+        """
+        Загрузить значение по ключу в составе ближайшего пакета.
+
+        :param key: Ключ.
+        :type key: K
+        :return: Значение или None, если оно не найдено.
+        :rtype: V | None
+        """
+
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            if not self._pending:
+                loop.call_soon(self._dispatch)
+            future = self._pending[key] = loop.create_future()
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: Iterable[K]) -> list[V | None]:
+        """
+        Загрузить значения по нескольким ключам.
+
+        :param keys: Ключи.
+        :type keys: Iterable[K]
+        :return: Значения в порядке ключей, None — для отсутствующих.
+        :rtype: list[V | None]
+        """
+
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _dispatch(self) -> None:
+        """Запустить загрузку накопленного пакета."""
+
+        batch, self._pending = self._pending, {}
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: dict[K, asyncio.Future]) -> None:
+        """
+        Загрузить пакет частями по `max_batch_size` ключей.
+
+        :param batch: Ожидающие результата ключи.
+        :type batch: dict[K, asyncio.Future]
+        """
+
+        keys = list(batch)
+        for start in range(0, len(keys), self.max_batch_size):
+            chunk = keys[start : start + self.max_batch_size]
+            try:
+                values = await self.batch_load(chunk)
+            except Exception as error:
+                for key in chunk:
+                    if not batch[key].done():
+                        batch[key].set_exception(error)
+                        batch[key].exception()
+                continue
+            for key in chunk:
+                if not batch[key].done():
+                    batch[key].set_result(values.get(key))
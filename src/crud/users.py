@@ -1,46 +1,673 @@
 """Модуль для работы с crud операциями, связанными с пользователем."""
 
-from sqlalchemy import select
-from sqlalchemy.exc import IntegrityError
-from sqlalchemy.ext.asyncio import AsyncSession
-from src.schemas.users import UserCreate, UserUpdate
-from src.models.users import UsersOrm
-from src.exceptions.exceptions import bad_request
+import time
+from datetime import datetime
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable, Sequence
+from typing import TYPE_CHECKING
+from pydantic import ValidationError
+from sqlalchemy import select, insert, update, delete, values, column, func, cast
+from sqlalchemy import literal_column, text, true
+from sqlalchemy import any_, bindparam, BigInteger, Integer, Select, Row, Text, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.exc import IntegrityError, DataError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from src.schemas.users import (
+    User,
+    UserCreate,
+    UserUpdate,
+    UserBulkUpdate,
+    BulkItemResult,
+    BulkResult,
+    UsersFilter,
+    TransferFormat,
+    ImportRejection,
+    ImportResult,
+    UsersStats,
+    UsersHobbies,
+    HobbyMatch,
+    UserChange,
+)
+from src.models.users import (
+    UsersOrm,
+    UsersStatsOrm,
+    UsersHobbyStatsOrm,
+    UsersChangeOrm,
+)
+from src.exceptions.exceptions import bad_request, precondition_failed
+from src.crud.loader import DataLoader
+from src.cache.users import get_page_reads, get_user_reads, get_users_cache
+from src.utils.etag import PageValidators
+from src.utils.serializers import USER_FIELDS, encode_user_row
+from src.utils.transfer import Record, validation_message
+
+if TYPE_CHECKING:
+    import asyncpg
 
 
 class UsersCRUD:
     """CRUD-операции для работы с пользователями."""
 
     @staticmethod
-    async def get_users(session: AsyncSession) -> list[UsersOrm]:
+    async def get_users(
+        session: AsyncSession,
+        users_filter: UsersFilter | None = None,
+        after_id: int | None = None,
+        after_value: int | str | None = None,
+        limit: int | None = None,
+    ) -> list[UsersOrm]:
         """
-        Получить список всех пользователей, отсортированных по ID.
+        Получить страницу пользователей с отбором и сортировкой.
+
+        Пагинация keyset: страница начинается строго после позиции
+        (`after_value`, `after_id`) в порядке сортировки, поэтому стоимость
+        запроса не зависит от номера страницы.
 
         :param session: Асинхронная сессия SQLAlchemy.
         :type session: AsyncSession
+        :param users_filter: Условия отбора и сортировки.
+        :type users_filter: UsersFilter | None
+        :param after_id: ID, после которого начинается страница.
+        :type after_id: int | None
+        :param after_value: Значение поля сортировки, после которого
+            начинается страница. Не используется при сортировке по ID.
+        :type after_value: int | str | None
+        :param limit: Максимальное количество пользователей.
+        :type limit: int | None
         :return: Список пользователей.
         :rtype: list[UsersOrm]
         """
 
-        query = select(UsersOrm).order_by(UsersOrm.id)
-        result = await session.execute(query)
-        users = result.scalars().all()
-        return list(users)
+        users_filter = users_filter or UsersFilter()
+        # ORM-объекты привязаны к сессии вызывающего, поэтому одновременные
+        # запросы страниц не объединяются.
+        query = _users_query(users_filter, after_id, after_value)
+        result = await session.execute(query.limit(limit))
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def get_users_rows(
+        session: AsyncSession,
+        users_filter: UsersFilter | None = None,
+        after_id: int | None = None,
+        after_value: int | str | None = None,
+        limit: int | None = None,
+    ) -> list[Row]:
+        """
+        Получить страницу пользователей в виде строк без создания ORM-объектов.
+
+        Условия те же, что в `get_users`. Столбцы выбираются в порядке
+        полей схемы `User` (`USER_FIELDS`).
+
+        :param session: Асинхронная сессия SQLAlchemy.
+        :type session: AsyncSession
+        :param users_filter: Условия отбора и сортировки.
+        :type users_filter: UsersFilter | None
+        :param after_id: ID, после которого начинается страница.
+        :type after_id: int | None
+        :param after_value: Значение поля сортировки, после которого
+            начинается страница.
+        :type after_value: int | str | None
+        :param limit: Максимальное количество пользователей.
+        :type limit: int | None
+        :return: Список строк.
+        :rtype: list[Row]
+        """
+
+        users_filter = users_filter or UsersFilter()
+
+        async def load() -> list[Row]:
+            query = _users_query(users_filter, after_id, after_value, _USER_COLUMNS)
+            result = await session.execute(query.limit(limit))
+            return list(result.all())
+
+        key = _page_key("rows", session, users_filter, after_id, after_value, limit)
+        return await get_page_reads().do(key, load)
+
+    @staticmethod
+    async def get_users_validators(
+        session: AsyncSession,
+        users_filter: UsersFilter | None = None,
+        after_id: int | None = None,
+        after_value: int | str | None = None,
+        limit: int | None = None,
+    ) -> PageValidators:
+        """
+        Получить агрегаты страницы для условного запроса без выборки строк.
+
+        Страница отбирается так же, как в `get_users`, но из неё
+        выбираются только id, updated_at и version, а наружу
+        возвращается одна строка агрегатов.
+
+        :param session: Асинхронная сессия SQLAlchemy.
+        :type session: AsyncSession
+        :param users_filter: Условия отбора и сортировки.
+        :type users_filter: UsersFilter | None
+        :param after_id: ID, после которого начинается страница.
+        :type after_id: int | None
+        :param after_value: Значение поля сортировки, после которого
+            начинается страница.
+        :type after_value: int | str | None
+        :param limit: Максимальное количество пользователей.
+        :type limit: int | None
+        :return: Агрегаты страницы.
+        :rtype: PageValidators
+        """
+
+        users_filter = users_filter or UsersFilter()
+
+        async def load() -> PageValidators:
+            page = (
+                _users_query(
+                    users_filter,
+                    after_id,
+                    after_value,
+                    (UsersOrm.id, UsersOrm.updated_at, UsersOrm.version),
+                )
+                .limit(limit)
+                .subquery()
+            )
+            query = select(
+                func.count(),
+                func.max(page.c.updated_at),
+                func.coalesce(func.sum(page.c.id), 0),
+                func.coalesce(func.sum(page.c.version), 0),
+            )
+            row = (await session.execute(query)).one()
+            return PageValidators(*row)
+
+        key = _page_key(
+            "validators", session, users_filter, after_id, after_value, limit
+        )
+        return await get_page_reads().do(key, load)
+
+    @staticmethod
+    async def stream_users(
+        session: AsyncSession,
+        users_filter: UsersFilter | None = None,
+        after_id: int | None = None,
+        after_value: int | str | None = None,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[list[UsersOrm]]:
+        """
+        Потоково получить пользователей порциями через серверный курсор.
+
+        Объекты каждой порции удаляются из сессии после выдачи, поэтому
+        потребление памяти ограничено размером одной порции.
+
+        :param session: Асинхронная сессия SQLAlchemy.
+        :type session: AsyncSession
+        :param users_filter: Условия отбора и сортировки.
+        :type users_filter: UsersFilter | None
+        :param after_id: ID, после которого начинается выборка.
+        :type after_id: int | None
+        :param after_value: Значение поля сортировки, после которого
+            начинается выборка.
+        :type after_value: int | str | None
+        :param chunk_size: Количество строк в одной порции.
+        :type chunk_size: int
+        :return: Асинхронный итератор порций пользователей.
+        :rtype: AsyncIterator[list[UsersOrm]]
+        """
+
+        query = _users_query(users_filter or UsersFilter(), after_id, after_value)
+        result = await session.stream(query.execution_options(yield_per=chunk_size))
+        async for partition in result.scalars().partitions():
+            yield list(partition)
+            # expunge_all() заменяет карту идентичности, которую ещё
+            # использует загрузка следующих порций, поэтому объекты
+            # удаляются по одному.
+            for user in partition:
+                session.expunge(user)
+
+    @staticmethod
+    async def export_users(
+        session: AsyncSession,
+        users_filter: UsersFilter,
+        data_format: TransferFormat,
+        output: Callable[[bytes], Awaitable[None]],
+    ) -> int:
+        """
+        Выгрузить пользователей через COPY ... TO STDOUT.
+
+        Строки передаются в `output` порциями по мере получения от сервера
+        и не накапливаются в памяти. NDJSON формируется на сервере через
+        `row_to_json` и выгружается в формате CSV с управляющими символами
+        в роли кавычки и разделителя, чтобы JSON не экранировался.
+
+        :param session: Асинхронная сессия SQLAlchemy.
+        :type session: AsyncSession
+        :param users_filter: Условия отбора и сортировки.
+        :type users_filter: UsersFilter
+        :param data_format: Формат выгрузки.
+        :type data_format: TransferFormat
+        :param output: Асинхронная функция, принимающая порции данных.
+        :type output: Callable[[bytes], Awaitable[None]]
+        :return: Количество выгруженных строк.
+        :rtype: int
+        """
+
+        query = _users_query(users_filter, None, None, _USER_COLUMNS)
+        if data_format == TransferFormat.NDJSON:
+            page = query.subquery("u")
+            query = select(func.row_to_json(literal_column(page.name))).select_from(
+                page
+            )
+            options = {"format": "csv", "quote": "\x01", "delimiter": "\x02"}
+        else:
+            options = {"format": "csv", "header": True}
+        compiled = query.compile(dialect=session.bind.dialect)
+        args = [compiled.params[name] for name in compiled.positiontup]
+        connection = await _driver_connection(session)
+        await connection.execute("SET LOCAL TIME ZONE 'UTC'")
+        status = await connection.copy_from_query(
+            str(compiled), *args, output=output, **options
+        )
+        return int(status.split()[-1])
+
+    @staticmethod
+    async def import_users(
+        records: AsyncIterator[Record],
+        session: AsyncSession,
+        chunk_size: int = 5000,
+        max_errors: int = 100,
+    ) -> ImportResult:
+        """
+        Загрузить пользователей через COPY по мере чтения записей.
+
+        Каждая запись проверяется схемой `UserCreate`, корректные
+        записи копируются в таблицу порциями по `chunk_size` через
+        `copy_records_to_table`. Все порции записываются в одной
+        транзакции: при ошибке базы данных импорт отменяется целиком.
+
+        :param records: Записи с номерами строк.
+        :type records: AsyncIterator[Record]
+        :param session: Асинхронная сессия SQLAlchemy.
+        :type session: AsyncSession
+        :param chunk_size: Количество записей в одной команде COPY.
+        :type chunk_size: int
+        :param max_errors: Сколько отклонённых записей описать в отчёте.
+        :type max_errors: int
+        :raises HTTPException: 400, если база данных отклонила данные.
+        :return: Итог импорта.
+        :rtype: ImportResult
+        """
+
+        # Драйвер уже загружен движком, импорт нужен только для типа ошибки.
+        from asyncpg import PostgresError
+
+        start = time.perf_counter()
+        connection = await _driver_connection(session)
+        received = imported = rejected = 0
+        errors = []
+        chunk = []
+        try:
+            async for line, record, error in records:
+                received += 1
+                if error is None:
+                    try:
+                        user = UserCreate.model_validate(record)
+                    except ValidationError as validation_error:
+                        error = validation_message(validation_error)
+                if error is not None:
+                    rejected += 1
+                    if len(errors) < max_errors:
+                        errors.append(ImportRejection(line=line, error=error))
+                    continue
+                chunk.append(tuple(getattr(user, name) for name in _IMPORT_COLUMNS))
+                if len(chunk) >= chunk_size:
+                    imported += await _copy_users(connection, chunk)
+                    chunk = []
+            if chunk:
+                imported += await _copy_users(connection, chunk)
+            await session.commit()
+        except PostgresError as error:
+            await session.rollback()
+            raise bad_request(detail=f"Import failed: {error}")
+        _forget_reads(())
+        seconds = time.perf_counter() - start
+        return ImportResult(
+            received=received,
+            imported=imported,
+            rejected=rejected,
+            seconds=round(seconds, 3),
+            rows_per_second=round(imported / seconds, 1) if seconds else 0.0,
+            errors=errors,
+        )
 
     @staticmethod
-    async def get_user(user_id: int, session: AsyncSession) -> UsersOrm | None:
+    async def get_user(user_id: int, session: AsyncSession) -> User | None:
         """
         Получить пользователя по ID.
 
+        Сначала пользователь ищется в кеше, при промахе загружается
+        из базы данных и сохраняется в кеш, если за время загрузки
+        пользователь не изменился. Одновременные промахи
+        по одному ID выполняют один запрос к базе данных, а промахи
+        по разным ID в одной итерации цикла событий собираются
+        загрузчиком `load_user` в один запрос.
+
         :param user_id: Идентификатор пользователя.
         :type user_id: int
         :param session: Асинхронная сессия SQLAlchemy.
         :type session: AsyncSession
-        :return: Объект пользователя или None, если не найден.
-        :rtype: UsersOrm | None
+        :return: Пользователь или None, если не найден.
+        :rtype: User | None
+        """
+
+        cached = await get_users_cache().get(user_id)
+        if cached is not None:
+            return cached
+
+        async def load() -> User | None:
+            return await get_users_cache().fill(
+                user_id, lambda: UsersCRUD.load_user(user_id, session)
+            )
+
+        return await get_user_reads().do(("model", user_id), load)
+
+    @staticmethod
+    async def load_user(user_id: int, session: AsyncSession) -> User | None:
+        """
+        Загрузить пользователя по ID в составе пакета.
+
+        Вызовы, сделанные в одной итерации цикла событий для одного
+        движка базы данных, выполняются одним запросом `get_users_by_ids`
+        в отдельной сессии этого движка; каждый вызов получает своего
+        пользователя. Кеш не используется.
+
+        :param user_id: Идентификатор пользователя.
+        :type user_id: int
+        :param session: Асинхронная сессия SQLAlchemy, определяющая движок.
+        :type session: AsyncSession
+        :return: Пользователь или None, если не найден.
+        :rtype: User | None
         """
 
-        return await session.get(UsersOrm, user_id)
+        return await _users_loader(session.bind).load(user_id)
+
+    @staticmethod
+    async def get_user_json(user_id: int, session: AsyncSession) -> str | None:
+        """
+        Получить готовое JSON-представление пользователя по ID.
+
+        При промахе кеша строка выбирается без создания ORM-объекта
+        и кодируется быстрым сериализатором. Одновременные промахи
+        по одному ID выполняют один запрос к базе данных.
+
+        :param user_id: Идентификатор пользователя.
+        :type user_id: int
+        :param session: Асинхронная сессия SQLAlchemy.
+        :type session: AsyncSession
+        :return: JSON пользователя или None, если не найден.
+        :rtype: str | None
+        """
+
+        cached = await get_users_cache().get_json(user_id)
+        if cached is not None:
+            return cached
+
+        async def select_json() -> str | None:
+            query = select(*_USER_COLUMNS).where(UsersOrm.id == user_id)
+            row = (await session.execute(query)).first()
+            return None if row is None else encode_user_row(row)
+
+        async def load() -> str | None:
+            return await get_users_cache().fill_json(user_id, select_json)
+
+        return await get_user_reads().do(("json", user_id), load)
+
+    @staticmethod
+    async def get_users_by_ids(
+        user_ids: Iterable[int], session: AsyncSession
+    ) -> dict[int, User]:
+        """
+        Получить пользователей по списку ID одним запросом WHERE id = ANY(...).
+
+        :param user_ids: Идентификаторы пользователей.
+        :type user_ids: Iterable[int]
+        :param session: Асинхронная сессия SQLAlchemy.
+        :type session: AsyncSession
+        :return: Найденные пользователи по ID. Отсутствующих ID в словаре нет.
+        :rtype: dict[int, User]
+        """
+
+        query = select(UsersOrm).where(
+            UsersOrm.id
+            == any_(bindparam("ids", list(set(user_ids)), type_=ARRAY(Integer)))
+        )
+        users = (await session.scalars(query)).all()
+        return {user.id: User.model_validate(user) for user in users}
+
+    @staticmethod
+    async def get_stats(session: AsyncSession, bucket_size: int = 10) -> UsersStats:
+        """
+        Получить сводную статистику пользователей из таблицы счётчиков.
+
+        Таблица `users_stats` содержит по одной строке на сочетание
+        возраста и семейного положения, поэтому время ответа не зависит
+        от количества пользователей.
+
+        :param session: Асинхронная сессия SQLAlchemy.
+        :type session: AsyncSession
+        :param bucket_size: Ширина интервала гистограммы возрастов.
+        :type bucket_size: int
+        :return: Общее количество, средний возраст, количество по семейному
+            положению и гистограмма возрастов.
+        :rtype: UsersStats
+        """
+
+        query = select(
+            UsersStatsOrm.relationship_status,
+            UsersStatsOrm.age,
+            UsersStatsOrm.count,
+        ).where(UsersStatsOrm.count > 0)
+        return UsersStats.from_counts(await session.execute(query), bucket_size)
+
+    @staticmethod
+    async def get_hobbies(
+        session: AsyncSession, hobbies: list[str] | None = None, limit: int = 20
+    ) -> UsersHobbies:
+        """
+        Получить количество пользователей по тегам хобби из таблицы счётчиков.
+
+        :param session: Асинхронная сессия SQLAlchemy.
+        :type session: AsyncSession
+        :param hobbies: Теги, для которых нужно количество. None — самые
+            частые теги.
+        :type hobbies: list[str] | None
+        :param limit: Сколько самых частых тегов вернуть без `hobbies`.
+        :type limit: int
+        :return: Количество пользователей по тегам.
+        :rtype: UsersHobbies
+        """
+
+        query = select(UsersHobbyStatsOrm.hobby, UsersHobbyStatsOrm.count)
+        if hobbies:
+            counts = dict(
+                (
+                    await session.execute(
+                        query.where(UsersHobbyStatsOrm.hobby.in_(hobbies))
+                    )
+                )
+                .tuples()
+                .all()
+            )
+            return UsersHobbies.from_counts(
+                (hobby, counts.get(hobby, 0)) for hobby in hobbies
+            )
+        query = (
+            query.where(UsersHobbyStatsOrm.count > 0)
+            .order_by(UsersHobbyStatsOrm.count.desc(), UsersHobbyStatsOrm.hobby)
+            .limit(limit)
+        )
+        return UsersHobbies.from_counts((await session.execute(query)).tuples())
+
+    @staticmethod
+    async def rebuild_stats(session: AsyncSession) -> int | None:
+        """
+        Пересчитать таблицы счётчиков `users_stats` и `users_hobby_stats`
+        по таблице `users`.
+
+        На время пересчёта таблица `users` блокируется от изменений,
+        чтение продолжается. Запуск во время другого пересчёта сразу
+        завершается, не дожидаясь блокировки таблицы.
+
+        :param session: Асинхронная сессия SQLAlchemy.
+        :type session: AsyncSession
+        :return: Количество учтённых пользователей или None, если пересчёт
+            уже выполняется.
+        :rtype: int | None
+        """
+
+        started = await session.scalar(
+            select(func.pg_try_advisory_xact_lock(func.hashtext("users_stats_rebuild")))
+        )
+        if not started:
+            await session.rollback()
+            return None
+        await session.execute(text("LOCK TABLE users IN SHARE ROW EXCLUSIVE MODE"))
+        await session.execute(delete(UsersStatsOrm))
+        rows = select(
+            UsersOrm.relationship_status, UsersOrm.age, func.count()
+        ).group_by(UsersOrm.relationship_status, UsersOrm.age)
+        await session.execute(
+            insert(UsersStatsOrm).from_select(
+                ["relationship_status", "age", "count"], rows
+            )
+        )
+        await session.execute(delete(UsersHobbyStatsOrm))
+        hobby = (
+            func.unnest(UsersOrm.hobby_tags).table_valued("hobby").render_derived()
+        ).lateral()
+        hobbies = (
+            select(hobby.c.hobby, func.count())
+            .select_from(UsersOrm)
+            .join(hobby, true())
+        )
+        await session.execute(
+            insert(UsersHobbyStatsOrm).from_select(
+                ["hobby", "count"], hobbies.group_by(hobby.c.hobby)
+            )
+        )
+        total = await session.scalar(
+            select(func.coalesce(func.sum(UsersStatsOrm.count), 0))
+        )
+        await session.commit()
+        return int(total)
+
+    @staticmethod
+    async def get_changes(
+        session: AsyncSession, after_seq: int, limit: int = 500
+    ) -> list[UserChange]:
+        """
+        Получить изменения пользователей после номера по возрастанию номеров.
+
+        :param session: Асинхронная сессия SQLAlchemy.
+        :type session: AsyncSession
+        :param after_seq: Номер, после которого начинается выборка.
+        :type after_seq: int
+        :param limit: Максимальное количество изменений.
+        :type limit: int
+        :return: Изменения пользователей.
+        :rtype: list[UserChange]
+        """
+
+        query = (
+            select(UsersChangeOrm)
+            .where(UsersChangeOrm.seq > after_seq)
+            .order_by(UsersChangeOrm.seq)
+            .limit(limit)
+        )
+        return [_user_change(change) for change in await session.scalars(query)]
+
+    @staticmethod
+    async def get_changes_snapshot(
+        session: AsyncSession, after_seq: int, limit: int = 500
+    ) -> tuple[list[UserChange], int, int]:
+        """
+        Получить изменения пользователей после номера вместе с границами
+        снимка базы данных, в котором они прочитаны.
+
+        Номера выдаются без блокировки, поэтому изменение с меньшим
+        номером может быть зафиксировано позже. Транзакции с номером
+        меньше `xmin` снимка уже завершены, с номером не меньше `xmax` —
+        начаты после него.
+
+        :param session: Асинхронная сессия SQLAlchemy.
+        :type session: AsyncSession
+        :param after_seq: Номер, после которого начинается выборка.
+        :type after_seq: int
+        :param limit: Максимальное количество изменений.
+        :type limit: int
+        :return: Изменения пользователей, `xmin` и `xmax` снимка,
+            для пустой выборки — (0, 0).
+        :rtype: tuple[list[UserChange], int, int]
+        """
+
+        # Функции снимка вычисляются в том же операторе, что и выборка,
+        # поэтому границы относятся именно к прочитанным строкам.
+        snapshot = func.pg_current_snapshot()
+        query = (
+            select(
+                UsersChangeOrm,
+                cast(cast(func.pg_snapshot_xmin(snapshot), Text), BigInteger),
+                cast(cast(func.pg_snapshot_xmax(snapshot), Text), BigInteger),
+            )
+            .where(UsersChangeOrm.seq > after_seq)
+            .order_by(UsersChangeOrm.seq)
+            .limit(limit)
+        )
+        rows = (await session.execute(query)).all()
+        if not rows:
+            return [], 0, 0
+        _, xmin, xmax = rows[0]
+        return [_user_change(change) for change, _, _ in rows], xmin, xmax
+
+    @staticmethod
+    async def get_changes_range(session: AsyncSession) -> tuple[int, int]:
+        """
+        Получить первый и последний номер в журнале изменений.
+
+        :param session: Асинхронная сессия SQLAlchemy.
+        :type session: AsyncSession
+        :return: Первый и последний номер, (0, 0) для пустого журнала.
+        :rtype: tuple[int, int]
+        """
+
+        first, last = (
+            await session.execute(
+                select(
+                    func.coalesce(func.min(UsersChangeOrm.seq), 0),
+                    func.coalesce(func.max(UsersChangeOrm.seq), 0),
+                )
+            )
+        ).one()
+        return first, last
+
+    @staticmethod
+    async def prune_changes(session: AsyncSession, before: datetime) -> int:
+        """
+        Удалить из журнала изменения старше заданного времени.
+
+        Последнее изменение сохраняется всегда, чтобы по журналу было
+        видно, до какого номера он дошёл.
+
+        :param session: Асинхронная сессия SQLAlchemy.
+        :type session: AsyncSession
+        :param before: Изменения раньше этого времени удаляются.
+        :type before: datetime
+        :return: Количество удалённых изменений.
+        :rtype: int
+        """
+
+        last = select(func.max(UsersChangeOrm.seq)).scalar_subquery()
+        result = await session.execute(
+            delete(UsersChangeOrm).where(
+                UsersChangeOrm.changed_at < before, UsersChangeOrm.seq < last
+            )
+        )
+        await session.commit()
+        return result.rowcount
 
     @staticmethod
     async def create_user(user_data: UserCreate, session: AsyncSession) -> UsersOrm:
@@ -67,17 +694,24 @@ class UsersCRUD:
             session.add(user)
             await session.commit()
             await session.refresh(user)
-            return user
         except IntegrityError:
             await session.rollback()
             raise bad_request()
+        _forget_reads((user.id,))
+        await get_users_cache().set(User.model_validate(user))
+        return user
 
     @staticmethod
     async def update_user(
-        user_id: int, user_data: UserUpdate, session: AsyncSession
-    ) -> UsersOrm | None:
+        user_id: int,
+        user_data: UserUpdate,
+        session: AsyncSession,
+        versions: list[int] | None = None,
+    ) -> User | None:
         """
-        Обновить данные пользователя.
+        Обновить данные пользователя одним запросом UPDATE ... RETURNING.
+
+        Поля со значением None не изменяются.
 
         :param user_id: Идентификатор пользователя.
         :type user_id: int
@@ -85,47 +719,691 @@ class UsersCRUD:
         :type user_data: UserUpdate
         :param session: Асинхронная сессия SQLAlchemy.
         :type session: AsyncSession
-        :raises HTTPException: При ошибке обновления.
+        :param versions: Допустимые текущие версии записи из If-Match.
+            None — без проверки версии.
+        :type versions: list[int] | None
+        :raises HTTPException: 400 при ошибке обновления,
+            412 при несовпадении версии.
         :return: Обновлённый пользователь или None, если пользователь не найден.
-        :rtype: UsersOrm | None
+        :rtype: User | None
         """
 
-        user = await session.get(UsersOrm, user_id)
-        if user is None:
-            return None
-        data = user_data.model_dump()
-        data = {key: value for key, value in data.items() if value is not None}
-        for key, value in data.items():
-            setattr(user, key, value)
+        data = user_data.model_dump(exclude_none=True)
+        return await _update_user(user_id, data, session, versions)
+
+    @staticmethod
+    async def patch_user(
+        user_id: int,
+        user_data: UserUpdate,
+        session: AsyncSession,
+        versions: list[int] | None = None,
+    ) -> User | None:
+        """
+        Частично обновить пользователя: изменяются только переданные поля.
+
+        :param user_id: Идентификатор пользователя.
+        :type user_id: int
+        :param user_data: Изменяемые поля пользователя.
+        :type user_data: UserUpdate
+        :param session: Асинхронная сессия SQLAlchemy.
+        :type session: AsyncSession
+        :param versions: Допустимые текущие версии записи из If-Match.
+            None — без проверки версии.
+        :type versions: list[int] | None
+        :raises HTTPException: 400 при ошибке обновления,
+            412 при несовпадении версии.
+        :return: Обновлённый пользователь или None, если пользователь не найден.
+        :rtype: User | None
+        """
+
+        data = user_data.model_dump(exclude_unset=True)
+        return await _update_user(user_id, data, session, versions)
+
+    @staticmethod
+    async def delete_user(
+        user_id: int, session: AsyncSession, versions: list[int] | None = None
+    ) -> bool:
+        """
+        Удалить пользователя одним запросом DELETE ... RETURNING id.
+
+        :param user_id: Идентификатор пользователя.
+        :type user_id: int
+        :param session: Асинхронная сессия SQLAlchemy.
+        :type session: AsyncSession
+        :param versions: Допустимые текущие версии записи из If-Match.
+            None — без проверки версии.
+        :type versions: list[int] | None
+        :raises HTTPException: 400 при ошибке удаления,
+            412 при несовпадении версии.
+        :return: True, если пользователь удалён, иначе False.
+        :rtype: bool
+        """
+
+        query = (
+            delete(UsersOrm)
+            .where(*_version_clauses(user_id, versions))
+            .returning(UsersOrm.id)
+            .execution_options(synchronize_session=False)
+        )
         try:
+            deleted = await session.scalar(query)
             await session.commit()
-            await session.refresh(user)
-            return user
         except IntegrityError:
             await session.rollback()
             raise bad_request()
+        if deleted is None:
+            await _check_version_conflict(user_id, session, versions)
+            return False
+        _forget_reads((user_id,))
+        await get_users_cache().invalidate(user_id)
+        return True
 
     @staticmethod
-    async def delete_user(user_id: int, session: AsyncSession) -> bool:
+    async def create_users(
+        users_data: list[UserCreate], session: AsyncSession
+    ) -> BulkResult:
         """
-        Удалить пользователя по ID.
+        Создать пользователей одним многострочным INSERT ... RETURNING.
 
-        :param user_id: Идентификатор пользователя.
-        :type user_id: int
+        Если пакет отклонён базой данных, элементы повторно вставляются
+        по одному в точках сохранения, чтобы определить ошибочные.
+
+        :param users_data: Данные новых пользователей.
+        :type users_data: list[UserCreate]
+        :param session: Асинхронная сессия SQLAlchemy.
+        :type session: AsyncSession
+        :return: Результат по каждому элементу.
+        :rtype: BulkResult
+        """
+
+        rows = [user_data.model_dump() for user_data in users_data]
+        query = insert(UsersOrm).returning(UsersOrm, sort_by_parameter_order=True)
+        try:
+            users = (await session.scalars(query, rows)).all()
+            result = BulkResult.from_items(
+                BulkItemResult(index=index, id=user.id, success=True, user=user)
+                for index, user in enumerate(users)
+            )
+            await session.commit()
+        except (IntegrityError, DataError):
+            await session.rollback()
+        else:
+            await _cache_results(result)
+            return result
+
+        items = []
+        for index, row in enumerate(rows):
+            try:
+                async with session.begin_nested():
+                    user = await session.scalar(query, [row])
+                items.append(
+                    BulkItemResult(index=index, id=user.id, success=True, user=user)
+                )
+            except (IntegrityError, DataError):
+                items.append(BulkItemResult(index=index, success=False, error=_ERROR))
+        await session.commit()
+        result = BulkResult.from_items(items)
+        await _cache_results(result)
+        return result
+
+    @staticmethod
+    async def update_users(
+        users_data: list[UserBulkUpdate], session: AsyncSession
+    ) -> BulkResult:
+        """
+        Обновить пользователей одним запросом UPDATE ... FROM (VALUES ...).
+
+        Поля со значением None не изменяются. Если пакет отклонён базой
+        данных, элементы повторно обновляются по одному в точках сохранения.
+
+        :param users_data: Обновлённые данные пользователей вместе с ID.
+        :type users_data: list[UserBulkUpdate]
+        :param session: Асинхронная сессия SQLAlchemy.
+        :type session: AsyncSession
+        :return: Результат по каждому элементу.
+        :rtype: BulkResult
+        """
+
+        items: dict[int, BulkItemResult] = {}
+        batch: dict[int, UserBulkUpdate] = {}
+        for index, user_data in enumerate(users_data):
+            if user_data.id in batch:
+                items[index] = BulkItemResult(
+                    index=index, id=user_data.id, success=False, error="Duplicate id"
+                )
+            else:
+                batch[user_data.id] = user_data
+
+        try:
+            updated = await _update_users(list(batch.values()), session)
+            await session.commit()
+        except (IntegrityError, DataError):
+            await session.rollback()
+            updated = {}
+            failed = set()
+            for user_data in batch.values():
+                try:
+                    async with session.begin_nested():
+                        updated.update(await _update_users([user_data], session))
+                except (IntegrityError, DataError):
+                    failed.add(user_data.id)
+            await session.commit()
+        else:
+            failed = set()
+
+        for index, user_data in enumerate(users_data):
+            if index in items:
+                continue
+            user = updated.get(user_data.id)
+            if user is not None:
+                items[index] = BulkItemResult(
+                    index=index, id=user.id, success=True, user=user
+                )
+            else:
+                error = _ERROR if user_data.id in failed else "User not found"
+                items[index] = BulkItemResult(
+                    index=index, id=user_data.id, success=False, error=error
+                )
+        result = BulkResult.from_items(items[index] for index in range(len(users_data)))
+        await _cache_results(result)
+        return result
+
+    @staticmethod
+    async def delete_users(user_ids: list[int], session: AsyncSession) -> BulkResult:
+        """
+        Удалить пользователей одним запросом DELETE ... WHERE id = ANY(...).
+
+        :param user_ids: Идентификаторы удаляемых пользователей.
+        :type user_ids: list[int]
         :param session: Асинхронная сессия SQLAlchemy.
         :type session: AsyncSession
         :raises HTTPException: При ошибке удаления.
-        :return: True, если пользователь удалён, иначе False.
-        :rtype: bool
+        :return: Результат по каждому элементу.
+        :rtype: BulkResult
         """
 
-        user = await session.get(UsersOrm, user_id)
-        if user is None:
-            return False
+        query = (
+            delete(UsersOrm)
+            .where(
+                UsersOrm.id
+                == any_(bindparam("ids", list(set(user_ids)), type_=ARRAY(Integer)))
+            )
+            .returning(UsersOrm.id)
+            .execution_options(synchronize_session=False)
+        )
         try:
-            await session.delete(user)
+            deleted = set((await session.scalars(query)).all())
             await session.commit()
-            return True
         except IntegrityError:
             await session.rollback()
             raise bad_request()
+        _forget_reads(deleted)
+        for user_id in deleted:
+            await get_users_cache().invalidate(user_id)
+
+        items = []
+        seen = set()
+        for index, user_id in enumerate(user_ids):
+            if user_id in seen:
+                items.append(
+                    BulkItemResult(
+                        index=index, id=user_id, success=False, error="Duplicate id"
+                    )
+                )
+            elif user_id in deleted:
+                items.append(BulkItemResult(index=index, id=user_id, success=True))
+            else:
+                items.append(
+                    BulkItemResult(
+                        index=index, id=user_id, success=False, error="User not found"
+                    )
+                )
+            seen.add(user_id)
+        return BulkResult.from_items(items)
+
+
+_ERROR = "Bad request"
+
+_USER_COLUMNS = tuple(UsersOrm.__table__.c[name] for name in USER_FIELDS)
+
+_SORT_COLUMNS = {
+    "id": UsersOrm.id,
+    "age": UsersOrm.age,
+    "name": UsersOrm.name,
+    "surname": UsersOrm.surname,
+}
+
+
+def _users_query(
+    users_filter: UsersFilter,
+    after_id: int | None,
+    after_value: int | str | None,
+    columns: Sequence | None = None,
+) -> Select:
+    """
+    Построить запрос списка пользователей с отбором, сортировкой и позицией.
+
+    Каждое условие рассчитано на свой индекс: диапазон возраста и статус
+    используют B-tree индексы вида (поле, id), поиск по началу имени и
+    фамилии — диапазон по индексу `lower(...) COLLATE "C"`, поиск подстроки
+    в хобби — триграммный GIN индекс, отбор по тегам хобби — операторы
+    `&&` и `@>` по GIN индексу `hobby_tags`.
+
+    :param users_filter: Условия отбора и сортировки.
+    :type users_filter: UsersFilter
+    :param after_id: ID, после которого начинается выборка.
+    :type after_id: int | None
+    :param after_value: Значение поля сортировки, после которого
+        начинается выборка.
+    :type after_value: int | str | None
+    :param columns: Выбираемые столбцы. По умолчанию выбирается модель.
+    :type columns: Sequence | None
+    :return: Запрос SQLAlchemy.
+    :rtype: Select
+    """
+
+    query = select(*columns) if columns else select(UsersOrm)
+    if users_filter.age_min is not None:
+        query = query.where(UsersOrm.age >= users_filter.age_min)
+    if users_filter.age_max is not None:
+        query = query.where(UsersOrm.age <= users_filter.age_max)
+    if users_filter.relationship_status is not None:
+        query = query.where(
+            UsersOrm.relationship_status == users_filter.relationship_status
+        )
+    if users_filter.name:
+        query = query.where(*_prefix_clauses(UsersOrm.name, users_filter.name))
+    if users_filter.surname:
+        query = query.where(*_prefix_clauses(UsersOrm.surname, users_filter.surname))
+    if users_filter.hobbies:
+        pattern = f"%{_escape_like(users_filter.hobbies)}%"
+        query = query.where(UsersOrm.hobbies.ilike(pattern, escape="\\"))
+    if users_filter.hobby:
+        tags = cast(users_filter.hobby, ARRAY(Text))
+        if users_filter.hobby_match == HobbyMatch.ALL:
+            query = query.where(UsersOrm.hobby_tags.contains(tags))
+        else:
+            query = query.where(UsersOrm.hobby_tags.overlap(tags))
+
+    sort = users_filter.sort
+    column = _SORT_COLUMNS[sort.field]
+    if sort.field == "id":
+        keys, position = UsersOrm.id, after_id
+    else:
+        keys, position = tuple_(column, UsersOrm.id), (after_value, after_id)
+    if after_id is not None:
+        query = query.where(keys < position if sort.descending else keys > position)
+    if sort.descending:
+        return query.order_by(column.desc(), UsersOrm.id.desc())
+    return query.order_by(column, UsersOrm.id)
+
+
+_users_loaders: dict[AsyncEngine, DataLoader[int, User]] = {}
+
+
+def _users_loader(engine: AsyncEngine) -> DataLoader[int, User]:
+    """
+    Получить пакетный загрузчик пользователей для движка базы данных.
+
+    Загрузчики разделены по движкам, чтобы чтение с реплики и чтение
+    с основной базы данных не попадали в один пакет.
+
+    :param engine: Движок, к которому привязана сессия вызывающего.
+    :type engine: AsyncEngine
+    :return: Загрузчик пользователей по ID.
+    :rtype: DataLoader[int, User]
+    """
+
+    loader = _users_loaders.get(engine)
+    if loader is None:
+
+        async def batch_load(user_ids: list[int]) -> dict[int, User]:
+            async with AsyncSession(bind=engine) as session:
+                return await UsersCRUD.get_users_by_ids(user_ids, session)
+
+        loader = _users_loaders[engine] = DataLoader(batch_load)
+    return loader
+
+
+def _user_change(change: UsersChangeOrm) -> UserChange:
+    """
+    Преобразовать запись журнала в событие изменения пользователя.
+
+    :param change: Запись журнала изменений.
+    :type change: UsersChangeOrm
+    :return: Изменение пользователя.
+    :rtype: UserChange
+    """
+
+    return UserChange(
+        seq=change.seq,
+        operation=change.operation,
+        id=change.user_id,
+        version=change.version,
+        user=change.data,
+        changed_at=change.changed_at,
+    )
+
+
+def _prefix_clauses(column, prefix: str) -> tuple:
+    """
+    Построить условия поиска по началу строки без учёта регистра.
+
+    Вместо `LIKE 'prefix%'` используется диапазон
+    `lower(column) >= prefix AND lower(column) < next(prefix)`
+    в бинарной сортировке, который может использовать B-tree индекс
+    даже в обобщённом плане подготовленного запроса.
+
+    :param column: Столбец модели.
+    :param prefix: Начало строки.
+    :type prefix: str
+    :return: Условия отбора.
+    :rtype: tuple
+    """
+
+    prefix = prefix.lower()
+    expression = func.lower(column).collate("C")
+    # Символ U+10FFFF увеличить нельзя: граница строится по префиксу
+    # без таких символов в конце, а если он весь из них, её нет.
+    stem = prefix.rstrip("\U0010ffff")
+    if not stem:
+        return (expression >= prefix,)
+    code = ord(stem[-1]) + 1
+    if 0xD800 <= code <= 0xDFFF:
+        # Суррогаты не кодируются в UTF-8, следующий символ — U+E000.
+        code = 0xE000
+    upper = stem[:-1] + chr(code)
+    return expression >= prefix, expression < upper
+
+
+def _escape_like(value: str) -> str:
+    """
+    Экранировать спецсимволы шаблона LIKE.
+
+    :param value: Исходная строка.
+    :type value: str
+    :return: Строка, в которой `%`, `_` и `\\` трактуются буквально.
+    :rtype: str
+    """
+
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+_UPDATABLE_FIELDS = tuple(UserUpdate.model_fields)
+
+_IMPORT_COLUMNS = tuple(UserCreate.model_fields)
+
+
+async def _driver_connection(session: AsyncSession) -> "asyncpg.Connection":
+    """
+    Получить соединение asyncpg, на котором работает сессия.
+
+    Сессия начинает транзакцию, если она ещё не начата, поэтому команды
+    на этом соединении выполняются в транзакции сессии.
+
+    :param session: Асинхронная сессия SQLAlchemy.
+    :type session: AsyncSession
+    :return: Соединение asyncpg.
+    :rtype: asyncpg.Connection
+    """
+
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+    return raw.driver_connection
+
+
+async def _copy_users(connection: "asyncpg.Connection", records: list[tuple]) -> int:
+    """
+    Скопировать порцию пользователей в таблицу.
+
+    :param connection: Соединение asyncpg.
+    :type connection: asyncpg.Connection
+    :param records: Значения столбцов `_IMPORT_COLUMNS`.
+    :type records: list[tuple]
+    :return: Количество добавленных строк.
+    :rtype: int
+    """
+
+    status = await connection.copy_records_to_table(
+        UsersOrm.__tablename__, records=records, columns=_IMPORT_COLUMNS
+    )
+    return int(status.split()[-1])
+
+
+def _version_clauses(user_id: int, versions: list[int] | None) -> tuple:
+    """
+    Построить условия отбора пользователя по ID и допустимым версиям.
+
+    :param user_id: Идентификатор пользователя.
+    :type user_id: int
+    :param versions: Допустимые версии или None — любая версия.
+    :type versions: list[int] | None
+    :return: Условия отбора.
+    :rtype: tuple
+    """
+
+    if versions is None:
+        return (UsersOrm.id == user_id,)
+    return (
+        UsersOrm.id == user_id,
+        UsersOrm.version == any_(bindparam("versions", versions, ARRAY(Integer))),
+    )
+
+
+async def _update_user(
+    user_id: int, data: dict, session: AsyncSession, versions: list[int] | None
+) -> User | None:
+    """
+    Выполнить UPDATE ... RETURNING для одного пользователя.
+
+    Версия записи увеличивается в том же запросе, поэтому конкурентные
+    изменения с одинаковым If-Match не требуют блокировки строки:
+    второе из них не найдёт запись с ожидаемой версией.
+
+    :param user_id: Идентификатор пользователя.
+    :type user_id: int
+    :param data: Изменяемые поля.
+    :type data: dict
+    :param session: Асинхронная сессия SQLAlchemy.
+    :type session: AsyncSession
+    :param versions: Допустимые текущие версии или None — любая версия.
+    :type versions: list[int] | None
+    :raises HTTPException: 400 при ошибке обновления,
+        412 при несовпадении версии.
+    :return: Снимок обновлённого пользователя или None, если не найден.
+    :rtype: User | None
+    """
+
+    clauses = _version_clauses(user_id, versions)
+    if not data:
+        user = await session.scalar(select(UsersOrm).where(*clauses))
+        if user is None:
+            await _check_version_conflict(user_id, session, versions)
+            return None
+        return User.model_validate(user)
+
+    query = (
+        update(UsersOrm)
+        .where(*clauses)
+        .values(**data, version=UsersOrm.version + 1)
+        .returning(UsersOrm)
+        .execution_options(synchronize_session=False)
+    )
+    try:
+        user = await session.scalar(query)
+        user = None if user is None else User.model_validate(user)
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise bad_request()
+    if user is None:
+        await _check_version_conflict(user_id, session, versions)
+        return None
+    _forget_reads((user_id,))
+    await get_users_cache().set(user)
+    return user
+
+
+async def _check_version_conflict(
+    user_id: int, session: AsyncSession, versions: list[int] | None
+) -> None:
+    """
+    Определить, почему запись не найдена: её нет или версия не совпала.
+
+    Вызывается только после неудачного изменения с условием на версию,
+    поэтому успешные запросы не выполняют дополнительного чтения.
+
+    :param user_id: Идентификатор пользователя.
+    :type user_id: int
+    :param session: Асинхронная сессия SQLAlchemy.
+    :type session: AsyncSession
+    :param versions: Допустимые версии или None — любая версия.
+    :type versions: list[int] | None
+    :raises HTTPException: 412, если пользователь существует.
+    """
+
+    if versions is None:
+        return
+    exists = await session.scalar(select(UsersOrm.id).where(UsersOrm.id == user_id))
+    if exists is not None:
+        raise precondition_failed()
+
+
+async def _update_users(
+    users_data: list[UserBulkUpdate], session: AsyncSession
+) -> dict[int, User]:
+    """
+    Выполнить UPDATE ... FROM (VALUES ...) ... RETURNING для набора пользователей.
+
+    :param users_data: Обновлённые данные пользователей с уникальными ID.
+    :type users_data: list[UserBulkUpdate]
+    :param session: Асинхронная сессия SQLAlchemy.
+    :type session: AsyncSession
+    :return: Снимки обновлённых пользователей по ID.
+    :rtype: dict[int, User]
+    """
+
+    table = UsersOrm.__table__
+    data = values(
+        column("id", Integer),
+        *(column(field, table.c[field].type) for field in _UPDATABLE_FIELDS),
+        name="data",
+    ).data(
+        [
+            (user_data.id, *(getattr(user_data, f) for f in _UPDATABLE_FIELDS))
+            for user_data in users_data
+        ]
+    )
+    query = (
+        update(UsersOrm)
+        .where(UsersOrm.id == data.c.id)
+        .values(
+            {
+                field: func.coalesce(
+                    cast(data.c[field], table.c[field].type), table.c[field]
+                )
+                for field in _UPDATABLE_FIELDS
+            }
+            | {"version": UsersOrm.version + 1}
+        )
+        .returning(UsersOrm)
+        .execution_options(synchronize_session=False)
+    )
+    users = (await session.scalars(query)).all()
+    return {user.id: User.model_validate(user) for user in users}
+
+
+async def _cache_results(result: BulkResult) -> None:
+    """
+    Сохранить в кеш пользователей, успешно созданных или обновлённых пакетом.
+
+    :param result: Итог пакетной операции.
+    :type result: BulkResult
+    """
+
+    _forget_reads(item.id for item in result.items if item.user is not None)
+    for item in result.items:
+        if item.user is not None:
+            await get_users_cache().set(item.user)
+
+
+def _forget_reads(user_ids: Iterable[int]) -> None:
+    """
+    Не присоединять новые чтения к запросам, начатым до изменения данных.
+
+    Сбрасываются запросы изменённых пользователей по ID и все запросы
+    страниц списка, так как изменение может затронуть любую страницу.
+
+    :param user_ids: Идентификаторы изменённых пользователей.
+    :type user_ids: Iterable[int]
+    """
+
+    for user_id in user_ids:
+        get_user_reads().forget(("model", user_id))
+        get_user_reads().forget(("json", user_id))
+    get_page_reads().forget_all()
+
+
+def _page_key(
+    kind: str,
+    session: AsyncSession,
+    users_filter: UsersFilter,
+    after_id: int | None,
+    after_value: int | str | None,
+    limit: int | None,
+) -> tuple:
+    """
+    Построить ключ объединения запросов страницы.
+
+    В ключ входит движок сессии: чтение с реплики может отставать
+    от основной базы данных, и запрос, которому нужна основная база,
+    не должен получить результат чтения с реплики.
+
+    :param kind: Вид результата.
+    :type kind: str
+    :param session: Асинхронная сессия SQLAlchemy.
+    :type session: AsyncSession
+    :param users_filter: Условия отбора и сортировки.
+    :type users_filter: UsersFilter
+    :param after_id: ID, после которого начинается страница.
+    :type after_id: int | None
+    :param after_value: Значение поля сортировки, после которого
+        начинается страница.
+    :type after_value: int | str | None
+    :param limit: Максимальное количество пользователей.
+    :type limit: int | None
+    :return: Хешируемый ключ.
+    :rtype: tuple
+    """
+
+    return (
+        kind,
+        session.bind,
+        _filter_key(users_filter),
+        after_id,
+        after_value,
+        limit,
+    )
+
+
+def _filter_key(users_filter: UsersFilter) -> tuple:
+    """
+    Построить ключ объединения запросов из условий отбора.
+
+    Условия по имени, фамилии и хобби не зависят от регистра,
+    поэтому приводятся к нижнему регистру.
+
+    :param users_filter: Условия отбора и сортировки.
+    :type users_filter: UsersFilter
+    :return: Хешируемый ключ.
+    :rtype: tuple
+    """
+
+    values = users_filter.model_dump()
+    for field in ("name", "surname", "hobbies"):
+        if values[field] is not None:
+            values[field] = values[field].lower()
+    return tuple(
+        (field, tuple(value) if isinstance(value, list) else value)
+        for field, value in values.items()
+    )
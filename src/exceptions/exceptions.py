@@ -1,6 +1,7 @@
 """Модуль содержит функции, которые обрабатывают HTTP исключения."""
 
 from fastapi import HTTPException, status
+from fastapi.exceptions import RequestValidationError
 
 
 def not_found(entity: str) -> HTTPException:
@@ -29,3 +30,90 @@ def bad_request(detail: str = "Bad request") -> HTTPException:
     """
 
     return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def precondition_failed(detail: str = "Precondition failed") -> HTTPException:
+    """
+    Возвращает исключение 412 Precondition Failed.
+
+    :param detail: Описание ошибки (по умолчанию: "Precondition failed").
+    :type detail: str
+    :return: HTTPException с кодом 412 и сообщением об ошибке.
+    :rtype: HTTPException
+    """
+
+    return HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=detail)
+
+
+def too_many_requests(
+    detail: str = "Too many requests", retry_after: int = 1
+) -> HTTPException:
+    """
+    Возвращает исключение 429 Too Many Requests.
+
+    :param detail: Описание ошибки (по умолчанию: "Too many requests").
+    :type detail: str
+    :param retry_after: Через сколько секунд можно повторить запрос.
+    :type retry_after: int
+    :return: HTTPException с кодом 429 и заголовком Retry-After.
+    :rtype: HTTPException
+    """
+
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+def service_unavailable(
+    detail: str = "Service unavailable", retry_after: int = 1
+) -> HTTPException:
+    """
+    Возвращает исключение 503 Service Unavailable.
+
+    :param detail: Описание ошибки (по умолчанию: "Service unavailable").
+    :type detail: str
+    :param retry_after: Через сколько секунд можно повторить запрос.
+    :type retry_after: int
+    :return: HTTPException с кодом 503 и заголовком Retry-After.
+    :rtype: HTTPException
+    """
+
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=detail,
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+def invalid_input(
+    location: tuple[str, ...], error_type: str, message: str, value, **context
+) -> RequestValidationError:
+    """
+    Возвращает исключение 422 Unprocessable Entity в формате ошибок
+    проверки запроса FastAPI.
+
+    :param location: Положение значения в запросе, например ("query", "limit").
+    :type location: tuple[str, ...]
+    :param error_type: Тип ошибки pydantic, например "less_than_equal".
+    :type error_type: str
+    :param message: Описание ошибки.
+    :type message: str
+    :param value: Проверяемое значение.
+    :param context: Параметры проверки, например le=1000.
+    :return: RequestValidationError с одной ошибкой.
+    :rtype: RequestValidationError
+    """
+
+    return RequestValidationError(
+        [
+            {
+                "type": error_type,
+                "loc": location,
+                "msg": message,
+                "input": value,
+                "ctx": context,
+            }
+        ]
+    )
@@ -1,13 +1,173 @@
-"""Этот файл содержит точку входа для запуска приложения с использованием Uvicorn."""
+"""
+Этот файл содержит точку входа для запуска приложения с использованием Uvicorn.
 
+Приложение собирается фабрикой `create_app` по настройкам. Импорт модуля
+не читает настройки и не импортирует маршруты: `src.main:app` создаёт
+приложение при первом обращении, `python -m src.server` вызывает фабрику
+в каждом процессе-обработчике.
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from fastapi import FastAPI
-from src.api.users import router as router_users
+from sqlalchemy.exc import DBAPIError
+from src.cache.users import close_users_cache
+from src.config.config import init_engines, warm_up_engines, dispose_engines
+from src.crud.changes import get_change_feed
+from src.crud.ingest import get_users_ingest
+from src.middleware.compression import CompressionMiddleware
+from src.middleware.concurrency import (
+    ConcurrencyLimitMiddleware,
+    create_concurrency_limits,
+)
+from src.middleware.metrics import MetricsMiddleware
+from src.monitoring.queries import instrument_slow_queries
+from src.monitoring.requests import instrument_engines
+from src.repositories.users import (
+    close_users_repository,
+    get_memory_repository,
+    uses_memory_storage,
+)
+from src.settings.settings import Settings, get_settings
+from src.utils.responses import TimedJSONResponse
+
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Создать движки и прогреть пул соединений при запуске, освободить
+    ресурсы при остановке.
+
+    Процесс считается готовым (`/health/ready`) только после успешного
+    прогрева. Если база данных недоступна, прогрев повторяется в фоне.
+    При остановке очередь создания пользователей записывается в базу
+    данных до закрытия соединений. Хранилище в памяти загружается
+    при запуске и сохраняет снимок при остановке.
+
+    :param app: Приложение FastAPI.
+    :type app: FastAPI
+    """
+
+    settings = get_settings()
+    app.state.ready = False
+    warm_up = None
+    if uses_memory_storage():
+        get_memory_repository()
+        app.state.ready = True
+    else:
+        init_engines()
+        warm_up = asyncio.create_task(_warm_up(app))
+        await asyncio.wait([warm_up], timeout=settings.SERVER_WARMUP_TIMEOUT)
+    if settings.USERS_INGEST_ENABLED:
+        get_users_ingest().start()
+    if settings.USERS_CHANGES_ENABLED:
+        get_change_feed().start()
+    yield
+    app.state.ready = False
+    if warm_up is not None:
+        warm_up.cancel()
+    await get_users_ingest().stop()
+    await get_change_feed().stop()
+    await close_users_repository()
+    await dispose_engines()
+    await close_users_cache()
+
+
+async def _warm_up(app: FastAPI) -> None:
+    """
+    Повторять прогрев пула соединений до успеха и отметить процесс готовым.
+
+    :param app: Приложение FastAPI.
+    :type app: FastAPI
+    """
 
+    while True:
+        try:
+            await warm_up_engines()
+        except (OSError, DBAPIError, TimeoutError) as error:
+            logger.warning("Database warm-up failed: %s", error)
+            await asyncio.sleep(1)
+            continue
+        app.state.ready = True
+        return
 
-app = FastAPI()
-app.include_router(router_users)
+
+def create_app(settings: Settings | None = None) -> FastAPI:
+    """
+    Собрать приложение: middleware по настройкам и маршруты.
+
+    :param settings: Настройки приложения, по умолчанию `get_settings()`.
+    :type settings: Settings | None
+    :return: Приложение FastAPI.
+    :rtype: FastAPI
+    """
+
+    from src.api.service import router as router_service
+    from src.api.users import router as router_users
+
+    settings = settings or get_settings()
+    app = FastAPI(lifespan=lifespan, default_response_class=TimedJSONResponse)
+    app.state.concurrency_limits = {}
+    if settings.COMPRESSION_ENABLED:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+            gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+            brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        )
+    if settings.CONCURRENCY_ENABLED:
+        app.state.concurrency_limits = create_concurrency_limits(settings)
+        app.add_middleware(
+            ConcurrencyLimitMiddleware,
+            limits=app.state.concurrency_limits,
+            # Лента изменений держит соединение открытым и не занимает лимит.
+            exempt_paths=(
+                "/health/live",
+                "/health/ready",
+                "/metrics",
+                "/limits",
+                "/users/changes",
+            ),
+        )
+    # Middleware метрик добавляется последним, чтобы учитывать и отклонённые
+    # запросы.
+    if settings.METRICS_ENABLED:
+        instrument_engines()
+        app.add_middleware(MetricsMiddleware, sample_rate=settings.METRICS_SAMPLE_RATE)
+    if settings.DB_SLOW_QUERY_THRESHOLD:
+        instrument_slow_queries(
+            settings.DB_SLOW_QUERY_THRESHOLD,
+            explain=settings.DB_SLOW_QUERY_EXPLAIN,
+            analyze_interval=settings.DB_SLOW_QUERY_ANALYZE_INTERVAL,
+        )
+    app.include_router(router_users)
+    app.include_router(router_service)
+    app.add_api_route("/", main, methods=["GET"])
+    return app
 
 
-@app.get("/")
 async def main():
     return {"Hello ITK academy!"}
+
+
+@lru_cache(maxsize=1)
+def get_app() -> FastAPI:
+    """
+    Получить приложение процесса, собрав его при первом вызове.
+
+    :return: Приложение FastAPI.
+    :rtype: FastAPI
+    """
+
+    return create_app()
+
+
+def __getattr__(name: str):
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
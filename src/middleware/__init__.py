@@ -0,0 +1 @@
+"""Пакет содержит ASGI middleware приложения."""
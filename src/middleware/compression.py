@@ -0,0 +1,293 @@
+"""
+Модуль содержит сжатие ответов с выбором алгоритма по Accept-Encoding.
+
+Поддерживаются gzip и brotli (если установлен пакет brotli). Сжимаются
+ответы не меньше `minimum_size` байт, а также потоковые ответы,
+размер которых заранее неизвестен. События сервера (`text/event-stream`)
+не сжимаются, чтобы каждое событие доходило до клиента сразу.
+
+Сжатое тело — отдельное представление ресурса, поэтому его ETag получает
+суффикс алгоритма (`"abc-gzip"`). В заголовках If-None-Match и If-Match
+запроса суффикс снимается, и обработчики сравнивают ETag несжатого
+представления.
+"""
+
+import re
+import time
+import zlib
+from collections.abc import Callable
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.monitoring.metrics import (
+    HTTP_COMPRESSION_BYTES,
+    HTTP_COMPRESSION_DURATION,
+    HTTP_COMPRESSION_SAVED,
+)
+from src.utils.etag import variant_etag
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - необязательная зависимость
+    brotli = None
+
+
+def available_encodings() -> tuple[str, ...]:
+    """
+    Получить поддерживаемые алгоритмы сжатия в порядке предпочтения.
+
+    :return: Имена алгоритмов в терминах Content-Encoding.
+    :rtype: tuple[str, ...]
+    """
+
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: str, available: tuple[str, ...]) -> str | None:
+    """
+    Выбрать алгоритм сжатия по заголовку Accept-Encoding.
+
+    Учитываются веса `q`; при равных весах выбирается алгоритм,
+    стоящий раньше в `available`. `*` относится ко всем алгоритмам,
+    не перечисленным явно.
+
+    :param accept_encoding: Значение заголовка Accept-Encoding.
+    :type accept_encoding: str
+    :param available: Поддерживаемые алгоритмы в порядке предпочтения.
+    :type available: tuple[str, ...]
+    :return: Выбранный алгоритм или None, если сжимать нельзя.
+    :rtype: str | None
+    """
+
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip().lower()] = weight
+    best, best_weight = None, 0.0
+    for encoding in available:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+class CompressionMiddleware:
+    """Сжимает тела HTTP-ответов выбранным клиентом алгоритмом."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        excluded_media_types: tuple[str, ...] = ("text/event-stream",),
+    ) -> None:
+        """
+        :param app: ASGI-приложение.
+        :type app: ASGIApp
+        :param minimum_size: Минимальный размер тела в байтах для сжатия.
+        :type minimum_size: int
+        :param gzip_level: Уровень сжатия gzip от 1 до 9.
+        :type gzip_level: int
+        :param brotli_quality: Качество сжатия brotli от 0 до 11.
+        :type brotli_quality: int
+        :param excluded_media_types: Типы содержимого, которые не сжимаются.
+        :type excluded_media_types: tuple[str, ...]
+        """
+
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.excluded_media_types = excluded_media_types
+        self.available = available_encodings()
+        # Суффикс алгоритма в конце ETag: `"abc-gzip"` или `W/"abc-br"`.
+        self._etag_suffix = re.compile(
+            "-(" + "|".join(map(re.escape, self.available)) + ')"'
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        variant_requested = self._strip_etag_variants(scope)
+        accept_encoding = Headers(scope=scope).get("accept-encoding")
+        encoding = (
+            negotiate_encoding(accept_encoding, self.available)
+            if accept_encoding
+            else None
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(self, encoding, send, variant_requested)
+        await self.app(scope, receive, responder.send)
+
+    def _strip_etag_variants(self, scope: Scope) -> bool:
+        """
+        Снять суффикс алгоритма сжатия с ETag в условных заголовках запроса.
+
+        Заголовки заменяются в том же scope, а не в копии: маршрутизатор
+        записывает в scope найденный маршрут, и внешние middleware (метрики)
+        должны его увидеть. Без условных заголовков scope не меняется.
+
+        :param scope: ASGI scope запроса.
+        :type scope: Scope
+        :return: Признак того, что в If-None-Match был ETag сжатого
+            представления.
+        :rtype: bool
+        """
+
+        variant_requested = False
+        rewritten = False
+        headers = []
+        for name, value in scope["headers"]:
+            if name in (b"if-none-match", b"if-match"):
+                stripped, count = self._etag_suffix.subn('"', value.decode("latin-1"))
+                if count:
+                    value = stripped.encode("latin-1")
+                    rewritten = True
+                    variant_requested = variant_requested or name == b"if-none-match"
+            headers.append((name, value))
+        if rewritten:
+            scope["headers"] = headers
+        return variant_requested
+
+    def compressor(
+        self, encoding: str
+    ) -> tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+        """
+        Создать потоковый компрессор.
+
+        :param encoding: Алгоритм сжатия.
+        :type encoding: str
+        :return: Функции сжатия очередной порции и завершения потока.
+        :rtype: tuple[Callable[[bytes], bytes], Callable[[], bytes]]
+        """
+
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            return compressor.process, compressor.finish
+        # wbits=31 — формат gzip с заголовком и контрольной суммой.
+        compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)
+        return compressor.compress, compressor.flush
+
+
+class _CompressionResponder:
+    """Обработчик отправки одного ответа со сжатием тела."""
+
+    def __init__(
+        self,
+        middleware: CompressionMiddleware,
+        encoding: str,
+        send: Send,
+        variant_requested: bool = False,
+    ) -> None:
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.variant_requested = variant_requested
+        self.start: Message | None = None
+        self.compress: Callable[[bytes], bytes] | None = None
+        self.finish: Callable[[], bytes] | None = None
+        self.original = 0
+        self.compressed = 0
+        self.duration = 0.0
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Заголовки отправляются вместе с первой порцией тела,
+            # когда становится ясно, нужно ли сжатие.
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+        if self.start is not None:
+            await self._begin(message)
+            return
+        if self.compress is None:
+            await self._send(message)
+            return
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        data = self._timed(self.compress, body)
+        if not more_body:
+            data += self._timed(self.finish)
+        self.original += len(body)
+        self.compressed += len(data)
+        if data or not more_body:
+            await self._send(
+                {"type": "http.response.body", "body": data, "more_body": more_body}
+            )
+        if not more_body:
+            self._observe()
+
+    async def _begin(self, message: Message) -> None:
+        """
+        Решить, сжимать ли ответ, и отправить заголовки с первой порцией тела.
+
+        :param message: Первое сообщение с телом ответа.
+        :type message: Message
+        """
+
+        start, self.start = self.start, None
+        headers = MutableHeaders(raw=start["headers"])
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        media_type = headers.get("content-type", "").partition(";")[0].strip()
+        if (
+            "content-encoding" in headers
+            or media_type in self.middleware.excluded_media_types
+            or (not more_body and len(body) < self.middleware.minimum_size)
+        ):
+            # 304 подтверждает то представление, ETag которого прислал клиент.
+            if start["status"] == 304 and self.variant_requested and "etag" in headers:
+                headers["ETag"] = variant_etag(headers["etag"], self.encoding)
+                headers.add_vary_header("Accept-Encoding")
+            await self._send(start)
+            await self._send(message)
+            return
+
+        self.compress, self.finish = self.middleware.compressor(self.encoding)
+        data = self._timed(self.compress, body)
+        if not more_body:
+            data += self._timed(self.finish)
+            headers["Content-Length"] = str(len(data))
+        else:
+            del headers["Content-Length"]
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if "etag" in headers:
+            headers["ETag"] = variant_etag(headers["etag"], self.encoding)
+        self.original += len(body)
+        self.compressed += len(data)
+        await self._send(start)
+        await self._send(
+            {"type": "http.response.body", "body": data, "more_body": more_body}
+        )
+        if not more_body:
+            self._observe()
+
+    def _timed(self, func: Callable, *args) -> bytes:
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.duration += time.perf_counter() - start
+
+    def _observe(self) -> None:
+        """Учесть размеры и время сжатия ответа в метриках."""
+
+        labels = (self.encoding,)
+        HTTP_COMPRESSION_BYTES.inc((self.encoding, "original"), self.original)
+        HTTP_COMPRESSION_BYTES.inc((self.encoding, "compressed"), self.compressed)
+        HTTP_COMPRESSION_SAVED.inc(labels, self.original - self.compressed)
+        HTTP_COMPRESSION_DURATION.observe(self.duration, labels)
@@ -0,0 +1,279 @@
+"""
+Модуль содержит адаптивное ограничение количества одновременных запросов.
+
+Запросы на чтение и запись ограничиваются отдельными лимитами. Лимит
+подстраивается по алгоритму AIMD: пока время до начала ответа не
+превышает целевого, лимит растёт примерно на единицу за каждые
+`limit` завершённых запросов, а при превышении или ошибке сервера
+умножается на `backoff`. Запрос сверх лимита ждёт свободного места
+не дольше `queue_timeout` и затем получает 503 с заголовком Retry-After,
+вместо того чтобы ждать соединения из пула вместе с остальными.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.exceptions.exceptions import service_unavailable
+from src.settings.settings import Settings
+
+
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class AdaptiveLimit:
+    """
+    Адаптивный лимит одновременных запросов одного класса.
+
+    Атрибуты:
+        name: Имя класса запросов.
+        limit: Текущий лимит, дробная часть накапливает рост.
+        in_flight: Количество запросов в обработке.
+        accepted: Количество принятых запросов.
+        rejected: Количество отклонённых запросов.
+        latency: Сглаженное время до начала ответа в секундах.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial: int,
+        min_limit: int,
+        max_limit: int,
+        latency_target: float,
+        backoff: float = 0.9,
+        queue_timeout: float = 0.5,
+    ) -> None:
+        """
+        :param name: Имя класса запросов.
+        :type name: str
+        :param initial: Начальный лимит.
+        :type initial: int
+        :param min_limit: Нижняя граница лимита.
+        :type min_limit: int
+        :param max_limit: Верхняя граница лимита.
+        :type max_limit: int
+        :param latency_target: Время до начала ответа в секундах,
+            при превышении которого лимит уменьшается.
+        :type latency_target: float
+        :param backoff: Множитель уменьшения лимита.
+        :type backoff: float
+        :param queue_timeout: Максимальное время ожидания места в секундах.
+        :type queue_timeout: float
+        """
+
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, min_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.latency = 0.0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._next_decrease = 0.0
+
+    @property
+    def queued(self) -> int:
+        """Количество запросов, ожидающих места."""
+
+        return len(self._waiters)
+
+    @property
+    def retry_after(self) -> int:
+        """Рекомендуемая задержка повтора отклонённого запроса в секундах."""
+
+        return max(1, math.ceil(self.queue_timeout))
+
+    async def acquire(self) -> bool:
+        """
+        Занять место для запроса, при необходимости дождавшись его.
+
+        :return: True, если место получено, False, если время ожидания
+            истекло.
+        :rtype: bool
+        """
+
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            self.accepted += 1
+            return True
+        if self.queue_timeout <= 0:
+            self.rejected += 1
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait((waiter,), timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            # Место могло быть выдано одновременно с отменой запроса.
+            if waiter.done() and not waiter.cancelled():
+                self.in_flight -= 1
+                self._wake()
+            raise
+        finally:
+            if not waiter.done():
+                waiter.cancel()
+                self._waiters.remove(waiter)
+        if waiter.cancelled():
+            self.rejected += 1
+            return False
+        self.accepted += 1
+        return True
+
+    def release(self, latency: float, success: bool) -> None:
+        """
+        Освободить место и скорректировать лимит по результату запроса.
+
+        Уменьшение выполняется не чаще раза за `latency_target`, чтобы
+        одна перегрузка не уменьшала лимит многократно.
+
+        :param latency: Время до начала ответа в секундах.
+        :type latency: float
+        :param success: Запрос завершился без ошибки сервера.
+        :type success: bool
+        """
+
+        self.in_flight -= 1
+        self.latency += (latency - self.latency) * 0.1
+        if not success or latency > self.latency_target:
+            now = time.monotonic()
+            if now >= self._next_decrease:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._next_decrease = now + self.latency_target
+        elif (self.in_flight + 1) * 2 >= self.limit:
+            # Лимит растёт, только пока он действительно используется.
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._wake()
+
+    def status(self) -> dict:
+        """
+        Получить текущее состояние лимита.
+
+        :return: Лимит, границы, загрузка и счётчики.
+        :rtype: dict
+        """
+
+        return {
+            "limit": int(self.limit),
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "latency_target": self.latency_target,
+            "latency": round(self.latency, 6),
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+        }
+
+    def _wake(self) -> None:
+        """Выдать освободившиеся места ожидающим запросам по очереди."""
+
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+
+def create_concurrency_limits(settings: Settings) -> dict[str, AdaptiveLimit]:
+    """
+    Создать лимиты запросов на чтение и запись по настройкам приложения.
+
+    :param settings: Настройки приложения.
+    :type settings: Settings
+    :return: Лимиты по классам запросов `read` и `write`.
+    :rtype: dict[str, AdaptiveLimit]
+    """
+
+    common = {
+        "min_limit": settings.CONCURRENCY_MIN_LIMIT,
+        "max_limit": settings.CONCURRENCY_MAX_LIMIT,
+        "backoff": settings.CONCURRENCY_BACKOFF,
+        "queue_timeout": settings.CONCURRENCY_QUEUE_TIMEOUT,
+    }
+    return {
+        "read": AdaptiveLimit(
+            "read",
+            initial=settings.CONCURRENCY_READ_LIMIT,
+            latency_target=settings.CONCURRENCY_READ_LATENCY,
+            **common,
+        ),
+        "write": AdaptiveLimit(
+            "write",
+            initial=settings.CONCURRENCY_WRITE_LIMIT,
+            latency_target=settings.CONCURRENCY_WRITE_LATENCY,
+            **common,
+        ),
+    }
+
+
+class ConcurrencyLimitMiddleware:
+    """
+    Ограничивает количество одновременно обрабатываемых HTTP-запросов.
+
+    Класс запроса определяется методом: GET, HEAD и OPTIONS относятся
+    к чтению, остальные — к записи. Служебные пути `exempt_paths`
+    не ограничиваются, чтобы проверки готовности и метрики оставались
+    доступны под нагрузкой.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limits: dict[str, AdaptiveLimit],
+        exempt_paths: tuple[str, ...] = (),
+    ) -> None:
+        """
+        :param app: ASGI-приложение.
+        :type app: ASGIApp
+        :param limits: Лимиты по классам запросов `read` и `write`.
+        :type limits: dict[str, AdaptiveLimit]
+        :param exempt_paths: Пути, которые не ограничиваются.
+        :type exempt_paths: tuple[str, ...]
+        """
+
+        self.app = app
+        self.limits = limits
+        self.exempt_paths = frozenset(exempt_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.limits["read" if scope["method"] in READ_METHODS else "write"]
+        if not await limit.acquire():
+            error = service_unavailable(
+                detail="Server is overloaded", retry_after=limit.retry_after
+            )
+            response = JSONResponse(
+                {"detail": error.detail},
+                status_code=error.status_code,
+                headers=error.headers,
+            )
+            await response(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        latency = None
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal latency, status_code
+            if message["type"] == "http.response.start":
+                latency = time.perf_counter() - start
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if latency is None:
+                latency = time.perf_counter() - start
+            limit.release(latency, status_code < 500)
@@ -0,0 +1,71 @@
+"""Модуль содержит middleware для сбора метрик HTTP-запросов."""
+
+import random
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.monitoring.metrics import (
+    HTTP_DB_DURATION,
+    HTTP_DB_QUERIES,
+    HTTP_DURATION,
+    HTTP_IN_FLIGHT,
+    HTTP_REQUESTS,
+    HTTP_SERIALIZATION,
+)
+from src.monitoring.requests import RequestMetrics, current_request
+
+
+class MetricsMiddleware:
+    """
+    Собирает метрики HTTP-запросов.
+
+    Счётчик запросов и количество запросов в обработке учитываются всегда.
+    Гистограммы времени обработки, запросов к базе данных и сериализации
+    заполняются только для доли запросов `sample_rate`, чтобы снизить
+    накладные расходы. Маршрут берётся из шаблона пути (`/users/{user_id}`),
+    а не из фактического URL, чтобы число меток оставалось ограниченным.
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float = 1.0) -> None:
+        """
+        :param app: ASGI-приложение.
+        :type app: ASGIApp
+        :param sample_rate: Доля запросов, для которых собираются гистограммы.
+        :type sample_rate: float
+        """
+
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        sampled = self.sample_rate >= 1 or random.random() < self.sample_rate
+        metrics = RequestMetrics() if sampled else None
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc((method,))
+        token = current_request.set(metrics)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            current_request.reset(token)
+            HTTP_IN_FLIGHT.dec((method,))
+            route = scope.get("route")
+            labels = (method, route.path if route is not None else "unmatched")
+            HTTP_REQUESTS.inc((*labels, str(status_code)))
+            if metrics is not None:
+                HTTP_DURATION.observe(duration, labels)
+                HTTP_DB_QUERIES.observe(metrics.db_queries, labels)
+                HTTP_DB_DURATION.observe(metrics.db_duration, labels)
+                HTTP_SERIALIZATION.observe(metrics.serialization, labels)
@@ -8,7 +8,7 @@ from logging.config import fileConfig
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 from alembic import context
-from src.settings.settings import settings
+from src.settings.settings import get_settings
 from src.models.users import Base, UsersOrm  # noqa
 
 
@@ -18,7 +18,7 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 config.set_main_option(
-    "sqlalchemy.url", settings.database_url_asyncpg + "?async_fallback=True"
+    "sqlalchemy.url", get_settings().database_url_asyncpg + "?async_fallback=True"
 )
 
 target_metadata = Base.metadata
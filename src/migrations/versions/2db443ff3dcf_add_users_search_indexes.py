@@ -0,0 +1,94 @@
+"""add users search indexes
+
+Revision ID: 2db443ff3dcf
+Revises: 4b23175cbb48
+Create Date: 2026-10-18 10:12:41.204518
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2db443ff3dcf"
+down_revision: Union[str, Sequence[str], None] = "4b23175cbb48"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Индексы строятся без блокировки записи в таблицу, поэтому вне транзакции.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_users_age_id",
+            "users",
+            ["age", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_users_name_id",
+            "users",
+            ["name", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_users_surname_id",
+            "users",
+            ["surname", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_users_relationship_status_id",
+            "users",
+            ["relationship_status", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_users_name_lower",
+            "users",
+            [sa.text('(lower(name) COLLATE "C")')],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_users_surname_lower",
+            "users",
+            [sa.text('(lower(surname) COLLATE "C")')],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_users_hobbies_trgm",
+            "users",
+            ["hobbies"],
+            postgresql_using="gin",
+            postgresql_ops={"hobbies": "gin_trgm_ops"},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in (
+            "ix_users_hobbies_trgm",
+            "ix_users_surname_lower",
+            "ix_users_name_lower",
+            "ix_users_relationship_status_id",
+            "ix_users_surname_id",
+            "ix_users_name_id",
+            "ix_users_age_id",
+        ):
+            op.drop_index(
+                name, table_name="users", postgresql_concurrently=True, if_exists=True
+            )
@@ -0,0 +1,33 @@
+"""add users version
+
+Revision ID: 5f0c9b7e1a42
+Revises: 2db443ff3dcf
+Create Date: 2026-10-18 12:03:27.518306
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5f0c9b7e1a42"
+down_revision: Union[str, Sequence[str], None] = "2db443ff3dcf"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Столбец с постоянным значением по умолчанию добавляется без перезаписи таблицы.
+    op.add_column(
+        "users",
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "version")
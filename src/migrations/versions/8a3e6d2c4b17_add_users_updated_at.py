@@ -0,0 +1,38 @@
+"""add users updated_at
+
+Revision ID: 8a3e6d2c4b17
+Revises: 5f0c9b7e1a42
+Create Date: 2026-10-18 14:21:09.734125
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8a3e6d2c4b17"
+down_revision: Union[str, Sequence[str], None] = "5f0c9b7e1a42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # now() вычисляется один раз, поэтому столбец добавляется без перезаписи таблицы.
+    op.add_column(
+        "users",
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "updated_at")
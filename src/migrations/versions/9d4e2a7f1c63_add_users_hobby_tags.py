@@ -0,0 +1,166 @@
+"""add users hobby tags
+
+Revision ID: 9d4e2a7f1c63
+Revises: c3d91f5e7a20
+Create Date: 2026-10-18 19:24:05.771930
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9d4e2a7f1c63"
+down_revision: Union[str, Sequence[str], None] = "c3d91f5e7a20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Разбор совпадает с `src.schemas.users.hobby_tags`: теги через запятую,
+# в нижнем регистре, без пустых и повторных, по возрастанию.
+_TAGS_FUNCTION = """
+CREATE FUNCTION users_hobby_tags(hobbies text) RETURNS text[]
+LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE AS $$
+    SELECT coalesce(array_agg(DISTINCT tag ORDER BY tag), '{}')
+    FROM (
+        SELECT btrim(lower(part), ' ') AS tag
+        FROM unnest(string_to_array(hobbies, ',')) AS part
+    ) AS parts
+    WHERE tag <> ''
+$$
+"""
+
+# Счётчики по тегам поддерживаются так же, как `users_stats`: триггерами
+# уровня оператора по таблицам переходов, ключи обновляются по порядку.
+_APPLY_FUNCTION = """
+CREATE FUNCTION users_hobby_stats_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO users_hobby_stats (hobby, count)
+        SELECT hobby, count(*)
+        FROM new_rows, unnest(new_rows.hobby_tags) AS hobby
+        GROUP BY hobby
+        ORDER BY hobby
+        ON CONFLICT (hobby)
+        DO UPDATE SET count = users_hobby_stats.count + EXCLUDED.count;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO users_hobby_stats (hobby, count)
+        SELECT hobby, -count(*)
+        FROM old_rows, unnest(old_rows.hobby_tags) AS hobby
+        GROUP BY hobby
+        ORDER BY hobby
+        ON CONFLICT (hobby)
+        DO UPDATE SET count = users_hobby_stats.count + EXCLUDED.count;
+    ELSE
+        INSERT INTO users_hobby_stats (hobby, count)
+        SELECT hobby, sum(delta)
+        FROM (
+            SELECT hobby, 1 AS delta
+            FROM new_rows, unnest(new_rows.hobby_tags) AS hobby
+            UNION ALL
+            SELECT hobby, -1 AS delta
+            FROM old_rows, unnest(old_rows.hobby_tags) AS hobby
+        ) AS changes
+        GROUP BY hobby
+        HAVING sum(delta) <> 0
+        ORDER BY hobby
+        ON CONFLICT (hobby)
+        DO UPDATE SET count = users_hobby_stats.count + EXCLUDED.count;
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+_TRUNCATE_FUNCTION = """
+CREATE FUNCTION users_hobby_stats_truncate() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    DELETE FROM users_hobby_stats;
+    RETURN NULL;
+END;
+$$
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(_TAGS_FUNCTION)
+    # Вычисляемый столбец заполняется для существующих строк при добавлении
+    # и далее поддерживается базой данных при каждой записи `hobbies`.
+    op.add_column(
+        "users",
+        sa.Column(
+            "hobby_tags",
+            postgresql.ARRAY(sa.Text()),
+            sa.Computed("users_hobby_tags(hobbies)", persisted=True),
+            nullable=False,
+        ),
+    )
+    op.create_table(
+        "users_hobby_stats",
+        sa.Column("hobby", sa.Text(), nullable=False),
+        sa.Column("count", sa.BigInteger(), server_default="0", nullable=False),
+        sa.PrimaryKeyConstraint("hobby"),
+    )
+    op.execute(_APPLY_FUNCTION)
+    op.execute(_TRUNCATE_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER users_hobby_stats_insert AFTER INSERT ON users "
+        "REFERENCING NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION users_hobby_stats_apply()"
+    )
+    op.execute(
+        "CREATE TRIGGER users_hobby_stats_update AFTER UPDATE ON users "
+        "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION users_hobby_stats_apply()"
+    )
+    op.execute(
+        "CREATE TRIGGER users_hobby_stats_delete AFTER DELETE ON users "
+        "REFERENCING OLD TABLE AS old_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION users_hobby_stats_apply()"
+    )
+    op.execute(
+        "CREATE TRIGGER users_hobby_stats_truncate AFTER TRUNCATE ON users "
+        "FOR EACH STATEMENT EXECUTE FUNCTION users_hobby_stats_truncate()"
+    )
+    op.execute(
+        "INSERT INTO users_hobby_stats (hobby, count) "
+        "SELECT hobby, count(*) FROM users, unnest(users.hobby_tags) AS hobby "
+        "GROUP BY hobby"
+    )
+    # Индекс строится без блокировки записи в таблицу, поэтому вне транзакции.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_users_hobby_tags",
+            "users",
+            ["hobby_tags"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_users_hobby_tags",
+            table_name="users",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.execute("DROP TRIGGER users_hobby_stats_truncate ON users")
+    op.execute("DROP TRIGGER users_hobby_stats_delete ON users")
+    op.execute("DROP TRIGGER users_hobby_stats_update ON users")
+    op.execute("DROP TRIGGER users_hobby_stats_insert ON users")
+    op.execute("DROP FUNCTION users_hobby_stats_truncate()")
+    op.execute("DROP FUNCTION users_hobby_stats_apply()")
+    op.drop_table("users_hobby_stats")
+    op.drop_column("users", "hobby_tags")
+    op.execute("DROP FUNCTION users_hobby_tags(text)")
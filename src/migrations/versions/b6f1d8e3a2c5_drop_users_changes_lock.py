@@ -0,0 +1,74 @@
+"""drop users changes lock
+
+Revision ID: b6f1d8e3a2c5
+Revises: e71b5c3a9f08
+Create Date: 2026-10-19 10:42:17.306518
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b6f1d8e3a2c5"
+down_revision: Union[str, Sequence[str], None] = "e71b5c3a9f08"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Номера изменений выдаются без общей блокировки, поэтому транзакции,
+# меняющие пользователей, не ждут друг друга до фиксации. Порядок номеров
+# может не совпадать с порядком фиксации: пока транзакция с меньшим
+# номером не зафиксирована, в журнале виден пропуск. Лента изменений
+# не переходит пропуск, пока по снимку базы данных не станет видно, что
+# все транзакции, которые могли получить пропущенные номера, завершились.
+_APPLY_FUNCTION = """
+CREATE OR REPLACE FUNCTION users_changes_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM FROM old_rows LIMIT 1;
+    ELSE
+        PERFORM FROM new_rows LIMIT 1;
+    END IF;
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+    {lock}IF TG_OP = 'INSERT' THEN
+        INSERT INTO users_changes (operation, user_id, version, data)
+        SELECT 'create', id, version, to_jsonb(changed) - 'hobby_tags'
+        FROM new_rows AS changed
+        ORDER BY id;
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO users_changes (operation, user_id, version, data)
+        SELECT 'update', id, version, to_jsonb(changed) - 'hobby_tags'
+        FROM new_rows AS changed
+        ORDER BY id;
+    ELSE
+        INSERT INTO users_changes (operation, user_id, version)
+        SELECT 'delete', id, version
+        FROM old_rows
+        ORDER BY id;
+    END IF;
+    PERFORM pg_notify(
+        'users_changes',
+        currval(pg_get_serial_sequence('users_changes', 'seq'))::text
+    );
+    RETURN NULL;
+END;
+$$
+"""
+
+_LOCK = "PERFORM pg_advisory_xact_lock(hashtext('users_changes'));\n    "
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(_APPLY_FUNCTION.format(lock=""))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(_APPLY_FUNCTION.format(lock=_LOCK))
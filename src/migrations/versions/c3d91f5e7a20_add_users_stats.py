@@ -0,0 +1,128 @@
+"""add users stats
+
+Revision ID: c3d91f5e7a20
+Revises: 8a3e6d2c4b17
+Create Date: 2026-10-18 16:02:47.318204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c3d91f5e7a20"
+down_revision: Union[str, Sequence[str], None] = "8a3e6d2c4b17"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Триггеры уровня оператора получают все изменённые строки в таблицах
+# переходов, поэтому пакетные INSERT и COPY обновляют счётчики одним
+# запросом. Ключи обновляются в одном порядке, чтобы параллельные
+# транзакции не блокировали друг друга взаимно.
+_APPLY_FUNCTION = """
+CREATE FUNCTION users_stats_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO users_stats (relationship_status, age, count)
+        SELECT relationship_status, age, count(*)
+        FROM new_rows
+        GROUP BY relationship_status, age
+        ORDER BY relationship_status, age
+        ON CONFLICT (relationship_status, age)
+        DO UPDATE SET count = users_stats.count + EXCLUDED.count;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO users_stats (relationship_status, age, count)
+        SELECT relationship_status, age, -count(*)
+        FROM old_rows
+        GROUP BY relationship_status, age
+        ORDER BY relationship_status, age
+        ON CONFLICT (relationship_status, age)
+        DO UPDATE SET count = users_stats.count + EXCLUDED.count;
+    ELSE
+        INSERT INTO users_stats (relationship_status, age, count)
+        SELECT relationship_status, age, sum(delta)
+        FROM (
+            SELECT relationship_status, age, 1 AS delta FROM new_rows
+            UNION ALL
+            SELECT relationship_status, age, -1 AS delta FROM old_rows
+        ) AS changes
+        GROUP BY relationship_status, age
+        HAVING sum(delta) <> 0
+        ORDER BY relationship_status, age
+        ON CONFLICT (relationship_status, age)
+        DO UPDATE SET count = users_stats.count + EXCLUDED.count;
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+_TRUNCATE_FUNCTION = """
+CREATE FUNCTION users_stats_truncate() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    DELETE FROM users_stats;
+    RETURN NULL;
+END;
+$$
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "users_stats",
+        sa.Column(
+            "relationship_status",
+            postgresql.ENUM(name="relationshipstatus", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("age", sa.Integer(), nullable=False),
+        sa.Column("count", sa.BigInteger(), server_default="0", nullable=False),
+        sa.PrimaryKeyConstraint("relationship_status", "age"),
+    )
+    op.execute(_APPLY_FUNCTION)
+    op.execute(_TRUNCATE_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER users_stats_insert AFTER INSERT ON users "
+        "REFERENCING NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION users_stats_apply()"
+    )
+    op.execute(
+        "CREATE TRIGGER users_stats_update AFTER UPDATE ON users "
+        "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION users_stats_apply()"
+    )
+    op.execute(
+        "CREATE TRIGGER users_stats_delete AFTER DELETE ON users "
+        "REFERENCING OLD TABLE AS old_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION users_stats_apply()"
+    )
+    op.execute(
+        "CREATE TRIGGER users_stats_truncate AFTER TRUNCATE ON users "
+        "FOR EACH STATEMENT EXECUTE FUNCTION users_stats_truncate()"
+    )
+    # Триггеры уже созданы в этой транзакции и держат блокировку таблицы,
+    # поэтому начальное заполнение не пропускает параллельные изменения.
+    op.execute(
+        "INSERT INTO users_stats (relationship_status, age, count) "
+        "SELECT relationship_status, age, count(*) FROM users "
+        "GROUP BY relationship_status, age"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER users_stats_truncate ON users")
+    op.execute("DROP TRIGGER users_stats_delete ON users")
+    op.execute("DROP TRIGGER users_stats_update ON users")
+    op.execute("DROP TRIGGER users_stats_insert ON users")
+    op.execute("DROP FUNCTION users_stats_truncate()")
+    op.execute("DROP FUNCTION users_stats_apply()")
+    op.drop_table("users_stats")
@@ -0,0 +1,117 @@
+"""add users changes
+
+Revision ID: e71b5c3a9f08
+Revises: 9d4e2a7f1c63
+Create Date: 2026-10-18 21:07:52.418336
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e71b5c3a9f08"
+down_revision: Union[str, Sequence[str], None] = "9d4e2a7f1c63"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Номера изменений выдаются под транзакционной блокировкой, которая
+# держится до фиксации, поэтому порядок номеров совпадает с порядком
+# фиксации транзакций: читатель, видящий номер N, видит и все меньшие.
+# Уведомление отправляется одно на оператор и доставляется при фиксации,
+# поэтому пакетные INSERT и COPY не порождают уведомление на строку.
+_APPLY_FUNCTION = """
+CREATE FUNCTION users_changes_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM FROM old_rows LIMIT 1;
+    ELSE
+        PERFORM FROM new_rows LIMIT 1;
+    END IF;
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+    PERFORM pg_advisory_xact_lock(hashtext('users_changes'));
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO users_changes (operation, user_id, version, data)
+        SELECT 'create', id, version, to_jsonb(changed) - 'hobby_tags'
+        FROM new_rows AS changed
+        ORDER BY id;
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO users_changes (operation, user_id, version, data)
+        SELECT 'update', id, version, to_jsonb(changed) - 'hobby_tags'
+        FROM new_rows AS changed
+        ORDER BY id;
+    ELSE
+        INSERT INTO users_changes (operation, user_id, version)
+        SELECT 'delete', id, version
+        FROM old_rows
+        ORDER BY id;
+    END IF;
+    PERFORM pg_notify(
+        'users_changes',
+        currval(pg_get_serial_sequence('users_changes', 'seq'))::text
+    );
+    RETURN NULL;
+END;
+$$
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "users_changes",
+        sa.Column("seq", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("operation", sa.String(length=6), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("data", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column(
+            "changed_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("seq"),
+    )
+    # Журнал только дописывается, поэтому время изменения растёт вместе
+    # с номером и компактного BRIN индекса достаточно для очистки.
+    op.create_index(
+        "ix_users_changes_changed_at",
+        "users_changes",
+        ["changed_at"],
+        postgresql_using="brin",
+    )
+    op.execute(_APPLY_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER users_changes_insert AFTER INSERT ON users "
+        "REFERENCING NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION users_changes_apply()"
+    )
+    op.execute(
+        "CREATE TRIGGER users_changes_update AFTER UPDATE ON users "
+        "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION users_changes_apply()"
+    )
+    op.execute(
+        "CREATE TRIGGER users_changes_delete AFTER DELETE ON users "
+        "REFERENCING OLD TABLE AS old_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION users_changes_apply()"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER users_changes_delete ON users")
+    op.execute("DROP TRIGGER users_changes_update ON users")
+    op.execute("DROP TRIGGER users_changes_insert ON users")
+    op.execute("DROP FUNCTION users_changes_apply()")
+    op.drop_index("ix_users_changes_changed_at", table_name="users_changes")
+    op.drop_table("users_changes")
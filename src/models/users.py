@@ -1,6 +1,9 @@
 """Модуль содержит модель SQLAlchemy для работы с пользователями."""
 
-from sqlalchemy import Integer, String, CheckConstraint, Enum
+from datetime import datetime
+from sqlalchemy import BigInteger, Integer, String, CheckConstraint, DateTime, Enum
+from sqlalchemy import Computed, Index, Text, func
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import mapped_column, DeclarativeBase, Mapped
 from src.schemas.users import RelationshipStatus
 
@@ -20,8 +23,12 @@ class UsersOrm(Base):
         name: Имя пользователя.
         surname: Фамилия пользователя.
         age: Возраст пользователя.
-        hobbies: Хобби пользователя.
+        hobbies: Хобби пользователя через запятую.
+        hobby_tags: Теги хобби, вычисляются базой данных из `hobbies`
+        функцией `users_hobby_tags`.
         relationship_status: Семейное положение пользователя.
+        updated_at: Время последнего изменения записи.
+        version: Версия записи, увеличивается при каждом изменении.
     """
 
     __tablename__ = "users"
@@ -31,6 +38,105 @@ class UsersOrm(Base):
     surname: Mapped[str] = mapped_column(String(15))
     age: Mapped[int] = mapped_column(Integer, CheckConstraint("age < 100"))
     hobbies: Mapped[str] = mapped_column(String(100))
+    # Столбец нужен только для отбора, поэтому не загружается вместе с моделью.
+    hobby_tags: Mapped[list[str]] = mapped_column(
+        ARRAY(Text),
+        Computed("users_hobby_tags(hobbies)", persisted=True),
+        deferred=True,
+    )
     relationship_status: Mapped[RelationshipStatus] = mapped_column(
         Enum(RelationshipStatus, values_callable=lambda x: [e.value for e in x])
     )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+    version: Mapped[int] = mapped_column(Integer, server_default="1")
+
+
+class UsersStatsOrm(Base):
+    """
+    Модель счётчика пользователей с одинаковыми возрастом и семейным положением.
+
+    Таблица поддерживается триггерами на таблице `users`, поэтому
+    её размер ограничен числом сочетаний возраста и семейного положения
+    и не зависит от количества пользователей.
+
+    Атрибуты:
+        relationship_status: Семейное положение.
+        age: Возраст.
+        count: Количество пользователей.
+    """
+
+    __tablename__ = "users_stats"
+
+    relationship_status: Mapped[RelationshipStatus] = mapped_column(
+        Enum(RelationshipStatus, values_callable=lambda x: [e.value for e in x]),
+        primary_key=True,
+    )
+    age: Mapped[int] = mapped_column(Integer, primary_key=True)
+    count: Mapped[int] = mapped_column(BigInteger, server_default="0")
+
+
+class UsersHobbyStatsOrm(Base):
+    """
+    Модель счётчика пользователей с одним тегом хобби.
+
+    Таблица поддерживается триггерами на таблице `users`, как и
+    `users_stats`, поэтому количество по хобби не требует подсчёта
+    строк пользователей.
+
+    Атрибуты:
+        hobby: Тег хобби.
+        count: Количество пользователей.
+    """
+
+    __tablename__ = "users_hobby_stats"
+
+    hobby: Mapped[str] = mapped_column(Text, primary_key=True)
+    count: Mapped[int] = mapped_column(BigInteger, server_default="0")
+
+
+class UsersChangeOrm(Base):
+    """
+    Модель записи журнала изменений пользователей.
+
+    Журнал заполняется триггерами на таблице `users`. Номера растут, но
+    выдаются без блокировки, поэтому изменение с меньшим номером может
+    появиться в журнале позже, а номера отменённых транзакций остаются
+    пропусками.
+
+    Атрибуты:
+        seq: Номер изменения.
+        operation: Операция: create, update или delete.
+        user_id: ID пользователя.
+        version: Версия записи после изменения, для удаления — удалённая.
+        data: Пользователь после изменения, для удаления — None.
+        changed_at: Время изменения.
+    """
+
+    __tablename__ = "users_changes"
+
+    seq: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    operation: Mapped[str] = mapped_column(String(6))
+    user_id: Mapped[int] = mapped_column(Integer)
+    version: Mapped[int] = mapped_column(Integer)
+    data: Mapped[dict | None] = mapped_column(JSONB)
+    changed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+
+Index("ix_users_age_id", UsersOrm.age, UsersOrm.id)
+Index("ix_users_name_id", UsersOrm.name, UsersOrm.id)
+Index("ix_users_surname_id", UsersOrm.surname, UsersOrm.id)
+Index("ix_users_relationship_status_id", UsersOrm.relationship_status, UsersOrm.id)
+Index("ix_users_name_lower", func.lower(UsersOrm.name).collate("C"))
+Index("ix_users_surname_lower", func.lower(UsersOrm.surname).collate("C"))
+Index(
+    "ix_users_hobbies_trgm",
+    UsersOrm.hobbies,
+    postgresql_using="gin",
+    postgresql_ops={"hobbies": "gin_trgm_ops"},
+)
+Index("ix_users_hobby_tags", UsersOrm.hobby_tags, postgresql_using="gin")
+Index("ix_users_changes_changed_at", UsersChangeOrm.changed_at, postgresql_using="brin")
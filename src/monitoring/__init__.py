@@ -0,0 +1 @@
+"""Пакет содержит средства наблюдения за работой сервиса."""
@@ -0,0 +1,88 @@
+"""Модуль содержит гистограмму с фиксированными границами интервалов."""
+
+from bisect import bisect_left
+
+
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class Histogram:
+    """
+    Гистограмма наблюдаемых значений, например длительностей в секундах.
+
+    Хранит количество значений в каждом интервале, общее количество
+    и сумму, что достаточно для расчёта среднего и квантилей по интервалам.
+    """
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        """
+        :param buckets: Верхние границы интервалов по возрастанию.
+        :type buckets: tuple[float, ...]
+        """
+
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """
+        Учесть значение.
+
+        :param value: Наблюдаемое значение.
+        :type value: float
+        """
+
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """
+        Получить накопленные количества по верхним границам интервалов.
+
+        :return: Пары (верхняя граница, количество значений не больше неё),
+            последняя граница равна бесконечности.
+        :rtype: list[tuple[float, int]]
+        """
+
+        total = 0
+        result = []
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def snapshot(self) -> dict:
+        """
+        Получить состояние гистограммы в виде словаря.
+
+        :return: Количество, сумма и накопленные количества по границам.
+        :rtype: dict
+        """
+
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": {
+                "+Inf" if bound == float("inf") else str(bound): count
+                for bound, count in self.cumulative()
+            },
+        }
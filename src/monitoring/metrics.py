@@ -0,0 +1,449 @@
+"""
+Модуль содержит метрики в формате Prometheus и их реестр.
+
+Метрики хранятся в памяти процесса. При запуске нескольких
+процессов-обработчиков каждый отдаёт собственные значения.
+"""
+
+from src.monitoring.histogram import DEFAULT_BUCKETS, Histogram
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Базовый класс метрики с набором меток."""
+
+    type: str = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames=()) -> None:
+        """
+        :param name: Имя метрики.
+        :type name: str
+        :param documentation: Описание метрики.
+        :type documentation: str
+        :param labelnames: Имена меток.
+        :type labelnames: tuple[str, ...]
+        """
+
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def render(self) -> list[str]:
+        """
+        Сформировать строки метрики в текстовом формате Prometheus.
+
+        :return: Строки описания, типа и значений.
+        :rtype: list[str]
+        """
+
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        for labels, value in self.values.items():
+            lines.append(
+                f"{self.name}{_format_labels(self.labelnames, labels)} "
+                f"{_format_value(value)}"
+            )
+        return lines
+
+
+class Counter(Metric):
+    """Монотонно возрастающий счётчик."""
+
+    type = "counter"
+
+    def inc(self, labels: tuple[str, ...] = (), amount: float = 1) -> None:
+        """
+        Увеличить счётчик.
+
+        :param labels: Значения меток.
+        :type labels: tuple[str, ...]
+        :param amount: Величина увеличения.
+        :type amount: float
+        """
+
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def set(self, value: float, labels: tuple[str, ...] = ()) -> None:
+        """
+        Установить значение счётчика, накапливаемого вне реестра.
+
+        :param value: Текущее значение.
+        :type value: float
+        :param labels: Значения меток.
+        :type labels: tuple[str, ...]
+        """
+
+        self.values[labels] = value
+
+
+class Gauge(Metric):
+    """Значение, которое может как расти, так и уменьшаться."""
+
+    type = "gauge"
+
+    def inc(self, labels: tuple[str, ...] = (), amount: float = 1) -> None:
+        """
+        Увеличить значение.
+
+        :param labels: Значения меток.
+        :type labels: tuple[str, ...]
+        :param amount: Величина увеличения.
+        :type amount: float
+        """
+
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, labels: tuple[str, ...] = (), amount: float = 1) -> None:
+        """
+        Уменьшить значение.
+
+        :param labels: Значения меток.
+        :type labels: tuple[str, ...]
+        :param amount: Величина уменьшения.
+        :type amount: float
+        """
+
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+    def set(self, value: float, labels: tuple[str, ...] = ()) -> None:
+        """
+        Установить значение.
+
+        :param value: Новое значение.
+        :type value: float
+        :param labels: Значения меток.
+        :type labels: tuple[str, ...]
+        """
+
+        self.values[labels] = value
+
+
+class HistogramMetric(Metric):
+    """Гистограмма с метками."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames=(),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        """
+        :param name: Имя метрики.
+        :type name: str
+        :param documentation: Описание метрики.
+        :type documentation: str
+        :param labelnames: Имена меток.
+        :type labelnames: tuple[str, ...]
+        :param buckets: Верхние границы интервалов.
+        :type buckets: tuple[float, ...]
+        """
+
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        self.histograms: dict[tuple[str, ...], Histogram] = {}
+
+    def observe(self, value: float, labels: tuple[str, ...] = ()) -> None:
+        """
+        Учесть значение.
+
+        :param value: Наблюдаемое значение.
+        :type value: float
+        :param labels: Значения меток.
+        :type labels: tuple[str, ...]
+        """
+
+        histogram = self.histograms.get(labels)
+        if histogram is None:
+            histogram = self.histograms[labels] = Histogram(self.buckets)
+        histogram.observe(value)
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        names = (*self.labelnames, "le")
+        for labels, histogram in self.histograms.items():
+            for bound, count in histogram.cumulative():
+                formatted = _format_labels(names, (*labels, _format_value(bound)))
+                lines.append(f"{self.name}_bucket{formatted} {count}")
+            formatted = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{formatted} {_format_value(histogram.sum)}")
+            lines.append(f"{self.name}_count{formatted} {histogram.count}")
+        return lines
+
+
+class Registry:
+    """Реестр метрик, отдаваемых эндпоинтом `/metrics`."""
+
+    def __init__(self) -> None:
+        self.metrics: list[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        """
+        Добавить метрику в реестр.
+
+        :param metric: Метрика.
+        :type metric: Metric
+        :return: Та же метрика.
+        :rtype: Metric
+        """
+
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        Сформировать текст всех метрик в формате Prometheus.
+
+        :return: Текст в формате `text/plain; version=0.0.4`.
+        :rtype: str
+        """
+
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.register(
+    Counter(
+        "http_requests_total",
+        "Количество обработанных HTTP-запросов.",
+        ("method", "route", "status"),
+    )
+)
+HTTP_IN_FLIGHT = registry.register(
+    Gauge(
+        "http_requests_in_flight",
+        "Количество HTTP-запросов, обрабатываемых в данный момент.",
+        ("method",),
+    )
+)
+HTTP_DURATION = registry.register(
+    HistogramMetric(
+        "http_request_duration_seconds",
+        "Время обработки HTTP-запроса.",
+        ("method", "route"),
+    )
+)
+HTTP_DB_QUERIES = registry.register(
+    HistogramMetric(
+        "http_request_db_queries",
+        "Количество запросов к базе данных за один HTTP-запрос.",
+        ("method", "route"),
+        buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+    )
+)
+HTTP_DB_DURATION = registry.register(
+    HistogramMetric(
+        "http_request_db_duration_seconds",
+        "Суммарное время запросов к базе данных за один HTTP-запрос.",
+        ("method", "route"),
+    )
+)
+HTTP_SERIALIZATION = registry.register(
+    HistogramMetric(
+        "http_response_serialization_seconds",
+        "Время сериализации тела ответа.",
+        ("method", "route"),
+    )
+)
+DB_QUERY_DURATION = registry.register(
+    HistogramMetric(
+        "db_query_duration_seconds",
+        "Время выполнения одного запроса к базе данных.",
+    )
+)
+DB_SLOW_QUERIES = registry.register(
+    Counter(
+        "db_slow_queries_total",
+        "Количество запросов к базе данных дольше порога журнала медленных запросов.",
+    )
+)
+DB_POOL_CONNECTIONS = registry.register(
+    Gauge(
+        "db_pool_connections",
+        "Соединения пула по состоянию.",
+        ("pool", "state"),
+    )
+)
+DB_POOL_WAITS = registry.register(
+    Counter(
+        "db_pool_waits_total",
+        "Количество ожиданий свободного соединения пула.",
+        ("pool",),
+    )
+)
+DB_POOL_TIMEOUTS = registry.register(
+    Counter(
+        "db_pool_timeouts_total",
+        "Количество превышений времени ожидания соединения пула.",
+        ("pool",),
+    )
+)
+CACHE_REQUESTS = registry.register(
+    Counter(
+        "cache_requests_total",
+        "Количество обращений к кешу пользователей.",
+        ("backend", "result"),
+    )
+)
+CACHE_EVICTIONS = registry.register(
+    Counter(
+        "cache_evictions_total",
+        "Количество вытеснений из кеша пользователей.",
+        ("backend",),
+    )
+)
+CACHE_ERRORS = registry.register(
+    Counter(
+        "cache_errors_total",
+        "Количество ошибок обращения к кешу пользователей.",
+        ("backend",),
+    )
+)
+USERS_INGEST_QUEUE = registry.register(
+    Gauge(
+        "users_ingest_queue_size",
+        "Количество пользователей в очереди на пакетное создание.",
+    )
+)
+USERS_INGEST_REJECTED = registry.register(
+    Counter(
+        "users_ingest_rejected_total",
+        "Количество запросов, отклонённых из-за заполненной очереди.",
+    )
+)
+USERS_INGEST_BATCH = registry.register(
+    HistogramMetric(
+        "users_ingest_batch_size",
+        "Количество пользователей в одном пакетном INSERT.",
+        buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+    )
+)
+USERS_INGEST_FLUSH = registry.register(
+    HistogramMetric(
+        "users_ingest_flush_duration_seconds",
+        "Время записи одного пакета в базу данных.",
+    )
+)
+USERS_CHANGES_SUBSCRIBERS = registry.register(
+    Gauge(
+        "users_changes_subscribers",
+        "Количество подписчиков ленты изменений пользователей в процессе.",
+    )
+)
+USERS_CHANGES_PUBLISHED = registry.register(
+    Counter(
+        "users_changes_published_total",
+        "Количество изменений, разосланных подписчикам ленты.",
+    )
+)
+USERS_CHANGES_DROPPED = registry.register(
+    Counter(
+        "users_changes_dropped_total",
+        "Количество подписчиков, отключённых из-за переполнения очереди.",
+    )
+)
+USERS_CHANGES_SKIPPED = registry.register(
+    Counter(
+        "users_changes_skipped_total",
+        "Количество номеров изменений, пропущенных лентой по истечении "
+        "USERS_CHANGES_GAP_TIMEOUT.",
+    )
+)
+USERS_CHANGES_GAP = registry.register(
+    Gauge(
+        "users_changes_gap_seconds",
+        "Сколько секунд лента изменений ждёт пропущенный номер, 0 — не ждёт.",
+    )
+)
+CONCURRENCY_LIMIT = registry.register(
+    Gauge(
+        "http_concurrency_limit",
+        "Текущий адаптивный лимит одновременных запросов.",
+        ("class",),
+    )
+)
+CONCURRENCY_IN_FLIGHT = registry.register(
+    Gauge(
+        "http_concurrency_in_flight",
+        "Количество запросов, занимающих место в лимите.",
+        ("class",),
+    )
+)
+CONCURRENCY_QUEUED = registry.register(
+    Gauge(
+        "http_concurrency_queued",
+        "Количество запросов, ожидающих места в лимите.",
+        ("class",),
+    )
+)
+CONCURRENCY_REJECTED = registry.register(
+    Counter(
+        "http_concurrency_rejected_total",
+        "Количество запросов, отклонённых с кодом 503 из-за лимита.",
+        ("class",),
+    )
+)
+SINGLEFLIGHT_REQUESTS = registry.register(
+    Counter(
+        "singleflight_requests_total",
+        "Количество чтений: выполненных самостоятельно (executed) "
+        "и получивших результат одновременного такого же запроса (shared).",
+        ("flight", "result"),
+    )
+)
+SINGLEFLIGHT_RATIO = registry.register(
+    Gauge(
+        "singleflight_coalesce_ratio",
+        "Доля чтений, обслуженных результатом одновременного такого же запроса.",
+        ("flight",),
+    )
+)
+HTTP_COMPRESSION_BYTES = registry.register(
+    Counter(
+        "http_compression_bytes_total",
+        "Размер сжатых ответов до (original) и после (compressed) сжатия.",
+        ("encoding", "stage"),
+    )
+)
+HTTP_COMPRESSION_SAVED = registry.register(
+    Counter(
+        "http_compression_saved_bytes_total",
+        "Количество байтов, сэкономленных сжатием ответов.",
+        ("encoding",),
+    )
+)
+HTTP_COMPRESSION_DURATION = registry.register(
+    HistogramMetric(
+        "http_compression_duration_seconds",
+        "Время сжатия тела одного ответа.",
+        ("encoding",),
+    )
+)
@@ -0,0 +1,180 @@
+"""
+Модуль содержит журнал медленных запросов к базе данных.
+
+Обработчики событий SQLAlchemy измеряют время каждого запроса и пишут
+в журнал запросы дольше порога вместе с параметрами. Для медленных
+SELECT можно дополнительно получить план `EXPLAIN`, который не выполняет
+запрос. Не чаще заданного интервала вместо него выполняется
+`EXPLAIN (ANALYZE, BUFFERS)`: запрос, уже оказавшийся медленным,
+выполняется повторно, и без ограничения это удваивало бы нагрузку
+именно тогда, когда база данных перегружена.
+
+План получается на том же соединении внутри точки сохранения, которая
+затем откатывается, поэтому ни ошибка при получении плана, ни побочные
+действия повторного выполнения не остаются в транзакции.
+"""
+
+import logging
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from src.monitoring.metrics import DB_SLOW_QUERIES
+
+
+logger = logging.getLogger(__name__)
+
+# Ограничение длины параметров в журнале: пакетные запросы передают
+# тысячи значений.
+MAX_PARAMETERS_LENGTH = 1000
+
+
+class SlowQueryLog:
+    """Запись в журнал запросов, выполнявшихся дольше порога."""
+
+    def __init__(
+        self, threshold: float, explain: bool = False, analyze_interval: float = 0.0
+    ) -> None:
+        """
+        :param threshold: Порог времени выполнения запроса в секундах.
+        :type threshold: float
+        :param explain: Добавлять к медленным SELECT план выполнения.
+        :type explain: bool
+        :param analyze_interval: Не чаще чем раз в столько секунд получать
+            план с выполнением запроса, 0 — не выполнять.
+        :type analyze_interval: float
+        """
+
+        self.threshold = threshold
+        self.explain = explain
+        self.analyze_interval = analyze_interval
+        self._analyzed_at: float | None = None
+
+    def before_cursor_execute(
+        self, conn, cursor, statement, parameters, context, many
+    ) -> None:
+        conn.info["slow_query_start"] = time.perf_counter()
+
+    def after_cursor_execute(
+        self, conn, cursor, statement, parameters, context, many
+    ) -> None:
+        start = conn.info.pop("slow_query_start", None)
+        if start is None:
+            return
+        duration = time.perf_counter() - start
+        if duration < self.threshold:
+            return
+        DB_SLOW_QUERIES.inc()
+        message = "Slow query (%.3fs): %s\nParameters: %s"
+        args = [duration, statement, _truncate(repr(parameters))]
+        if self.explain and not many and _is_select(statement):
+            analyze = self._may_analyze()
+            message += "\nPlan (analyze):\n%s" if analyze else "\nPlan:\n%s"
+            args.append(_explain(conn, statement, parameters, analyze))
+        logger.warning(message, *args)
+
+    def _may_analyze(self) -> bool:
+        """
+        Проверить, можно ли сейчас выполнить запрос повторно для плана,
+        и отметить выполнение.
+
+        :return: True, если с прошлого выполнения прошло не меньше
+            `analyze_interval` секунд.
+        :rtype: bool
+        """
+
+        if not self.analyze_interval:
+            return False
+        now = time.monotonic()
+        if (
+            self._analyzed_at is not None
+            and now - self._analyzed_at < self.analyze_interval
+        ):
+            return False
+        self._analyzed_at = now
+        return True
+
+
+def _is_select(statement: str) -> bool:
+    """
+    Проверить, что запрос только читает данные и его можно выполнить повторно.
+
+    :param statement: Текст запроса.
+    :type statement: str
+    :return: True для SELECT.
+    :rtype: bool
+    """
+
+    return statement.lstrip()[:6].upper() == "SELECT"
+
+
+def _explain(conn, statement: str, parameters, analyze: bool = False) -> str:
+    """
+    Получить план запроса на соединении `conn`.
+
+    Используется отдельный курсор DBAPI, чтобы не затронуть результат
+    исходного запроса и не вызвать обработчики событий повторно.
+
+    :param conn: Соединение SQLAlchemy.
+    :param statement: Текст запроса.
+    :type statement: str
+    :param parameters: Параметры запроса в формате драйвера.
+    :param analyze: Выполнить запрос: `EXPLAIN (ANALYZE, BUFFERS)`
+        вместо `EXPLAIN`.
+    :type analyze: bool
+    :return: План выполнения или описание ошибки.
+    :rtype: str
+    """
+
+    explain = "EXPLAIN (ANALYZE, BUFFERS)" if analyze else "EXPLAIN"
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(f"{explain} {statement}", parameters)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        finally:
+            cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+    except Exception as error:
+        return f"unavailable: {error}"
+    finally:
+        cursor.close()
+    return plan
+
+
+def _truncate(value: str) -> str:
+    if len(value) <= MAX_PARAMETERS_LENGTH:
+        return value
+    return value[:MAX_PARAMETERS_LENGTH] + "..."
+
+
+def instrument_slow_queries(
+    threshold: float, explain: bool = False, analyze_interval: float = 0.0
+) -> None:
+    """
+    Подписать журнал медленных запросов на выполнение запросов всеми
+    движками SQLAlchemy. Повторный вызов заменяет прежние настройки.
+
+    :param threshold: Порог времени выполнения запроса в секундах.
+    :type threshold: float
+    :param explain: Добавлять к медленным SELECT план выполнения.
+    :type explain: bool
+    :param analyze_interval: Не чаще чем раз в столько секунд получать
+        план с выполнением запроса, 0 — не выполнять.
+    :type analyze_interval: float
+    """
+
+    global _slow_query_log
+    if _slow_query_log is not None:
+        event.remove(
+            Engine, "before_cursor_execute", _slow_query_log.before_cursor_execute
+        )
+        event.remove(
+            Engine, "after_cursor_execute", _slow_query_log.after_cursor_execute
+        )
+    _slow_query_log = SlowQueryLog(threshold, explain, analyze_interval)
+    event.listen(Engine, "before_cursor_execute", _slow_query_log.before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _slow_query_log.after_cursor_execute)
+
+
+_slow_query_log: SlowQueryLog | None = None
@@ -0,0 +1,88 @@
+"""
+Модуль содержит сбор показателей отдельного HTTP-запроса.
+
+Показатели текущего запроса хранятся в контекстной переменной:
+её устанавливает middleware метрик, а обработчики событий SQLAlchemy
+и сериализация ответа дополняют. Если запрос не попал в выборку,
+переменная пуста и сбор пропускается.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from collections.abc import Iterator
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from src.monitoring.metrics import DB_QUERY_DURATION
+
+
+class RequestMetrics:
+    """
+    Показатели одного HTTP-запроса.
+
+    Атрибуты:
+        db_queries: Количество запросов к базе данных.
+        db_duration: Суммарное время запросов к базе данных в секундах.
+        serialization: Время сериализации ответа в секундах.
+    """
+
+    __slots__ = ("db_queries", "db_duration", "serialization")
+
+    def __init__(self) -> None:
+        self.db_queries = 0
+        self.db_duration = 0.0
+        self.serialization = 0.0
+
+
+current_request: ContextVar[RequestMetrics | None] = ContextVar(
+    "current_request", default=None
+)
+
+
+@contextmanager
+def serialization_timer() -> Iterator[None]:
+    """
+    Учесть время выполнения блока как время сериализации ответа.
+
+    :return: Контекстный менеджер.
+    :rtype: Iterator[None]
+    """
+
+    metrics = current_request.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serialization += time.perf_counter() - start
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    if current_request.get() is not None:
+        conn.info["query_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    metrics = current_request.get()
+    start = conn.info.pop("query_start", None)
+    if metrics is None or start is None:
+        return
+    duration = time.perf_counter() - start
+    metrics.db_queries += 1
+    metrics.db_duration += duration
+    DB_QUERY_DURATION.observe(duration)
+
+
+def instrument_engines() -> None:
+    """
+    Подписаться на выполнение запросов всеми движками SQLAlchemy.
+
+    Время запросов учитывается только для HTTP-запросов, попавших
+    в выборку метрик. Повторный вызов ничего не меняет.
+    """
+
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
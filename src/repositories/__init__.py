@@ -0,0 +1 @@
+"""Пакет содержит хранилища пользователей: базу данных и память процесса."""
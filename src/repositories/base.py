@@ -0,0 +1,385 @@
+"""
+Модуль содержит интерфейс хранилища пользователей.
+
+Эндпоинты работают с пользователями только через этот интерфейс,
+поэтому хранилище выбирается настройкой `STORAGE_BACKEND` без изменения
+остального кода.
+"""
+
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
+from datetime import datetime
+from typing import Any
+from src.schemas.users import (
+    BulkResult,
+    ImportResult,
+    TransferFormat,
+    User,
+    UserBulkUpdate,
+    UserChange,
+    UserCreate,
+    UsersFilter,
+    UsersHobbies,
+    UsersStats,
+    UserUpdate,
+)
+from src.utils.etag import PageValidators
+from src.utils.transfer import Record
+
+
+class UsersRepository(ABC):
+    """
+    Базовый класс хранилища пользователей.
+
+    Страницы списка строятся по keyset-позиции (`after_value`, `after_id`)
+    в порядке сортировки `UsersFilter.sort`. Ошибки данных и конфликты
+    версий сообщаются исключениями `HTTPException` с кодами 400 и 412.
+    """
+
+    name: str = "base"
+
+    @abstractmethod
+    async def get_users(
+        self,
+        users_filter: UsersFilter | None = None,
+        after_id: int | None = None,
+        after_value: int | str | None = None,
+        limit: int | None = None,
+    ) -> Sequence[Any]:
+        """
+        Получить страницу пользователей с отбором и сортировкой.
+
+        :param users_filter: Условия отбора и сортировки.
+        :type users_filter: UsersFilter | None
+        :param after_id: ID, после которого начинается страница.
+        :type after_id: int | None
+        :param after_value: Значение поля сортировки, после которого
+            начинается страница.
+        :type after_value: int | str | None
+        :param limit: Максимальное количество пользователей.
+        :type limit: int | None
+        :return: Пользователи с атрибутами схемы `User`.
+        :rtype: Sequence[Any]
+        """
+
+    @abstractmethod
+    async def get_users_rows(
+        self,
+        users_filter: UsersFilter | None = None,
+        after_id: int | None = None,
+        after_value: int | str | None = None,
+        limit: int | None = None,
+    ) -> Sequence[Sequence[Any]]:
+        """
+        Получить страницу пользователей в виде строк.
+
+        Условия те же, что в `get_users`. Значения строки идут в порядке
+        `USER_FIELDS` и доступны также как атрибуты.
+
+        :return: Строки пользователей.
+        :rtype: Sequence[Sequence[Any]]
+        """
+
+    @abstractmethod
+    async def get_users_validators(
+        self,
+        users_filter: UsersFilter | None = None,
+        after_id: int | None = None,
+        after_value: int | str | None = None,
+        limit: int | None = None,
+    ) -> PageValidators:
+        """
+        Получить агрегаты страницы для условного запроса.
+
+        Условия те же, что в `get_users`.
+
+        :return: Агрегаты страницы.
+        :rtype: PageValidators
+        """
+
+    @abstractmethod
+    def stream_users(
+        self,
+        users_filter: UsersFilter | None = None,
+        after_id: int | None = None,
+        after_value: int | str | None = None,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[Sequence[Any]]:
+        """
+        Потоково получить всех подходящих пользователей порциями.
+
+        :param chunk_size: Количество пользователей в одной порции.
+        :type chunk_size: int
+        :return: Асинхронный итератор порций пользователей.
+        :rtype: AsyncIterator[Sequence[Any]]
+        """
+
+    @abstractmethod
+    async def export_users(
+        self,
+        users_filter: UsersFilter,
+        data_format: TransferFormat,
+        output: Callable[[bytes], Awaitable[None]],
+    ) -> int:
+        """
+        Выгрузить подходящих пользователей в CSV с заголовком или NDJSON.
+
+        :param users_filter: Условия отбора и сортировки.
+        :type users_filter: UsersFilter
+        :param data_format: Формат выгрузки.
+        :type data_format: TransferFormat
+        :param output: Асинхронная функция, принимающая порции данных.
+        :type output: Callable[[bytes], Awaitable[None]]
+        :return: Количество выгруженных строк.
+        :rtype: int
+        """
+
+    @abstractmethod
+    async def import_users(
+        self,
+        records: AsyncIterator[Record],
+        chunk_size: int = 5000,
+        max_errors: int = 100,
+    ) -> ImportResult:
+        """
+        Загрузить пользователей из разобранных записей.
+
+        :param records: Записи с номерами строк.
+        :type records: AsyncIterator[Record]
+        :param chunk_size: Количество записей в одной порции записи.
+        :type chunk_size: int
+        :param max_errors: Сколько отклонённых записей описать в отчёте.
+        :type max_errors: int
+        :return: Итог импорта.
+        :rtype: ImportResult
+        """
+
+    @abstractmethod
+    async def get_user(self, user_id: int) -> User | None:
+        """
+        Получить пользователя по ID.
+
+        :param user_id: Идентификатор пользователя.
+        :type user_id: int
+        :return: Пользователь или None, если не найден.
+        :rtype: User | None
+        """
+
+    @abstractmethod
+    async def get_user_json(self, user_id: int) -> str | None:
+        """
+        Получить готовое JSON-представление пользователя по ID.
+
+        :param user_id: Идентификатор пользователя.
+        :type user_id: int
+        :return: JSON пользователя или None, если не найден.
+        :rtype: str | None
+        """
+
+    @abstractmethod
+    async def get_users_by_ids(self, user_ids: Sequence[int]) -> dict[int, User]:
+        """
+        Получить пользователей по списку ID.
+
+        :param user_ids: Идентификаторы пользователей.
+        :type user_ids: Sequence[int]
+        :return: Найденные пользователи по ID.
+        :rtype: dict[int, User]
+        """
+
+    @abstractmethod
+    async def get_stats(self, bucket_size: int = 10) -> UsersStats:
+        """
+        Получить сводную статистику пользователей.
+
+        :param bucket_size: Ширина интервала гистограммы возрастов.
+        :type bucket_size: int
+        :return: Статистика пользователей.
+        :rtype: UsersStats
+        """
+
+    @abstractmethod
+    async def get_hobbies(
+        self, hobbies: list[str] | None = None, limit: int = 20
+    ) -> UsersHobbies:
+        """
+        Получить количество пользователей по тегам хобби.
+
+        :param hobbies: Теги, для которых нужно количество. None — самые
+            частые теги.
+        :type hobbies: list[str] | None
+        :param limit: Сколько самых частых тегов вернуть без `hobbies`.
+        :type limit: int
+        :return: Количество пользователей по тегам.
+        :rtype: UsersHobbies
+        """
+
+    @abstractmethod
+    async def rebuild_stats(self) -> int | None:
+        """
+        Пересчитать счётчики статистики по всем пользователям.
+
+        :return: Количество учтённых пользователей или None, если пересчёт
+            уже выполняется.
+        :rtype: int | None
+        """
+
+    @abstractmethod
+    async def get_changes(self, after_seq: int, limit: int = 500) -> list[UserChange]:
+        """
+        Получить изменения пользователей после номера по возрастанию номеров.
+
+        :param after_seq: Номер, после которого начинается выборка.
+        :type after_seq: int
+        :param limit: Максимальное количество изменений.
+        :type limit: int
+        :return: Изменения пользователей.
+        :rtype: list[UserChange]
+        """
+
+    @abstractmethod
+    async def get_changes_snapshot(
+        self, after_seq: int, limit: int = 500
+    ) -> tuple[list[UserChange], int, int]:
+        """
+        Получить изменения после номера вместе с границами снимка,
+        по которым лента решает, можно ли перейти пропуск в номерах.
+
+        :param after_seq: Номер, после которого начинается выборка.
+        :type after_seq: int
+        :param limit: Максимальное количество изменений.
+        :type limit: int
+        :return: Изменения пользователей, `xmin` и `xmax` снимка,
+            (0, 0) — если пропусков в номерах не бывает.
+        :rtype: tuple[list[UserChange], int, int]
+        """
+
+    @abstractmethod
+    async def get_changes_range(self) -> tuple[int, int]:
+        """
+        Получить первый и последний сохранённый номер изменения.
+
+        :return: Первый и последний номер, (0, 0) без изменений.
+        :rtype: tuple[int, int]
+        """
+
+    @abstractmethod
+    async def prune_changes(self, before: datetime) -> int:
+        """
+        Удалить изменения старше заданного времени.
+
+        :param before: Изменения раньше этого времени удаляются.
+        :type before: datetime
+        :return: Количество удалённых изменений.
+        :rtype: int
+        """
+
+    @abstractmethod
+    async def create_user(self, user_data: UserCreate) -> Any:
+        """
+        Создать нового пользователя.
+
+        :param user_data: Данные нового пользователя.
+        :type user_data: UserCreate
+        :return: Созданный пользователь с атрибутами схемы `User`.
+        :rtype: Any
+        """
+
+    @abstractmethod
+    async def update_user(
+        self,
+        user_id: int,
+        user_data: UserUpdate,
+        versions: list[int] | None = None,
+    ) -> User | None:
+        """
+        Обновить пользователя. Поля со значением None не изменяются.
+
+        :param user_id: Идентификатор пользователя.
+        :type user_id: int
+        :param user_data: Обновлённые данные пользователя.
+        :type user_data: UserUpdate
+        :param versions: Допустимые текущие версии записи из If-Match.
+        :type versions: list[int] | None
+        :return: Обновлённый пользователь или None, если не найден.
+        :rtype: User | None
+        """
+
+    @abstractmethod
+    async def patch_user(
+        self,
+        user_id: int,
+        user_data: UserUpdate,
+        versions: list[int] | None = None,
+    ) -> User | None:
+        """
+        Частично обновить пользователя: изменяются только переданные поля.
+
+        :param user_id: Идентификатор пользователя.
+        :type user_id: int
+        :param user_data: Изменяемые поля пользователя.
+        :type user_data: UserUpdate
+        :param versions: Допустимые текущие версии записи из If-Match.
+        :type versions: list[int] | None
+        :return: Обновлённый пользователь или None, если не найден.
+        :rtype: User | None
+        """
+
+    @abstractmethod
+    async def delete_user(
+        self, user_id: int, versions: list[int] | None = None
+    ) -> bool:
+        """
+        Удалить пользователя.
+
+        :param user_id: Идентификатор пользователя.
+        :type user_id: int
+        :param versions: Допустимые текущие версии записи из If-Match.
+        :type versions: list[int] | None
+        :return: True, если пользователь удалён, иначе False.
+        :rtype: bool
+        """
+
+    @abstractmethod
+    async def create_users(self, users_data: list[UserCreate]) -> BulkResult:
+        """
+        Создать пользователей пакетом.
+
+        :param users_data: Данные новых пользователей.
+        :type users_data: list[UserCreate]
+        :return: Результат по каждому элементу.
+        :rtype: BulkResult
+        """
+
+    @abstractmethod
+    async def update_users(self, users_data: list[UserBulkUpdate]) -> BulkResult:
+        """
+        Обновить пользователей пакетом. Поля со значением None не изменяются.
+
+        :param users_data: Обновлённые данные пользователей вместе с ID.
+        :type users_data: list[UserBulkUpdate]
+        :return: Результат по каждому элементу.
+        :rtype: BulkResult
+        """
+
+    @abstractmethod
+    async def delete_users(self, user_ids: list[int]) -> BulkResult:
+        """
+        Удалить пользователей пакетом.
+
+        :param user_ids: Идентификаторы удаляемых пользователей.
+        :type user_ids: list[int]
+        :return: Результат по каждому элементу.
+        :rtype: BulkResult
+        """
+
+    async def connect(self) -> None:
+        """
+        Получить соединение с хранилищем до первого запроса.
+
+        Ошибка здесь означает, что ни один запрос ещё не отправлен,
+        поэтому операцию можно безопасно повторить.
+        """
+
+    async def close(self) -> None:
+        """Освободить ресурсы хранилища."""
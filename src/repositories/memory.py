@@ -0,0 +1,940 @@
+"""
+Модуль содержит хранилище пользователей в памяти процесса.
+
+Запись пользователя — неизменяемый кортеж `UserRow`: изменение заменяет
+запись целиком, поэтому уже полученная читателем строка не меняется.
+Чтение и изменение выполняются синхронно, без точек переключения цикла
+событий, поэтому блокировки не нужны: читатель никогда не видит частично
+применённое изменение, а страницы строятся по keyset-позиции и не
+зависят от изменений между запросами.
+
+Индексы:
+
+- `_ids` — массив всех ID по возрастанию, страницы в порядке ID;
+- `_by_age`, `_by_status` — массивы ID по возрасту и семейному положению;
+- `_by_hobby` — массивы ID по тегу хобби, они же дают количество по хобби;
+- `_by_name`, `_by_surname` — отсортированные пары (значение, ID).
+
+Последние изменения хранятся в ограниченной очереди `_changes` для ленты
+изменений, о каждом изменении сообщается через `on_change`.
+
+Если задан путь к файлу, каждое изменение дописывается в журнал NDJSON.
+При запуске журнал воспроизводится и сжимается до снимка текущих записей,
+при остановке снимок записывается ещё раз.
+"""
+
+import bisect
+import csv
+import heapq
+import io
+import json
+import logging
+import os
+import time
+from array import array
+from collections import Counter, deque, namedtuple
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable, Iterator
+from collections.abc import Sequence
+from datetime import UTC, datetime
+from itertools import islice
+from typing import TextIO
+from pydantic import ValidationError
+from src.exceptions.exceptions import bad_request, precondition_failed
+from src.repositories.base import UsersRepository
+from src.schemas.users import (
+    BulkItemResult,
+    BulkResult,
+    ChangeOperation,
+    HobbyMatch,
+    ImportRejection,
+    ImportResult,
+    RelationshipStatus,
+    TransferFormat,
+    User,
+    UserBulkUpdate,
+    UserChange,
+    UserCreate,
+    UsersFilter,
+    UsersHobbies,
+    UsersStats,
+    UserUpdate,
+    hobby_tags,
+)
+from src.utils.etag import PageValidators
+from src.utils.serializers import USER_FIELDS, encode_user_row, format_datetime
+from src.utils.transfer import Record, validation_message
+
+
+logger = logging.getLogger(__name__)
+
+UserRow = namedtuple("UserRow", USER_FIELDS)
+UserRow.__doc__ = "Запись пользователя: значения полей схемы `User` по порядку."
+
+_EMPTY = array("q")
+
+
+class MemoryUsersRepository(UsersRepository):
+    """
+    Хранилище пользователей в памяти процесса с вторичными индексами.
+
+    Один экземпляр разделяется всеми запросами процесса. При нескольких
+    процессах-обработчиках у каждого свои данные, поэтому хранилище
+    предназначено для тестов, разработки и запуска в одном процессе.
+    """
+
+    name = "memory"
+
+    def __init__(self, path: str | None = None, changes_size: int = 10000) -> None:
+        """
+        :param path: Файл журнала изменений. None — без сохранения на диск.
+        :type path: str | None
+        :param changes_size: Сколько последних изменений хранить для ленты.
+        :type changes_size: int
+        """
+
+        self.path = path
+        self._rows: dict[int, UserRow] = {}
+        self._ids = array("q")
+        self._by_age: dict[int, array] = {}
+        self._by_status: dict[RelationshipStatus, array] = {}
+        self._by_hobby: dict[str, array] = {}
+        self._by_name: list[tuple[str, int]] = []
+        self._by_surname: list[tuple[str, int]] = []
+        self._counts: Counter[tuple[RelationshipStatus, int]] = Counter()
+        self._next_id = 1
+        self._changes: deque[UserChange] = deque(maxlen=changes_size)
+        self._change_seq = 0
+        self._journal: TextIO | None = None
+        # Вызывается после каждого изменения, например чтобы разбудить ленту.
+        self.on_change: Callable[[], None] | None = None
+        if path is not None:
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    async def get_users(
+        self,
+        users_filter: UsersFilter | None = None,
+        after_id: int | None = None,
+        after_value: int | str | None = None,
+        limit: int | None = None,
+    ) -> list[UserRow]:
+        return self._page(users_filter or UsersFilter(), after_id, after_value, limit)
+
+    async def get_users_rows(
+        self,
+        users_filter: UsersFilter | None = None,
+        after_id: int | None = None,
+        after_value: int | str | None = None,
+        limit: int | None = None,
+    ) -> list[UserRow]:
+        return self._page(users_filter or UsersFilter(), after_id, after_value, limit)
+
+    async def get_users_validators(
+        self,
+        users_filter: UsersFilter | None = None,
+        after_id: int | None = None,
+        after_value: int | str | None = None,
+        limit: int | None = None,
+    ) -> PageValidators:
+        rows = self._page(users_filter or UsersFilter(), after_id, after_value, limit)
+        return PageValidators.from_rows(rows)
+
+    async def stream_users(
+        self,
+        users_filter: UsersFilter | None = None,
+        after_id: int | None = None,
+        after_value: int | str | None = None,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[list[UserRow]]:
+        users_filter = users_filter or UsersFilter()
+        field = users_filter.sort.field
+        while True:
+            rows = self._page(users_filter, after_id, after_value, chunk_size)
+            if rows:
+                yield rows
+            if len(rows) < chunk_size:
+                return
+            after_id, after_value = rows[-1].id, getattr(rows[-1], field)
+
+    async def export_users(
+        self,
+        users_filter: UsersFilter,
+        data_format: TransferFormat,
+        output: Callable[[bytes], Awaitable[None]],
+    ) -> int:
+        exported = 0
+        if data_format == TransferFormat.CSV:
+            await output((",".join(USER_FIELDS) + "\n").encode())
+        async for rows in self.stream_users(users_filter):
+            if data_format == TransferFormat.CSV:
+                buffer = io.StringIO()
+                csv.writer(buffer, lineterminator="\n").writerows(
+                    [
+                        format_datetime(value) if isinstance(value, datetime) else value
+                        for value in row
+                    ]
+                    for row in rows
+                )
+                data = buffer.getvalue()
+            else:
+                data = "".join(encode_user_row(row) + "\n" for row in rows)
+            await output(data.encode())
+            exported += len(rows)
+        return exported
+
+    async def import_users(
+        self,
+        records: AsyncIterator[Record],
+        chunk_size: int = 5000,
+        max_errors: int = 100,
+    ) -> ImportResult:
+        # Записи добавляются одним изменением после проверки всех записей,
+        # как в одной транзакции, поэтому `chunk_size` не используется.
+        start = time.perf_counter()
+        received = rejected = 0
+        errors = []
+        users = []
+        async for line, record, error in records:
+            received += 1
+            if error is None:
+                try:
+                    users.append(UserCreate.model_validate(record))
+                    continue
+                except ValidationError as validation_error:
+                    error = validation_message(validation_error)
+            rejected += 1
+            if len(errors) < max_errors:
+                errors.append(ImportRejection(line=line, error=error))
+        now = datetime.now(UTC)
+        self._write([self._new_row(user_data, now) for user_data in users])
+        seconds = time.perf_counter() - start
+        return ImportResult(
+            received=received,
+            imported=len(users),
+            rejected=rejected,
+            seconds=round(seconds, 3),
+            rows_per_second=round(len(users) / seconds, 1) if seconds else 0.0,
+            errors=errors,
+        )
+
+    async def get_user(self, user_id: int) -> User | None:
+        row = self._rows.get(user_id)
+        return None if row is None else _user(row)
+
+    async def get_user_json(self, user_id: int) -> str | None:
+        row = self._rows.get(user_id)
+        return None if row is None else encode_user_row(row)
+
+    async def get_users_by_ids(self, user_ids: Sequence[int]) -> dict[int, User]:
+        rows = self._rows
+        return {
+            user_id: _user(rows[user_id])
+            for user_id in set(user_ids)
+            if user_id in rows
+        }
+
+    async def get_stats(self, bucket_size: int = 10) -> UsersStats:
+        return UsersStats.from_counts(
+            (
+                (relationship_status, age, count)
+                for (relationship_status, age), count in self._counts.items()
+                if count > 0
+            ),
+            bucket_size,
+        )
+
+    async def get_hobbies(
+        self, hobbies: list[str] | None = None, limit: int = 20
+    ) -> UsersHobbies:
+        if hobbies:
+            return UsersHobbies.from_counts(
+                (hobby, len(self._by_hobby.get(hobby, _EMPTY))) for hobby in hobbies
+            )
+        counts = sorted(
+            ((hobby, len(ids)) for hobby, ids in self._by_hobby.items() if ids),
+            key=lambda item: (-item[1], item[0]),
+        )
+        return UsersHobbies.from_counts(counts[:limit])
+
+    async def rebuild_stats(self) -> int:
+        self._counts = Counter(
+            (row.relationship_status, row.age) for row in self._rows.values()
+        )
+        return len(self._rows)
+
+    async def get_changes(self, after_seq: int, limit: int = 500) -> list[UserChange]:
+        changes = self._changes
+        if not changes:
+            return []
+        # Номера в очереди идут подряд, поэтому позиция вычисляется по номеру.
+        start = max(after_seq - changes[0].seq + 1, 0)
+        return list(islice(changes, start, start + limit))
+
+    async def get_changes_snapshot(
+        self, after_seq: int, limit: int = 500
+    ) -> tuple[list[UserChange], int, int]:
+        # Номера выдаются по порядку в одном процессе, пропусков не бывает.
+        return await self.get_changes(after_seq, limit), 0, 0
+
+    async def get_changes_range(self) -> tuple[int, int]:
+        if not self._changes:
+            return 0, 0
+        return self._changes[0].seq, self._changes[-1].seq
+
+    async def prune_changes(self, before: datetime) -> int:
+        # Размер очереди изменений ограничен `changes_size`.
+        return 0
+
+    async def create_user(self, user_data: UserCreate) -> User:
+        row = self._new_row(user_data, datetime.now(UTC))
+        self._write([row])
+        return _user(row)
+
+    async def update_user(
+        self,
+        user_id: int,
+        user_data: UserUpdate,
+        versions: list[int] | None = None,
+    ) -> User | None:
+        data = user_data.model_dump(exclude_none=True)
+        return self._update(user_id, data, versions)
+
+    async def patch_user(
+        self,
+        user_id: int,
+        user_data: UserUpdate,
+        versions: list[int] | None = None,
+    ) -> User | None:
+        data = user_data.model_dump(exclude_unset=True)
+        return self._update(user_id, data, versions)
+
+    async def delete_user(
+        self, user_id: int, versions: list[int] | None = None
+    ) -> bool:
+        row = self._rows.get(user_id)
+        if row is None:
+            return False
+        if versions is not None and row.version not in versions:
+            raise precondition_failed()
+        self._delete([user_id])
+        return True
+
+    async def create_users(self, users_data: list[UserCreate]) -> BulkResult:
+        now = datetime.now(UTC)
+        rows = [self._new_row(user_data, now) for user_data in users_data]
+        self._write(rows)
+        return BulkResult.from_items(
+            BulkItemResult(index=index, id=row.id, success=True, user=_user(row))
+            for index, row in enumerate(rows)
+        )
+
+    async def update_users(self, users_data: list[UserBulkUpdate]) -> BulkResult:
+        now = datetime.now(UTC)
+        items = []
+        rows = {}
+        seen = set()
+        for index, user_data in enumerate(users_data):
+            user_id = user_data.id
+            row = self._rows.get(user_id)
+            if user_id in seen:
+                error = "Duplicate id"
+            elif row is None:
+                error = "User not found"
+            else:
+                data = user_data.model_dump(exclude_none=True, exclude={"id"})
+                row = rows[user_id] = row._replace(
+                    **data, updated_at=now, version=row.version + 1
+                )
+                error = None
+            seen.add(user_id)
+            items.append(
+                BulkItemResult(
+                    index=index,
+                    id=user_id,
+                    success=error is None,
+                    error=error,
+                    user=None if error else _user(row),
+                )
+            )
+        self._write(list(rows.values()))
+        return BulkResult.from_items(items)
+
+    async def delete_users(self, user_ids: list[int]) -> BulkResult:
+        deleted = [
+            user_id for user_id in dict.fromkeys(user_ids) if user_id in self._rows
+        ]
+        self._delete(deleted)
+        deleted = set(deleted)
+        items = []
+        seen = set()
+        for index, user_id in enumerate(user_ids):
+            if user_id in seen:
+                error = "Duplicate id"
+            elif user_id not in deleted:
+                error = "User not found"
+            else:
+                error = None
+            seen.add(user_id)
+            items.append(
+                BulkItemResult(
+                    index=index, id=user_id, success=error is None, error=error
+                )
+            )
+        return BulkResult.from_items(items)
+
+    async def close(self) -> None:
+        if self._journal is not None:
+            self.snapshot()
+            self._journal.close()
+            self._journal = None
+
+    def snapshot(self) -> None:
+        """
+        Заменить журнал снимком текущих записей.
+
+        Снимок записывается во временный файл и атомарно подменяет журнал,
+        поэтому сбой во время записи не портит сохранённые данные.
+        """
+
+        if self.path is None:
+            return
+        if self._journal is not None:
+            self._journal.close()
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(_entry("seq", self._next_id))
+            for row in self._rows.values():
+                file.write(_entry("put", row))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+        self._journal = open(self.path, "a", encoding="utf-8")
+
+    def _page(
+        self,
+        users_filter: UsersFilter,
+        after_id: int | None,
+        after_value: int | str | None,
+        limit: int | None,
+    ) -> list[UserRow]:
+        """
+        Выбрать страницу пользователей по индексу, подходящему к условиям.
+
+        :param users_filter: Условия отбора и сортировки.
+        :type users_filter: UsersFilter
+        :param after_id: ID, после которого начинается страница.
+        :type after_id: int | None
+        :param after_value: Значение поля сортировки, после которого
+            начинается страница.
+        :type after_value: int | str | None
+        :param limit: Максимальное количество пользователей.
+        :type limit: int | None
+        :return: Записи пользователей.
+        :rtype: list[UserRow]
+        """
+
+        rows = self._rows
+        matches = _predicate(users_filter)
+        page = []
+        for user_id in self._candidates(users_filter, after_id, after_value):
+            row = rows[user_id]
+            if matches(row):
+                page.append(row)
+                if limit is not None and len(page) >= limit:
+                    break
+        return page
+
+    def _candidates(
+        self,
+        users_filter: UsersFilter,
+        after_id: int | None,
+        after_value: int | str | None,
+    ) -> Iterator[int]:
+        """
+        Перебрать ID после позиции в порядке сортировки.
+
+        При сортировке по ID используется самый узкий из индексов по
+        семейному положению, возрасту и хобби, иначе — индекс поля
+        сортировки.
+        Остальные условия проверяет `_predicate`.
+
+        :param users_filter: Условия отбора и сортировки.
+        :type users_filter: UsersFilter
+        :param after_id: ID, после которого начинается выборка.
+        :type after_id: int | None
+        :param after_value: Значение поля сортировки, после которого
+            начинается выборка.
+        :type after_value: int | str | None
+        :return: Итератор ID.
+        :rtype: Iterator[int]
+        """
+
+        sort = users_filter.sort
+        descending = sort.descending
+        if sort.field == "age":
+            return self._scan_ages(users_filter, after_id, after_value, descending)
+        if sort.field in ("name", "surname"):
+            index = self._by_name if sort.field == "name" else self._by_surname
+            position = None if after_id is None else (after_value, after_id)
+            return (user_id for _, user_id in _scan(index, position, descending))
+
+        candidates = [self._ids]
+        if users_filter.relationship_status is not None:
+            candidates.append(
+                self._by_status.get(users_filter.relationship_status, _EMPTY)
+            )
+        ages = self._ages(users_filter)
+        if len(ages) < len(self._by_age):
+            candidates.append([self._by_age[age] for age in ages])
+        if users_filter.hobby:
+            hobbies = [
+                self._by_hobby.get(hobby, _EMPTY) for hobby in users_filter.hobby
+            ]
+            if users_filter.hobby_match == HobbyMatch.ALL:
+                candidates.append(min(hobbies, key=len))
+            else:
+                candidates.append(hobbies)
+        best = min(
+            candidates,
+            key=lambda ids: sum(map(len, ids)) if isinstance(ids, list) else len(ids),
+        )
+        if not isinstance(best, list):
+            return _scan(best, after_id, descending)
+        # У пользователя может быть несколько подходящих хобби,
+        # поэтому повторы после слияния отбрасываются.
+        return _unique(
+            heapq.merge(
+                *(_scan(ids, after_id, descending) for ids in best),
+                reverse=descending,
+            )
+        )
+
+    def _scan_ages(
+        self,
+        users_filter: UsersFilter,
+        after_id: int | None,
+        after_value: int | None,
+        descending: bool,
+    ) -> Iterator[int]:
+        """
+        Перебрать ID в порядке (возраст, ID) по индексу возрастов.
+
+        :param users_filter: Условия отбора и сортировки.
+        :type users_filter: UsersFilter
+        :param after_id: ID, после которого начинается выборка.
+        :type after_id: int | None
+        :param after_value: Возраст, после которого начинается выборка.
+        :type after_value: int | None
+        :param descending: Перебирать по убыванию.
+        :type descending: bool
+        :return: Итератор ID.
+        :rtype: Iterator[int]
+        """
+
+        ages = self._ages(users_filter)
+        if descending:
+            ages.reverse()
+        for age in ages:
+            position = None
+            if after_id is not None:
+                if age == after_value:
+                    position = after_id
+                elif (age < after_value) != descending:
+                    continue
+            yield from _scan(self._by_age[age], position, descending)
+
+    def _ages(self, users_filter: UsersFilter) -> list[int]:
+        """
+        Получить возрасты из индекса, подходящие под условия, по возрастанию.
+
+        :param users_filter: Условия отбора.
+        :type users_filter: UsersFilter
+        :return: Возрасты.
+        :rtype: list[int]
+        """
+
+        low, high = users_filter.age_min, users_filter.age_max
+        return sorted(
+            age
+            for age in self._by_age
+            if (low is None or age >= low) and (high is None or age <= high)
+        )
+
+    def _new_row(self, user_data: UserCreate, now: datetime) -> UserRow:
+        """
+        Сформировать запись нового пользователя со следующим ID.
+
+        :param user_data: Данные нового пользователя.
+        :type user_data: UserCreate
+        :param now: Время создания.
+        :type now: datetime
+        :return: Запись пользователя.
+        :rtype: UserRow
+        """
+
+        user_id = self._next_id
+        self._next_id += 1
+        return UserRow(**user_data.model_dump(), id=user_id, updated_at=now, version=1)
+
+    def _update(
+        self, user_id: int, data: dict, versions: list[int] | None
+    ) -> User | None:
+        """
+        Изменить поля пользователя и увеличить версию записи.
+
+        :param user_id: Идентификатор пользователя.
+        :type user_id: int
+        :param data: Изменяемые поля.
+        :type data: dict
+        :param versions: Допустимые текущие версии или None — любая версия.
+        :type versions: list[int] | None
+        :raises HTTPException: 400, если обязательному полю передан null,
+            412 при несовпадении версии.
+        :return: Обновлённый пользователь или None, если не найден.
+        :rtype: User | None
+        """
+
+        row = self._rows.get(user_id)
+        if row is None:
+            return None
+        if versions is not None and row.version not in versions:
+            raise precondition_failed()
+        if not data:
+            return _user(row)
+        if None in data.values():
+            raise bad_request()
+        row = row._replace(
+            **data, updated_at=datetime.now(UTC), version=row.version + 1
+        )
+        self._write([row])
+        return _user(row)
+
+    def _write(self, rows: list[UserRow]) -> None:
+        """
+        Сохранить записи в индексах и журнале.
+
+        :param rows: Новые или изменённые записи.
+        :type rows: list[UserRow]
+        """
+
+        now = datetime.now(UTC)
+        for row in rows:
+            if row.id in self._rows:
+                operation = ChangeOperation.UPDATE
+            else:
+                operation = ChangeOperation.CREATE
+            self._store(row)
+            self._record(operation, row.id, row.version, _user(row), now)
+        self._log(_entry("put", row) for row in rows)
+        self._changed()
+
+    def _delete(self, user_ids: list[int]) -> None:
+        """
+        Удалить записи из индексов и записать удаление в журнал.
+
+        :param user_ids: Идентификаторы существующих пользователей.
+        :type user_ids: list[int]
+        """
+
+        now = datetime.now(UTC)
+        for user_id in user_ids:
+            version = self._rows[user_id].version
+            self._unstore(user_id)
+            self._record(ChangeOperation.DELETE, user_id, version, None, now)
+        self._log(_entry("del", user_id) for user_id in user_ids)
+        self._changed()
+
+    def _store(self, row: UserRow) -> None:
+        """
+        Добавить или заменить запись, обновив только затронутые индексы.
+
+        :param row: Запись пользователя.
+        :type row: UserRow
+        """
+
+        old = self._rows.get(row.id)
+        self._rows[row.id] = row
+        if old is None:
+            _insert(self._ids, row.id)
+            self._next_id = max(self._next_id, row.id + 1)
+        if old is None or old.age != row.age:
+            if old is not None:
+                _remove(self._by_age[old.age], row.id)
+            _insert(self._by_age.setdefault(row.age, array("q")), row.id)
+        if old is None or old.relationship_status != row.relationship_status:
+            if old is not None:
+                _remove(self._by_status[old.relationship_status], row.id)
+            _insert(
+                self._by_status.setdefault(row.relationship_status, array("q")),
+                row.id,
+            )
+        if old is None or old.name != row.name:
+            if old is not None:
+                _remove(self._by_name, (old.name, row.id))
+            bisect.insort(self._by_name, (row.name, row.id))
+        if old is None or old.surname != row.surname:
+            if old is not None:
+                _remove(self._by_surname, (old.surname, row.id))
+            bisect.insort(self._by_surname, (row.surname, row.id))
+        if old is None or old.hobbies != row.hobbies:
+            tags = set(hobby_tags(row.hobbies))
+            old_tags = set() if old is None else set(hobby_tags(old.hobbies))
+            for hobby in old_tags - tags:
+                _remove(self._by_hobby[hobby], row.id)
+            for hobby in tags - old_tags:
+                _insert(self._by_hobby.setdefault(hobby, array("q")), row.id)
+        if old is not None:
+            self._counts[old.relationship_status, old.age] -= 1
+        self._counts[row.relationship_status, row.age] += 1
+
+    def _unstore(self, user_id: int) -> None:
+        """
+        Удалить запись из всех индексов.
+
+        :param user_id: Идентификатор пользователя.
+        :type user_id: int
+        """
+
+        row = self._rows.pop(user_id, None)
+        if row is None:
+            return
+        _remove(self._ids, user_id)
+        _remove(self._by_age[row.age], user_id)
+        _remove(self._by_status[row.relationship_status], user_id)
+        _remove(self._by_name, (row.name, user_id))
+        _remove(self._by_surname, (row.surname, user_id))
+        for hobby in hobby_tags(row.hobbies):
+            _remove(self._by_hobby[hobby], user_id)
+        self._counts[row.relationship_status, row.age] -= 1
+
+    def _record(
+        self,
+        operation: ChangeOperation,
+        user_id: int,
+        version: int,
+        user: User | None,
+        changed_at: datetime,
+    ) -> None:
+        """
+        Добавить изменение в очередь изменений со следующим номером.
+
+        :param operation: Операция.
+        :type operation: ChangeOperation
+        :param user_id: ID пользователя.
+        :type user_id: int
+        :param version: Версия записи.
+        :type version: int
+        :param user: Пользователь после изменения или None для удаления.
+        :type user: User | None
+        :param changed_at: Время изменения.
+        :type changed_at: datetime
+        """
+
+        self._change_seq += 1
+        self._changes.append(
+            UserChange(
+                seq=self._change_seq,
+                operation=operation,
+                id=user_id,
+                version=version,
+                user=user,
+                changed_at=changed_at,
+            )
+        )
+
+    def _changed(self) -> None:
+        """Сообщить об изменении данных, если задан `on_change`."""
+
+        if self.on_change is not None:
+            self.on_change()
+
+    def _log(self, entries: Iterable[str]) -> None:
+        """
+        Дописать записи в журнал изменений, если он ведётся.
+
+        :param entries: Строки журнала.
+        :type entries: Iterable[str]
+        """
+
+        if self._journal is None:
+            return
+        self._journal.writelines(entries)
+        self._journal.flush()
+
+    def _load(self) -> None:
+        """Воспроизвести журнал изменений и сжать его до снимка."""
+
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as file:
+                for number, line in enumerate(file, start=1):
+                    try:
+                        operation, value = json.loads(line)
+                    except ValueError:
+                        # Последняя строка могла быть записана не полностью.
+                        logger.warning("Skipping broken journal line %d", number)
+                        continue
+                    if operation == "put":
+                        self._store(_decode_row(value))
+                    elif operation == "del":
+                        self._unstore(value)
+                    elif operation == "seq":
+                        self._next_id = max(self._next_id, value)
+            logger.info("Loaded %d users from %s", len(self._rows), self.path)
+        self.snapshot()
+
+
+def _user(row: UserRow) -> User:
+    """
+    Получить схему пользователя из записи без повторной проверки полей.
+
+    :param row: Запись пользователя.
+    :type row: UserRow
+    :return: Пользователь.
+    :rtype: User
+    """
+
+    return User.model_construct(**row._asdict())
+
+
+def _predicate(users_filter: UsersFilter) -> Callable[[UserRow], bool]:
+    """
+    Построить проверку записи на соответствие условиям отбора.
+
+    Поиск по имени и фамилии — по началу строки, по хобби — по подстроке,
+    всё без учёта регистра. Теги хобби сравниваются с разбором `hobby_tags`.
+
+    :param users_filter: Условия отбора.
+    :type users_filter: UsersFilter
+    :return: Функция проверки записи.
+    :rtype: Callable[[UserRow], bool]
+    """
+
+    age_min = users_filter.age_min
+    age_max = users_filter.age_max
+    relationship_status = users_filter.relationship_status
+    name = users_filter.name.lower() if users_filter.name else None
+    surname = users_filter.surname.lower() if users_filter.surname else None
+    hobbies = users_filter.hobbies.lower() if users_filter.hobbies else None
+    hobby = set(users_filter.hobby) if users_filter.hobby else None
+    match_all = users_filter.hobby_match == HobbyMatch.ALL
+
+    def has_hobby(row: UserRow) -> bool:
+        tags = hobby_tags(row.hobbies)
+        return hobby.issubset(tags) if match_all else not hobby.isdisjoint(tags)
+
+    def matches(row: UserRow) -> bool:
+        return (
+            (age_min is None or row.age >= age_min)
+            and (age_max is None or row.age <= age_max)
+            and (
+                relationship_status is None
+                or row.relationship_status == relationship_status
+            )
+            and (name is None or row.name.lower().startswith(name))
+            and (surname is None or row.surname.lower().startswith(surname))
+            and (hobbies is None or hobbies in row.hobbies.lower())
+            and (hobby is None or has_hobby(row))
+        )
+
+    return matches
+
+
+def _scan(keys: Sequence, after, descending: bool) -> Iterator:
+    """
+    Перебрать отсортированные ключи строго после позиции.
+
+    :param keys: Ключи по возрастанию.
+    :type keys: Sequence
+    :param after: Позиция или None — с начала.
+    :param descending: Перебирать по убыванию.
+    :type descending: bool
+    :return: Итератор ключей.
+    :rtype: Iterator
+    """
+
+    if descending:
+        end = len(keys) if after is None else bisect.bisect_left(keys, after)
+        return (keys[index] for index in range(end - 1, -1, -1))
+    start = 0 if after is None else bisect.bisect_right(keys, after)
+    return islice(keys, start, None)
+
+
+def _unique(keys: Iterable) -> Iterator:
+    """
+    Пропустить подряд идущие повторы в отсортированных ключах.
+
+    :param keys: Ключи по возрастанию или убыванию.
+    :type keys: Iterable
+    :return: Итератор ключей без повторов.
+    :rtype: Iterator
+    """
+
+    previous = None
+    for key in keys:
+        if key != previous:
+            yield key
+            previous = key
+
+
+def _insert(keys: array | list, key) -> None:
+    """
+    Вставить ключ в отсортированный массив.
+
+    Новые ID больше существующих, поэтому обычно ключ дописывается в конец.
+
+    :param keys: Ключи по возрастанию.
+    :type keys: array | list
+    :param key: Ключ.
+    """
+
+    if not keys or keys[-1] < key:
+        keys.append(key)
+    else:
+        bisect.insort(keys, key)
+
+
+def _remove(keys: array | list, key) -> None:
+    """
+    Удалить ключ из отсортированного массива, если он есть.
+
+    :param keys: Ключи по возрастанию.
+    :type keys: array | list
+    :param key: Ключ.
+    """
+
+    index = bisect.bisect_left(keys, key)
+    if index < len(keys) and keys[index] == key:
+        del keys[index]
+
+
+def _entry(operation: str, value) -> str:
+    """
+    Сформировать строку журнала изменений.
+
+    :param operation: Операция: `put`, `del` или `seq`.
+    :type operation: str
+    :param value: Запись пользователя, ID или следующий ID.
+    :return: Строка JSON с переводом строки.
+    :rtype: str
+    """
+
+    return json.dumps([operation, value], default=format_datetime) + "\n"
+
+
+def _decode_row(values: list) -> UserRow:
+    """
+    Восстановить запись пользователя из журнала.
+
+    :param values: Значения полей в порядке `USER_FIELDS`.
+    :type values: list
+    :return: Запись пользователя.
+    :rtype: UserRow
+    """
+
+    row = UserRow(*values)
+    return row._replace(
+        relationship_status=RelationshipStatus(row.relationship_status),
+        updated_at=datetime.fromisoformat(row.updated_at),
+    )
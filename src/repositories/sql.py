@@ -0,0 +1,177 @@
+"""Модуль содержит хранилище пользователей в базе данных PostgreSQL."""
+
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
+from datetime import datetime
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.crud.users import UsersCRUD
+from src.models.users import UsersOrm
+from src.repositories.base import UsersRepository
+from src.schemas.users import (
+    BulkResult,
+    ImportResult,
+    TransferFormat,
+    User,
+    UserBulkUpdate,
+    UserChange,
+    UserCreate,
+    UsersFilter,
+    UsersHobbies,
+    UsersStats,
+    UserUpdate,
+)
+from src.utils.etag import PageValidators
+from src.utils.transfer import Record
+
+
+class SqlUsersRepository(UsersRepository):
+    """
+    Хранилище пользователей в PostgreSQL поверх одной сессии SQLAlchemy.
+
+    Операции выполняются `UsersCRUD` в сессии, с которой создано
+    хранилище, поэтому экземпляр живёт не дольше этой сессии.
+    """
+
+    name = "postgres"
+
+    def __init__(self, session: AsyncSession) -> None:
+        """
+        :param session: Асинхронная сессия SQLAlchemy.
+        :type session: AsyncSession
+        """
+
+        self.session = session
+
+    async def get_users(
+        self,
+        users_filter: UsersFilter | None = None,
+        after_id: int | None = None,
+        after_value: int | str | None = None,
+        limit: int | None = None,
+    ) -> list[UsersOrm]:
+        return await UsersCRUD.get_users(
+            self.session, users_filter, after_id, after_value, limit
+        )
+
+    async def get_users_rows(
+        self,
+        users_filter: UsersFilter | None = None,
+        after_id: int | None = None,
+        after_value: int | str | None = None,
+        limit: int | None = None,
+    ) -> list[Row]:
+        return await UsersCRUD.get_users_rows(
+            self.session, users_filter, after_id, after_value, limit
+        )
+
+    async def get_users_validators(
+        self,
+        users_filter: UsersFilter | None = None,
+        after_id: int | None = None,
+        after_value: int | str | None = None,
+        limit: int | None = None,
+    ) -> PageValidators:
+        return await UsersCRUD.get_users_validators(
+            self.session, users_filter, after_id, after_value, limit
+        )
+
+    def stream_users(
+        self,
+        users_filter: UsersFilter | None = None,
+        after_id: int | None = None,
+        after_value: int | str | None = None,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[list[UsersOrm]]:
+        return UsersCRUD.stream_users(
+            self.session, users_filter, after_id, after_value, chunk_size
+        )
+
+    async def export_users(
+        self,
+        users_filter: UsersFilter,
+        data_format: TransferFormat,
+        output: Callable[[bytes], Awaitable[None]],
+    ) -> int:
+        return await UsersCRUD.export_users(
+            self.session, users_filter, data_format, output
+        )
+
+    async def import_users(
+        self,
+        records: AsyncIterator[Record],
+        chunk_size: int = 5000,
+        max_errors: int = 100,
+    ) -> ImportResult:
+        return await UsersCRUD.import_users(
+            records, self.session, chunk_size=chunk_size, max_errors=max_errors
+        )
+
+    async def get_user(self, user_id: int) -> User | None:
+        return await UsersCRUD.get_user(user_id, self.session)
+
+    async def get_user_json(self, user_id: int) -> str | None:
+        return await UsersCRUD.get_user_json(user_id, self.session)
+
+    async def get_users_by_ids(self, user_ids: Sequence[int]) -> dict[int, User]:
+        return await UsersCRUD.get_users_by_ids(user_ids, self.session)
+
+    async def get_stats(self, bucket_size: int = 10) -> UsersStats:
+        return await UsersCRUD.get_stats(self.session, bucket_size)
+
+    async def get_hobbies(
+        self, hobbies: list[str] | None = None, limit: int = 20
+    ) -> UsersHobbies:
+        return await UsersCRUD.get_hobbies(self.session, hobbies, limit)
+
+    async def rebuild_stats(self) -> int | None:
+        return await UsersCRUD.rebuild_stats(self.session)
+
+    async def get_changes(self, after_seq: int, limit: int = 500) -> list[UserChange]:
+        return await UsersCRUD.get_changes(self.session, after_seq, limit)
+
+    async def get_changes_snapshot(
+        self, after_seq: int, limit: int = 500
+    ) -> tuple[list[UserChange], int, int]:
+        return await UsersCRUD.get_changes_snapshot(self.session, after_seq, limit)
+
+    async def get_changes_range(self) -> tuple[int, int]:
+        return await UsersCRUD.get_changes_range(self.session)
+
+    async def prune_changes(self, before: datetime) -> int:
+        return await UsersCRUD.prune_changes(self.session, before)
+
+    async def create_user(self, user_data: UserCreate) -> UsersOrm:
+        return await UsersCRUD.create_user(user_data, self.session)
+
+    async def update_user(
+        self,
+        user_id: int,
+        user_data: UserUpdate,
+        versions: list[int] | None = None,
+    ) -> User | None:
+        return await UsersCRUD.update_user(user_id, user_data, self.session, versions)
+
+    async def patch_user(
+        self,
+        user_id: int,
+        user_data: UserUpdate,
+        versions: list[int] | None = None,
+    ) -> User | None:
+        return await UsersCRUD.patch_user(user_id, user_data, self.session, versions)
+
+    async def delete_user(
+        self, user_id: int, versions: list[int] | None = None
+    ) -> bool:
+        return await UsersCRUD.delete_user(user_id, self.session, versions)
+
+    async def create_users(self, users_data: list[UserCreate]) -> BulkResult:
+        return await UsersCRUD.create_users(users_data, self.session)
+
+    async def connect(self) -> None:
+        await self.session.connection()
+
+    async def update_users(self, users_data: list[UserBulkUpdate]) -> BulkResult:
+        return await UsersCRUD.update_users(users_data, self.session)
+
+    async def delete_users(self, user_ids: list[int]) -> BulkResult:
+        return await UsersCRUD.delete_users(user_ids, self.session)
@@ -0,0 +1,123 @@
+"""
+Модуль содержит выбор хранилища пользователей по настройке `STORAGE_BACKEND`.
+
+`postgres` — база данных, хранилище создаётся на сессию запроса.
+`memory` — память процесса, один экземпляр на процесс.
+"""
+
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from fastapi import Request
+from src.config.config import get_session_factory, read_session
+from src.repositories.base import UsersRepository
+from src.repositories.memory import MemoryUsersRepository
+from src.repositories.sql import SqlUsersRepository
+from src.settings.settings import get_settings
+
+
+@lru_cache(maxsize=1)
+def get_memory_repository() -> MemoryUsersRepository:
+    """
+    Получить хранилище в памяти процесса, загрузив журнал при первом вызове.
+
+    :return: Хранилище в памяти.
+    :rtype: MemoryUsersRepository
+    """
+
+    settings = get_settings()
+    return MemoryUsersRepository(
+        path=settings.STORAGE_MEMORY_PATH,
+        changes_size=settings.USERS_CHANGES_MEMORY_SIZE,
+    )
+
+
+def uses_memory_storage() -> bool:
+    """
+    Проверить, хранятся ли пользователи в памяти процесса.
+
+    :return: True при `STORAGE_BACKEND=memory`.
+    :rtype: bool
+    """
+
+    return get_settings().STORAGE_BACKEND == "memory"
+
+
+async def get_users_repository(request: Request) -> AsyncIterator[UsersRepository]:
+    """
+    Предоставить хранилище пользователей для изменяющего запроса.
+
+    Сессия базы данных открывается на основной базе, а запрос помечается,
+    чтобы последующие чтения в нём тоже шли на основную базу.
+
+    :param request: Текущий HTTP-запрос.
+    :type request: Request
+    :return: Хранилище пользователей.
+    :rtype: AsyncIterator[UsersRepository]
+    """
+
+    if uses_memory_storage():
+        yield get_memory_repository()
+        return
+    request.state.uses_primary = True
+    async with get_session_factory()() as session:
+        yield SqlUsersRepository(session)
+
+
+async def get_read_users_repository(
+    request: Request,
+) -> AsyncIterator[UsersRepository]:
+    """
+    Предоставить хранилище пользователей для запроса только на чтение.
+
+    Сессия базы данных открывается на реплике, если в запросе ещё
+    не использовалась основная база.
+
+    :param request: Текущий HTTP-запрос.
+    :type request: Request
+    :return: Хранилище пользователей.
+    :rtype: AsyncIterator[UsersRepository]
+    """
+
+    if uses_memory_storage():
+        yield get_memory_repository()
+        return
+    if getattr(request.state, "uses_primary", False):
+        async with get_session_factory()() as session:
+            yield SqlUsersRepository(session)
+        return
+    async with read_session() as session:
+        yield SqlUsersRepository(session)
+
+
+@asynccontextmanager
+async def users_repository(read: bool = False) -> AsyncIterator[UsersRepository]:
+    """
+    Открыть хранилище пользователей вне зависимостей запроса.
+
+    Используется фоновыми задачами и потоковыми ответами, которые
+    работают после закрытия сессии запроса.
+
+    :param read: Только чтение: сессия открывается на реплике.
+    :type read: bool
+    :return: Асинхронный контекстный менеджер хранилища.
+    :rtype: AsyncIterator[UsersRepository]
+    """
+
+    if uses_memory_storage():
+        yield get_memory_repository()
+        return
+    if read:
+        async with read_session() as session:
+            yield SqlUsersRepository(session)
+        return
+    async with get_session_factory()() as session:
+        yield SqlUsersRepository(session)
+
+
+async def close_users_repository() -> None:
+    """Сохранить и закрыть хранилище в памяти, если оно создавалось."""
+
+    if get_memory_repository.cache_info().currsize:
+        await get_memory_repository().close()
+        get_memory_repository.cache_clear()
@@ -3,8 +3,11 @@
 Используется Pydantic для валидации и сериализации данных.
 """
 
+from collections.abc import Iterable
+from datetime import datetime
 from enum import StrEnum
-from pydantic import BaseModel, Field
+from typing import Annotated
+from pydantic import BaseModel, BeforeValidator, Field, field_validator
 
 
 class RelationshipStatus(StrEnum):
@@ -13,6 +16,46 @@ class RelationshipStatus(StrEnum):
     MARRIED = "married"
 
 
+def hobby_tags(hobbies: str) -> list[str]:
+    """
+    Разобрать строку хобби на теги.
+
+    Хобби разделяются запятыми, теги приводятся к нижнему регистру,
+    пустые и повторные отбрасываются. Совпадает с функцией
+    `users_hobby_tags` в базе данных, которая заполняет столбец
+    `users.hobby_tags`.
+
+    :param hobbies: Хобби через запятую.
+    :type hobbies: str
+    :return: Теги по возрастанию.
+    :rtype: list[str]
+    """
+
+    return sorted(
+        {tag for part in hobbies.split(",") if (tag := part.strip(" ").lower())}
+    )
+
+
+def _join_hobbies(value):
+    """
+    Привести список хобби к строке через запятую.
+
+    :param value: Строка или список хобби.
+    :return: Строка хобби или исходное значение для проверки типа.
+    """
+
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return ", ".join(item.strip() for item in value)
+    return value
+
+
+# Хобби принимаются строкой через запятую или списком строк,
+# хранятся и возвращаются строкой.
+Hobbies = Annotated[
+    str, BeforeValidator(_join_hobbies, json_schema_input_type=str | list[str])
+]
+
+
 class UserBase(BaseModel):
     """
     Базовая схема пользователя.
@@ -21,14 +64,15 @@ class UserBase(BaseModel):
         name (str): Имя пользователя (длина от 2 до 15 символов).
         surname (str): Фамилия пользователя (длина от 2 до 15 символов).
         age (int): Возраст пользователя (должен быть меньше 100).
-        hobbies (str): Хобби и увлечения пользователя.
+        hobbies (str): Хобби и увлечения пользователя через запятую
+        (не длиннее 100 символов). Принимается также списком строк.
         relationship_status (RelationshipStatus): Семейное положение.
     """
 
     name: str = Field(min_length=2, max_length=15)
     surname: str = Field(min_length=2, max_length=15)
     age: int = Field(lt=100)
-    hobbies: str
+    hobbies: Hobbies = Field(max_length=100)
     relationship_status: RelationshipStatus
 
 
@@ -53,14 +97,128 @@ class User(UserBase):
         age (int): Возраст пользователя.
         hobbies (str): Хобби и увлечения пользователя.
         relationship_status (RelationshipStatus): Семейное положение.
+        updated_at (datetime): Время последнего изменения записи.
+        Передаётся также в заголовке Last-Modified.
+        version (int): Версия записи, увеличивается при каждом изменении.
+        Передаётся также в заголовке ETag.
     """
 
     id: int
+    updated_at: datetime
+    version: int
 
     class Config:
         from_attributes = True
 
 
+class UsersSort(StrEnum):
+    """Допустимые ключи сортировки списка. Префикс `-` задаёт убывание."""
+
+    ID = "id"
+    ID_DESC = "-id"
+    AGE = "age"
+    AGE_DESC = "-age"
+    NAME = "name"
+    NAME_DESC = "-name"
+    SURNAME = "surname"
+    SURNAME_DESC = "-surname"
+
+    @property
+    def field(self) -> str:
+        """Имя поля, по которому выполняется сортировка."""
+
+        return self.value.lstrip("-")
+
+    @property
+    def descending(self) -> bool:
+        """Признак сортировки по убыванию."""
+
+        return self.value.startswith("-")
+
+
+class HobbyMatch(StrEnum):
+    """Как сочетать несколько хобби в отборе: любое из них или все сразу."""
+
+    ANY = "any"
+    ALL = "all"
+
+
+class UsersFilter(BaseModel):
+    """
+    Схема условий отбора и сортировки списка пользователей.
+
+    Атрибуты (опциональные):
+        age_min (int | None): Минимальный возраст включительно.
+        age_max (int | None): Максимальный возраст включительно.
+        relationship_status (RelationshipStatus | None): Семейное положение.
+        name (str | None): Начало имени без учёта регистра.
+        surname (str | None): Начало фамилии без учёта регистра.
+        hobbies (str | None): Подстрока хобби без учёта регистра.
+        hobby (list[str] | None): Теги хобби, приводятся к виду `hobby_tags`.
+        hobby_match (HobbyMatch): Нужно любое из хобби `hobby` или все.
+        sort (UsersSort): Ключ сортировки.
+    """
+
+    age_min: int | None = None
+    age_max: int | None = None
+    relationship_status: RelationshipStatus | None = None
+    name: str | None = None
+    surname: str | None = None
+    hobbies: str | None = None
+    hobby: list[str] | None = None
+    hobby_match: HobbyMatch = HobbyMatch.ANY
+    sort: UsersSort = UsersSort.ID
+
+    @field_validator("hobby")
+    @classmethod
+    def normalize_hobby(cls, value: list[str] | None) -> list[str] | None:
+        """Привести теги к нижнему регистру и убрать пустые и повторные."""
+
+        if value is None:
+            return None
+        return hobby_tags(",".join(value)) or None
+
+
+class UsersPage(BaseModel):
+    """
+    Схема страницы списка пользователей.
+
+    Атрибуты:
+        items (list[User]): Пользователи на странице.
+        next_cursor (str | None): Курсор следующей страницы
+        или None, если страница последняя.
+    """
+
+    items: list[User]
+    next_cursor: str | None = None
+
+
+class UsersLayout(StrEnum):
+    """
+    Представление страницы списка.
+
+    `objects` — список объектов, как в `UsersPage`. `columns` — значения
+    каждого поля одним списком: `{"columns": {"id": [...], ...},
+    "count": n, "next_cursor": ...}`.
+    """
+
+    OBJECTS = "objects"
+    COLUMNS = "columns"
+
+
+class UsersLookup(BaseModel):
+    """
+    Схема результата запроса пользователей по списку ID.
+
+    Атрибуты:
+        items (list[User]): Найденные пользователи в порядке запрошенных ID.
+        missing (list[int]): Запрошенные ID, для которых пользователь не найден.
+    """
+
+    items: list[User]
+    missing: list[int]
+
+
 class UserUpdate(BaseModel):
     """
     Схема для обновления данных пользователя.
@@ -69,12 +227,259 @@ class UserUpdate(BaseModel):
         name (str | None): Новое имя пользователя.
         surname (str | None): Новая фамилия пользователя.
         age (int | None): Новый возраст пользователя.
-        hobbies (str | None): Новые хобби и увлечения.
+        hobbies (str | None): Новые хобби через запятую или списком.
         relationship_status (RelationshipStatus | None): Новое семейное положение.
     """
 
     name: str | None = Field(None, min_length=2, max_length=15)
     surname: str | None = Field(None, min_length=2, max_length=15)
     age: int | None = Field(None, lt=100)
-    hobbies: str | None = None
+    hobbies: Hobbies | None = Field(None, max_length=100)
     relationship_status: RelationshipStatus | None = None
+
+
+class UserBulkUpdate(UserUpdate):
+    """
+    Схема элемента пакетного обновления пользователей.
+
+    Атрибуты:
+        id (int): Идентификатор обновляемого пользователя.
+        Остальные атрибуты наследуются от UserUpdate.
+    """
+
+    id: int
+
+
+class BulkItemResult(BaseModel):
+    """
+    Схема результата обработки одного элемента пакетной операции.
+
+    Атрибуты:
+        index (int): Позиция элемента во входном массиве.
+        id (int | None): Идентификатор пользователя, если он известен.
+        success (bool): Признак успешной обработки элемента.
+        error (str | None): Описание ошибки для неуспешного элемента.
+        user (User | None): Созданный или обновлённый пользователь.
+    """
+
+    index: int
+    id: int | None = None
+    success: bool
+    error: str | None = None
+    user: User | None = None
+
+
+class BulkResult(BaseModel):
+    """
+    Схема результата пакетной операции.
+
+    Атрибуты:
+        items (list[BulkItemResult]): Результаты по каждому элементу
+        в порядке входного массива.
+        succeeded (int): Количество успешно обработанных элементов.
+        failed (int): Количество элементов, завершившихся ошибкой.
+    """
+
+    items: list[BulkItemResult]
+    succeeded: int
+    failed: int
+
+    @classmethod
+    def from_items(cls, items: Iterable[BulkItemResult]) -> "BulkResult":
+        """
+        Собрать итог пакетной операции из результатов по элементам.
+
+        :param items: Результаты по каждому элементу.
+        :type items: Iterable[BulkItemResult]
+        :return: Итог пакетной операции.
+        :rtype: BulkResult
+        """
+
+        items = list(items)
+        succeeded = sum(item.success for item in items)
+        return cls(items=items, succeeded=succeeded, failed=len(items) - succeeded)
+
+
+class IngestStatus(StrEnum):
+    QUEUED = "queued"
+    CREATED = "created"
+    FAILED = "failed"
+
+
+class IngestTicket(BaseModel):
+    """
+    Схема состояния пользователя, принятого в очередь на создание.
+
+    Атрибуты:
+        tracking_id (str): Идентификатор отслеживания.
+        status (IngestStatus): Состояние: в очереди, создан или ошибка.
+        id (int | None): Идентификатор созданного пользователя.
+        error (str | None): Описание ошибки.
+    """
+
+    tracking_id: str
+    status: IngestStatus = IngestStatus.QUEUED
+    id: int | None = None
+    error: str | None = None
+
+
+class TransferFormat(StrEnum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+class ImportRejection(BaseModel):
+    """
+    Схема отклонённой при импорте записи.
+
+    Атрибуты:
+        line (int): Номер строки, с которой начинается запись.
+        error (str): Причина отклонения.
+    """
+
+    line: int
+    error: str
+
+
+class ImportResult(BaseModel):
+    """
+    Схема итога импорта пользователей.
+
+    Атрибуты:
+        received (int): Количество прочитанных записей.
+        imported (int): Количество добавленных пользователей.
+        rejected (int): Количество отклонённых записей.
+        seconds (float): Длительность импорта в секундах.
+        rows_per_second (float): Скорость добавления пользователей.
+        errors (list[ImportRejection]): Первые отклонённые записи с причинами.
+    """
+
+    received: int
+    imported: int
+    rejected: int
+    seconds: float
+    rows_per_second: float
+    errors: list[ImportRejection]
+
+
+class AgeBucket(BaseModel):
+    """
+    Схема интервала гистограммы возрастов.
+
+    Атрибуты:
+        age_from (int): Нижняя граница интервала включительно.
+        age_to (int): Верхняя граница интервала включительно.
+        count (int): Количество пользователей в интервале.
+    """
+
+    age_from: int
+    age_to: int
+    count: int
+
+
+class UsersStats(BaseModel):
+    """
+    Схема сводной статистики пользователей.
+
+    Атрибуты:
+        total (int): Общее количество пользователей.
+        average_age (float | None): Средний возраст, если пользователи есть.
+        relationship_status (dict[RelationshipStatus, int]): Количество
+        пользователей по семейному положению.
+        age (list[AgeBucket]): Гистограмма возрастов без пустых интервалов.
+    """
+
+    total: int
+    average_age: float | None
+    relationship_status: dict[RelationshipStatus, int]
+    age: list[AgeBucket]
+
+    @classmethod
+    def from_counts(
+        cls, counts: Iterable[tuple[RelationshipStatus, int, int]], bucket_size: int
+    ) -> "UsersStats":
+        """
+        Собрать статистику из счётчиков по сочетаниям семейного положения
+        и возраста.
+
+        :param counts: Семейное положение, возраст и количество пользователей.
+        :type counts: Iterable[tuple[RelationshipStatus, int, int]]
+        :param bucket_size: Ширина интервала гистограммы возрастов.
+        :type bucket_size: int
+        :return: Статистика пользователей.
+        :rtype: UsersStats
+        """
+
+        total = 0
+        age_sum = 0
+        statuses = dict.fromkeys(RelationshipStatus, 0)
+        buckets: dict[int, int] = {}
+        for relationship_status, age, count in counts:
+            total += count
+            age_sum += age * count
+            statuses[relationship_status] += count
+            start = age // bucket_size * bucket_size
+            buckets[start] = buckets.get(start, 0) + count
+        return cls(
+            total=total,
+            average_age=round(age_sum / total, 2) if total else None,
+            relationship_status=statuses,
+            age=[
+                AgeBucket(age_from=start, age_to=start + bucket_size - 1, count=count)
+                for start, count in sorted(buckets.items())
+            ],
+        )
+
+
+class UsersHobbies(BaseModel):
+    """
+    Схема количества пользователей по хобби.
+
+    Атрибуты:
+        hobbies (dict[str, int]): Количество пользователей по тегу хобби,
+        по убыванию количества.
+    """
+
+    hobbies: dict[str, int]
+
+    @classmethod
+    def from_counts(cls, counts: Iterable[tuple[str, int]]) -> "UsersHobbies":
+        """
+        Собрать количество по хобби из пар (тег, количество).
+
+        :param counts: Пары тега и количества пользователей.
+        :type counts: Iterable[tuple[str, int]]
+        :return: Количество пользователей по тегам.
+        :rtype: UsersHobbies
+        """
+
+        ordered = sorted(counts, key=lambda item: (-item[1], item[0]))
+        return cls(hobbies=dict(ordered))
+
+
+class ChangeOperation(StrEnum):
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+
+
+class UserChange(BaseModel):
+    """
+    Схема события изменения пользователя.
+
+    Атрибуты:
+        seq (int): Номер изменения, передаётся также как ID события.
+        operation (ChangeOperation): Операция.
+        id (int): ID пользователя.
+        version (int): Версия записи после изменения, для удаления —
+        версия удалённой записи.
+        user (User | None): Пользователь после изменения, для удаления — None.
+        changed_at (datetime): Время изменения.
+    """
+
+    seq: int
+    operation: ChangeOperation
+    id: int
+    version: int
+    user: User | None = None
+    changed_at: datetime
@@ -0,0 +1,30 @@
+"""
+Модуль запускает приложение в production-режиме.
+
+Запуск: `python -m src.server`. Количество процессов, цикл событий
+и HTTP-парсер задаются настройками `SERVER_*`.
+"""
+
+import uvicorn
+from src.settings.settings import get_settings
+
+
+def main() -> None:
+    """Запустить Uvicorn с несколькими процессами-обработчиками."""
+
+    settings = get_settings()
+    uvicorn.run(
+        "src.main:create_app",
+        factory=True,
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        workers=settings.server_workers,
+        loop=settings.SERVER_LOOP,
+        http=settings.SERVER_HTTP,
+        access_log=settings.SERVER_ACCESS_LOG,
+        lifespan="on",
+    )
+
+
+if __name__ == "__main__":
+    main()
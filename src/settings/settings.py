@@ -1,5 +1,15 @@
-"""Модуль содержит общие настройки приложения."""
+"""
+Модуль содержит общие настройки приложения.
 
+Настройки читаются из окружения при первом обращении через
+`get_settings()`, а не при импорте модуля. Имя `settings` оставлено
+для совместимости и также создаёт настройки при первом обращении.
+"""
+
+import os
+from functools import lru_cache
+from typing import Literal
+from pydantic import Field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -8,22 +18,236 @@ class Settings(BaseSettings):
     Класс конфигурации приложения, загружающий переменные из файла `.env`.
 
     Атрибуты:
-       DB_HOST (str): Адрес хоста базы данных.
-       DB_PORT (int): Порт для подключения к базе данных.
-       DB_USER (str): Имя пользователя базы данных.
-       DB_PASS (str): Пароль пользователя базы данных.
-       DB_NAME (str): Название базы данных.
+       DB_HOST (str | None): Адрес хоста базы данных.
+       DB_PORT (int | None): Порт для подключения к базе данных.
+       DB_USER (str | None): Имя пользователя базы данных.
+       DB_PASS (str | None): Пароль пользователя базы данных.
+       DB_NAME (str | None): Название базы данных.
+       Параметры подключения обязательны при `STORAGE_BACKEND=postgres`.
+       DB_POOL_SIZE (int): Количество постоянных соединений в пуле.
+       DB_MAX_OVERFLOW (int): Количество дополнительных соединений сверх пула.
+       DB_POOL_TIMEOUT (float): Время ожидания свободного соединения в секундах.
+       DB_POOL_RECYCLE (int): Время жизни соединения в секундах, -1 — без ограничения.
+       DB_POOL_PRE_PING (bool): Проверять соединение перед выдачей из пула.
+       DB_STATEMENT_CACHE_SIZE (int): Размер кеша подготовленных запросов
+       на соединение, 0 — отключить (например, для PgBouncer).
+       DB_STATEMENT_TIMEOUT (int): Серверный `statement_timeout` в миллисекундах,
+       0 — без ограничения.
+       DB_REPLICA_HOSTS (str): Реплики для чтения через запятую в виде
+       `host` или `host:port`. Учётные данные и база совпадают с основной.
+       DB_REPLICA_STRATEGY (str): Выбор реплики: round_robin
+       или least_connections.
+       DB_REPLICA_RETRY_AFTER (float): Через сколько секунд повторно
+       использовать реплику, к которой не удалось подключиться.
+       DB_SLOW_QUERY_THRESHOLD (float): Запросы дольше этого времени
+       в секундах пишутся в журнал вместе с параметрами, 0 — не писать.
+       DB_SLOW_QUERY_EXPLAIN (bool): Добавлять к медленным SELECT план
+       `EXPLAIN` без выполнения запроса.
+       DB_SLOW_QUERY_ANALYZE_INTERVAL (float): Не чаще чем раз в столько
+       секунд вместо плана получать `EXPLAIN (ANALYZE, BUFFERS)`, который
+       выполняет запрос повторно, 0 — не выполнять.
+       SERVER_HOST (str): Адрес, на котором принимаются соединения.
+       SERVER_PORT (int): Порт сервера.
+       SERVER_WORKERS (int): Количество процессов-обработчиков,
+       0 — по числу ядер процессора.
+       SERVER_LOOP (str): Цикл событий: auto (uvloop, если установлен),
+       asyncio или uvloop.
+       SERVER_HTTP (str): HTTP-парсер: auto (httptools, если установлен),
+       h11 или httptools.
+       SERVER_ACCESS_LOG (bool): Писать журнал запросов.
+       SERVER_WARMUP_TIMEOUT (float): Время на прогрев пула соединений
+       при запуске в секундах.
+       USERS_PAGE_SIZE (int): Размер страницы списка пользователей по умолчанию.
+       USERS_MAX_PAGE_SIZE (int): Максимально допустимый размер страницы.
+       USERS_STREAM_CHUNK_SIZE (int): Количество строк, читаемых из базы
+       за один раз в потоковом режиме.
+       USERS_BULK_MAX_ITEMS (int): Максимальное количество элементов
+       в одном пакетном запросе.
+       USERS_LOOKUP_MAX_IDS (int): Максимальное количество ID в одном
+       запросе пользователей по списку ID.
+       USERS_FAST_READ_PATH (bool): Отдавать списки и пользователей по ID
+       через быструю сериализацию строк без ORM-объектов и Pydantic.
+       USERS_INGEST_ENABLED (bool): Принимать POST /users в очередь
+       с пакетной записью в базу данных вместо записи в каждом запросе.
+       USERS_INGEST_WAIT (bool): По умолчанию ждать записи и отвечать 201
+       вместо немедленного ответа 202 с идентификатором отслеживания.
+       USERS_INGEST_QUEUE_SIZE (int): Вместимость очереди, при заполнении
+       запросы отклоняются с кодом 429.
+       USERS_INGEST_BATCH_SIZE (int): Максимальное количество пользователей
+       в одном INSERT.
+       USERS_INGEST_FLUSH_INTERVAL (float): Максимальное время накопления
+       пакета в секундах.
+       USERS_IMPORT_CHUNK_SIZE (int): Количество записей в одной команде COPY
+       при импорте.
+       USERS_IMPORT_MAX_ERRORS (int): Сколько отклонённых записей описывать
+       в отчёте об импорте.
+       USERS_CHANGES_ENABLED (bool): Раздавать изменения пользователей
+       потоком событий на GET /users/changes.
+       USERS_CHANGES_QUEUE_SIZE (int): Сколько событий ждут отправки одному
+       подписчику. При переполнении подписчик отключается и продолжает
+       с Last-Event-ID после переподключения.
+       USERS_CHANGES_BATCH_SIZE (int): Количество изменений, читаемых
+       из журнала одним запросом.
+       USERS_CHANGES_POLL_INTERVAL (float): Через сколько секунд без
+       уведомлений журнал изменений проверяется повторно.
+       USERS_CHANGES_KEEPALIVE (float): Интервал комментариев, которые
+       поддерживают соединение подписчика без событий, в секундах.
+       USERS_CHANGES_RETENTION (float): Сколько секунд хранятся записи
+       журнала изменений в базе данных.
+       USERS_CHANGES_GAP_TIMEOUT (float): Сколько секунд лента ждёт
+       пропущенный номер изменения, прежде чем перейти пропуск.
+       USERS_CHANGES_MEMORY_SIZE (int): Сколько последних изменений хранит
+       хранилище в памяти.
+       STORAGE_BACKEND (str): Хранилище пользователей: postgres или memory
+       (память процесса, без базы данных).
+       STORAGE_MEMORY_PATH (str | None): Файл журнала хранилища в памяти.
+       Если задан, данные сохраняются между перезапусками.
+       CACHE_BACKEND (str): Бэкенд кеша пользователей: memory, redis или none.
+       Кеш в памяти есть у каждого процесса свой и не видит изменений,
+       сделанных другими процессами, поэтому при нескольких
+       процессах-обработчиках по умолчанию используется none,
+       а явно заданный memory не допускается.
+       CACHE_TTL (float): Время жизни записи кеша в секундах.
+       CACHE_MAX_SIZE (int): Максимальное количество записей кеша в памяти.
+       CACHE_REDIS_URL (str): Адрес сервера с протоколом Redis.
+       CACHE_REDIS_POOL_SIZE (int): Количество соединений с сервером Redis.
+       CACHE_SINGLEFLIGHT (bool): Объединять одновременные одинаковые запросы
+       пользователя по ID и страниц списка в один запрос к базе данных.
+       METRICS_ENABLED (bool): Собирать метрики и отдавать их на `/metrics`.
+       METRICS_SAMPLE_RATE (float): Доля запросов от 0 до 1, для которых
+       собираются гистограммы времени обработки, запросов к базе данных
+       и сериализации.
+       CONCURRENCY_ENABLED (bool): Ограничивать количество одновременно
+       обрабатываемых запросов отдельно для чтения и записи.
+       CONCURRENCY_READ_LIMIT (int): Начальный лимит запросов на чтение.
+       CONCURRENCY_WRITE_LIMIT (int): Начальный лимит запросов на запись.
+       CONCURRENCY_MIN_LIMIT (int): Нижняя граница лимита.
+       CONCURRENCY_MAX_LIMIT (int): Верхняя граница лимита.
+       CONCURRENCY_READ_LATENCY (float): Время до начала ответа на чтение
+       в секундах, при превышении которого лимит уменьшается.
+       CONCURRENCY_WRITE_LATENCY (float): То же для запросов на запись.
+       CONCURRENCY_BACKOFF (float): Множитель уменьшения лимита.
+       CONCURRENCY_QUEUE_TIMEOUT (float): Сколько секунд запрос ждёт
+       свободного места, прежде чем получить ответ 503.
+       COMPRESSION_ENABLED (bool): Сжимать ответы по Accept-Encoding.
+       COMPRESSION_MINIMUM_SIZE (int): Минимальный размер тела ответа
+       в байтах, начиная с которого он сжимается.
+       COMPRESSION_GZIP_LEVEL (int): Уровень сжатия gzip.
+       COMPRESSION_BROTLI_QUALITY (int): Качество сжатия brotli,
+       используется, если установлен пакет brotli.
 
     Свойства:
        DATABASE_URL_asyncpg (str): Строка подключения к базе данных PostgreSQL
        с использованием драйвера asyncpg.
+       replica_urls_asyncpg (list[str]): Строки подключения к репликам.
     """
 
-    DB_HOST: str
-    DB_PORT: int
-    DB_USER: str
-    DB_PASS: str
-    DB_NAME: str
+    DB_HOST: str | None = None
+    DB_PORT: int | None = None
+    DB_USER: str | None = None
+    DB_PASS: str | None = None
+    DB_NAME: str | None = None
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = False
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_STATEMENT_TIMEOUT: int = 0
+    DB_REPLICA_HOSTS: str = ""
+    DB_REPLICA_STRATEGY: Literal["round_robin", "least_connections"] = "round_robin"
+    DB_REPLICA_RETRY_AFTER: float = 5.0
+    DB_SLOW_QUERY_THRESHOLD: float = Field(0.0, ge=0)
+    DB_SLOW_QUERY_EXPLAIN: bool = False
+    DB_SLOW_QUERY_ANALYZE_INTERVAL: float = Field(0.0, ge=0)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 1
+    SERVER_LOOP: Literal["auto", "asyncio", "uvloop"] = "auto"
+    SERVER_HTTP: Literal["auto", "h11", "httptools"] = "auto"
+    SERVER_ACCESS_LOG: bool = True
+    SERVER_WARMUP_TIMEOUT: float = 10.0
+    USERS_PAGE_SIZE: int = 100
+    USERS_MAX_PAGE_SIZE: int = 1000
+    USERS_STREAM_CHUNK_SIZE: int = 1000
+    USERS_BULK_MAX_ITEMS: int = 1000
+    USERS_LOOKUP_MAX_IDS: int = 10000
+    USERS_FAST_READ_PATH: bool = False
+    USERS_INGEST_ENABLED: bool = False
+    USERS_INGEST_WAIT: bool = False
+    USERS_INGEST_QUEUE_SIZE: int = 10000
+    USERS_INGEST_BATCH_SIZE: int = 500
+    USERS_INGEST_FLUSH_INTERVAL: float = 0.05
+    USERS_IMPORT_CHUNK_SIZE: int = 5000
+    USERS_IMPORT_MAX_ERRORS: int = 100
+    USERS_CHANGES_ENABLED: bool = True
+    USERS_CHANGES_QUEUE_SIZE: int = Field(1000, ge=1)
+    USERS_CHANGES_BATCH_SIZE: int = Field(500, ge=1)
+    USERS_CHANGES_POLL_INTERVAL: float = Field(5.0, gt=0)
+    USERS_CHANGES_KEEPALIVE: float = Field(15.0, gt=0)
+    USERS_CHANGES_RETENTION: float = Field(7 * 24 * 3600, gt=0)
+    USERS_CHANGES_GAP_TIMEOUT: float = Field(60.0, gt=0)
+    USERS_CHANGES_MEMORY_SIZE: int = Field(10000, ge=1)
+    STORAGE_BACKEND: Literal["postgres", "memory"] = "postgres"
+    STORAGE_MEMORY_PATH: str | None = None
+    CACHE_BACKEND: Literal["memory", "redis", "none"] = "memory"
+    CACHE_TTL: float = 60.0
+    CACHE_MAX_SIZE: int = 10000
+    CACHE_REDIS_URL: str = "redis://127.0.0.1:6379/0"
+    CACHE_REDIS_POOL_SIZE: int = 10
+    CACHE_SINGLEFLIGHT: bool = True
+    METRICS_ENABLED: bool = True
+    METRICS_SAMPLE_RATE: float = Field(1.0, ge=0, le=1)
+    CONCURRENCY_ENABLED: bool = True
+    CONCURRENCY_READ_LIMIT: int = Field(50, ge=1)
+    CONCURRENCY_WRITE_LIMIT: int = Field(20, ge=1)
+    CONCURRENCY_MIN_LIMIT: int = Field(2, ge=1)
+    CONCURRENCY_MAX_LIMIT: int = Field(500, ge=1)
+    CONCURRENCY_READ_LATENCY: float = 0.5
+    CONCURRENCY_WRITE_LATENCY: float = 1.0
+    CONCURRENCY_BACKOFF: float = Field(0.9, gt=0, lt=1)
+    CONCURRENCY_QUEUE_TIMEOUT: float = 0.5
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = Field(1024, ge=0)
+    COMPRESSION_GZIP_LEVEL: int = Field(6, ge=1, le=9)
+    COMPRESSION_BROTLI_QUALITY: int = Field(4, ge=0, le=11)
+
+    @model_validator(mode="after")
+    def check_database(self) -> "Settings":
+        """Потребовать параметры подключения, если пользователи хранятся в базе."""
+
+        if self.STORAGE_BACKEND != "postgres":
+            return self
+        missing = [
+            name
+            for name in ("DB_HOST", "DB_PORT", "DB_USER", "DB_PASS", "DB_NAME")
+            if getattr(self, name) is None
+        ]
+        if missing:
+            raise ValueError(
+                f"{', '.join(missing)} required with STORAGE_BACKEND=postgres"
+            )
+        return self
+
+    @model_validator(mode="after")
+    def check_cache(self) -> "Settings":
+        """Не использовать кеш в памяти процесса при нескольких обработчиках."""
+
+        if self.CACHE_BACKEND != "memory" or self.server_workers == 1:
+            return self
+        if "CACHE_BACKEND" in self.model_fields_set:
+            raise ValueError(
+                "CACHE_BACKEND=memory is per-process; "
+                "use redis or none with more than one server worker"
+            )
+        self.CACHE_BACKEND = "none"
+        return self
+
+    @property
+    def server_workers(self) -> int:
+        """Количество процессов-обработчиков с учётом значения 0."""
+
+        return self.SERVER_WORKERS or os.cpu_count() or 1
 
     @property
     def database_url_asyncpg(self):
@@ -32,7 +256,34 @@ class Settings(BaseSettings):
             f"@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
         )
 
+    @property
+    def replica_urls_asyncpg(self) -> list[str]:
+        urls = []
+        for host in filter(None, map(str.strip, self.DB_REPLICA_HOSTS.split(","))):
+            if ":" not in host:
+                host = f"{host}:{self.DB_PORT}"
+            urls.append(
+                f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}"
+                f"@{host}/{self.DB_NAME}"
+            )
+        return urls
+
     model_config = SettingsConfigDict(env_file="../.env")
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Получить настройки приложения, создав их при первом вызове.
+
+    :return: Настройки приложения.
+    :rtype: Settings
+    """
+
+    return Settings()
+
+
+def __getattr__(name: str):
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
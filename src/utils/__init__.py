@@ -0,0 +1 @@
+"""Пакет содержит вспомогательные утилиты проекта."""
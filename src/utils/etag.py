@@ -0,0 +1,208 @@
+"""
+Модуль содержит работу с ETag и условными запросами.
+
+ETag пользователя — это номер версии записи в кавычках, например `"3"`.
+Версия увеличивается каждым изменением, поэтому клиент, передавший
+полученный ETag в `If-Match`, изменит запись, только если её никто
+не изменил после чтения.
+
+ETag страницы списка вычисляется по агрегатам строк страницы
+(`PageValidators`) без формирования тела ответа.
+"""
+
+import hashlib
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from collections.abc import Iterable
+from typing import Any, NamedTuple
+from fastapi import Response, status
+from starlette.datastructures import Headers
+
+
+class PageValidators(NamedTuple):
+    """
+    Агрегаты строк страницы, по которым вычисляется её ETag.
+
+    Атрибуты:
+        count: Количество строк.
+        updated_at: Наибольшее время изменения или None для пустой страницы.
+        id_sum: Сумма ID — меняется при смене состава страницы.
+        version_sum: Сумма версий — меняется при любом изменении строки.
+    """
+
+    count: int
+    updated_at: datetime | None
+    id_sum: int
+    version_sum: int
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Any]) -> "PageValidators":
+        """
+        Вычислить агрегаты по уже выбранным строкам страницы.
+
+        Результат совпадает с агрегатным запросом `UsersCRUD.get_users_validators`.
+
+        :param rows: Пользователи или строки с атрибутами id, updated_at, version.
+        :type rows: Iterable[Any]
+        :return: Агрегаты страницы.
+        :rtype: PageValidators
+        """
+
+        count = id_sum = version_sum = 0
+        updated_at = None
+        for row in rows:
+            count += 1
+            id_sum += row.id
+            version_sum += row.version
+            if updated_at is None or row.updated_at > updated_at:
+                updated_at = row.updated_at
+        return cls(count, updated_at, id_sum, version_sum)
+
+    @property
+    def etag(self) -> str:
+        """Сильный ETag страницы."""
+
+        key = f"{self.count}:{self.updated_at}:{self.id_sum}:{self.version_sum}"
+        return f'"{hashlib.blake2b(key.encode(), digest_size=12).hexdigest()}"'
+
+
+def make_etag(version: int) -> str:
+    """
+    Сформировать ETag по версии записи.
+
+    :param version: Версия записи.
+    :type version: int
+    :return: Значение заголовка ETag.
+    :rtype: str
+    """
+
+    return f'"{version}"'
+
+
+def parse_if_match(value: str | None) -> list[int] | None:
+    """
+    Разобрать заголовок If-Match в список ожидаемых версий.
+
+    Слабые ETag (`W/"3"`) сравниваются как сильные. Значения, которые не
+    являются версиями, пропускаются: если не осталось ни одного, условие
+    не выполняется ни для какой версии.
+
+    :param value: Значение заголовка If-Match.
+    :type value: str | None
+    :return: Ожидаемые версии или None, если условия нет (заголовок
+        отсутствует или равен `*`).
+    :rtype: list[int] | None
+    """
+
+    if value is None or value.strip() == "*":
+        return None
+    versions = []
+    for tag in value.split(","):
+        tag = tag.strip().removeprefix("W/").strip('"')
+        if tag.isdigit():
+            versions.append(int(tag))
+    return versions
+
+
+def format_last_modified(value: datetime) -> str:
+    """
+    Сформировать значение заголовка Last-Modified.
+
+    :param value: Время изменения с часовым поясом.
+    :type value: datetime
+    :return: Дата в формате HTTP-date.
+    :rtype: str
+    """
+
+    return format_datetime(value, usegmt=True)
+
+
+def is_not_modified(
+    headers: Headers, etag: str, last_modified: datetime | None
+) -> bool:
+    """
+    Проверить условия If-None-Match и If-Modified-Since.
+
+    Если передан If-None-Match, If-Modified-Since не учитывается.
+    Время сравнивается с точностью до секунды, как в HTTP-date.
+
+    :param headers: Заголовки запроса.
+    :type headers: Headers
+    :param etag: Текущий ETag ресурса.
+    :type etag: str
+    :param last_modified: Время последнего изменения ресурса.
+    :type last_modified: datetime | None
+    :return: True, если клиенту можно ответить 304 Not Modified.
+    :rtype: bool
+    """
+
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        tags = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+        return etag in tags
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    return last_modified.replace(microsecond=0) <= since
+
+
+def validator_headers(etag: str, last_modified: datetime | None) -> dict[str, str]:
+    """
+    Сформировать заголовки ETag и Last-Modified.
+
+    :param etag: ETag ресурса.
+    :type etag: str
+    :param last_modified: Время последнего изменения ресурса.
+    :type last_modified: datetime | None
+    :return: Заголовки ответа.
+    :rtype: dict[str, str]
+    """
+
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_last_modified(last_modified)
+    return headers
+
+
+def not_modified(etag: str, last_modified: datetime | None) -> Response:
+    """
+    Сформировать ответ 304 Not Modified без тела.
+
+    :param etag: ETag ресурса.
+    :type etag: str
+    :param last_modified: Время последнего изменения ресурса.
+    :type last_modified: datetime | None
+    :return: Ответ 304.
+    :rtype: Response
+    """
+
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers=validator_headers(etag, last_modified),
+    )
+
+
+def variant_etag(etag: str, variant: str) -> str:
+    """
+    Сформировать ETag отдельного представления ресурса.
+
+    Разные представления одного ресурса (формат, раскладка) должны иметь
+    разные сильные ETag, иначе кэш может отдать клиенту чужое тело.
+
+    :param etag: ETag ресурса в основном представлении.
+    :type etag: str
+    :param variant: Имя представления.
+    :type variant: str
+    :return: ETag представления.
+    :rtype: str
+    """
+
+    return f'{etag[:-1]}-{variant}"'
@@ -0,0 +1,59 @@
+"""Модуль содержит функции для работы с курсорами keyset-пагинации."""
+
+import base64
+import binascii
+import json
+from src.exceptions.exceptions import bad_request
+
+
+def encode_cursor(
+    last_id: int, sort: str = "id", last_value: int | str | None = None
+) -> str:
+    """
+    Закодировать позицию последней записи страницы в непрозрачный курсор.
+
+    :param last_id: Идентификатор последнего пользователя на странице.
+    :type last_id: int
+    :param sort: Ключ сортировки, для которого выдан курсор.
+    :type sort: str
+    :param last_value: Значение поля сортировки у последнего пользователя.
+    :type last_value: int | str | None
+    :return: Курсор в виде URL-безопасной строки base64.
+    :rtype: str
+    """
+
+    payload = {"id": last_id}
+    if sort != "id":
+        payload.update(sort=sort, value=last_value)
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str = "id") -> tuple[int, int | str | None]:
+    """
+    Раскодировать курсор, полученный от клиента.
+
+    :param cursor: Курсор, ранее выданный в поле `next_cursor`.
+    :type cursor: str
+    :param sort: Текущий ключ сортировки.
+    :type sort: str
+    :raises HTTPException: 400, если курсор повреждён
+        или выдан для другой сортировки.
+    :return: Идентификатор и значение поля сортировки, после которых
+        начинается следующая страница.
+    :rtype: tuple[int, int | str | None]
+    """
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        last_id = payload["id"]
+        cursor_sort = payload.get("sort", "id")
+        last_value = payload.get("value")
+    except (binascii.Error, ValueError, TypeError, KeyError, AttributeError):
+        raise bad_request(detail="Invalid cursor")
+    if not isinstance(last_id, int) or not isinstance(last_value, int | str | None):
+        raise bad_request(detail="Invalid cursor")
+    if cursor_sort != sort:
+        raise bad_request(detail="Cursor does not match sort")
+    return last_id, last_value
@@ -0,0 +1,69 @@
+"""
+Модуль содержит классы HTTP-ответов приложения.
+
+Для кодирования используются orjson и msgpack, если они установлены.
+Без orjson JSON формируется стандартным модулем `json` с тем же
+результатом, без msgpack ответ в этом формате недоступен.
+"""
+
+from typing import Any
+from fastapi.responses import JSONResponse, Response
+from src.monitoring.requests import serialization_timer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - необязательная зависимость
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - необязательная зависимость
+    msgpack = None
+
+
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSON-ответ, время формирования тела которого учитывается в метриках."""
+
+    def render(self, content: Any) -> bytes:
+        with serialization_timer():
+            return super().render(content)
+
+
+class FastJSONResponse(TimedJSONResponse):
+    """
+    JSON-ответ, кодируемый orjson.
+
+    Результат побайтово совпадает с `JSONResponse`: компактные
+    разделители и символы вне ASCII без экранирования. Если orjson
+    не установлен, используется кодирование родительского класса.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        with serialization_timer():
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+class MsgPackResponse(Response):
+    """Ответ в формате MessagePack, время кодирования учитывается в метриках."""
+
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        with serialization_timer():
+            return msgpack.packb(content, use_bin_type=True)
+
+
+def msgpack_available() -> bool:
+    """
+    Проверить, доступен ли формат MessagePack.
+
+    :return: True, если установлен пакет msgpack.
+    :rtype: bool
+    """
+
+    return msgpack is not None
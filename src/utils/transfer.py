@@ -0,0 +1,124 @@
+"""
+Модуль содержит разбор потоковых CSV и NDJSON для импорта пользователей.
+
+Тело запроса читается порциями, строки разбираются по мере поступления,
+поэтому объём памяти не зависит от размера файла. Каждая запись
+возвращается вместе с номером строки, в которой она начинается, чтобы
+отчёт об отклонённых записях указывал на место в исходном файле.
+"""
+
+import codecs
+import csv
+import json
+from collections.abc import AsyncIterator
+from pydantic import ValidationError
+
+
+# Запись: номер строки, поля записи или None, описание ошибки разбора или None.
+Record = tuple[int, dict | None, str | None]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Разбить поток байтов UTF-8 на строки без символов перевода строки.
+
+    :param chunks: Порции тела запроса.
+    :type chunks: AsyncIterator[bytes]
+    :return: Асинхронный итератор строк.
+    :rtype: AsyncIterator[str]
+    """
+
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    tail = ""
+    async for chunk in chunks:
+        tail += decoder.decode(chunk)
+        *lines, tail = tail.split("\n")
+        for line in lines:
+            yield line.removesuffix("\r")
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail.removesuffix("\r")
+
+
+async def csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+    """
+    Разобрать CSV с заголовком в записи.
+
+    Поле в кавычках может содержать перевод строки: строки объединяются,
+    пока количество кавычек в записи нечётно.
+
+    :param lines: Строки CSV.
+    :type lines: AsyncIterator[str]
+    :return: Асинхронный итератор записей.
+    :rtype: AsyncIterator[Record]
+    """
+
+    header = None
+    buffer, start = [], 0
+    number = 0
+    async for line in lines:
+        number += 1
+        if not buffer:
+            start = number
+        buffer.append(line)
+        text = "\n".join(buffer)
+        if text.count('"') % 2:
+            continue
+        buffer = []
+        if not text.strip():
+            continue
+        try:
+            values = next(csv.reader([text]))
+        except csv.Error as error:
+            yield start, None, f"Invalid CSV: {error}"
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield start, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield start, dict(zip(header, values)), None
+    if buffer:
+        yield start, None, "Invalid CSV: unterminated quoted field"
+
+
+async def ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+    """
+    Разобрать NDJSON: по одному JSON-объекту в строке.
+
+    :param lines: Строки NDJSON.
+    :type lines: AsyncIterator[str]
+    :return: Асинхронный итератор записей.
+    :rtype: AsyncIterator[Record]
+    """
+
+    number = 0
+    async for line in lines:
+        number += 1
+        if not line.strip():
+            continue
+        try:
+            value = json.loads(line)
+        except ValueError as error:
+            yield number, None, f"Invalid JSON: {error}"
+            continue
+        if not isinstance(value, dict):
+            yield number, None, "Expected JSON object"
+            continue
+        yield number, value, None
+
+
+def validation_message(error: ValidationError) -> str:
+    """
+    Кратко описать ошибки проверки записи.
+
+    :param error: Ошибка проверки Pydantic.
+    :type error: ValidationError
+    :return: Поля и причины через точку с запятой.
+    :rtype: str
+    """
+
+    return "; ".join(
+        f"{'.'.join(map(str, item['loc']))}: {item['msg']}" for item in error.errors()
+    )
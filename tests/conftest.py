@@ -0,0 +1,23 @@
+"""Общие фикстуры тестов."""
+
+import pytest
+from fastapi.testclient import TestClient
+from src.main import create_app
+from src.settings.settings import get_settings
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """
+    Клиент приложения с хранилищем в памяти, без базы данных.
+
+    Настройки читаются из окружения заново, поэтому тест может задать
+    переменные через `monkeypatch` до запроса фикстуры.
+    """
+
+    monkeypatch.setenv("STORAGE_BACKEND", "memory")
+    monkeypatch.delenv("STORAGE_MEMORY_PATH", raising=False)
+    get_settings.cache_clear()
+    with TestClient(create_app()) as client:
+        yield client
+    get_settings.cache_clear()
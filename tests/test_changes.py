@@ -0,0 +1,69 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime
+
+from src.crud import changes
+from src.crud.changes import UsersChangeFeed
+from src.schemas.users import UserChange
+
+
+class ChangeLog:
+    def __init__(self, seqs, xmin, xmax):
+        self.seqs = seqs
+        self.xmin = xmin
+        self.xmax = xmax
+
+    async def get_changes_snapshot(self, after_seq, limit):
+        found = [
+            UserChange(
+                seq=seq,
+                operation="delete",
+                id=seq,
+                version=1,
+                changed_at=datetime.now(UTC),
+            )
+            for seq in self.seqs
+            if seq > after_seq
+        ]
+        return found[:limit], self.xmin, self.xmax
+
+
+def _feed(monkeypatch, log, gap_timeout):
+    @asynccontextmanager
+    async def users_repository():
+        yield log
+
+    monkeypatch.setattr(changes, "users_repository", users_repository)
+    feed = UsersChangeFeed(
+        queue_size=10,
+        batch_size=10,
+        poll_interval=1.0,
+        retention=60.0,
+        gap_timeout=gap_timeout,
+    )
+    feed._last_seq = 1
+    return feed
+
+
+def test_feed_waits_on_open_gap(monkeypatch):
+    feed = _feed(monkeypatch, ChangeLog([1, 3], xmin=100, xmax=105), 60.0)
+
+    asyncio.run(feed._fetch())
+
+    assert feed.position == 1
+    assert feed.gap_seconds > 0
+
+
+def test_feed_skips_gap_after_timeout(monkeypatch):
+    feed = _feed(monkeypatch, ChangeLog([1, 3, 4], xmin=100, xmax=105), 0.01)
+
+    async def scenario():
+        queue = feed.subscribe()
+        await feed._fetch()
+        await asyncio.sleep(0.02)
+        await feed._fetch()
+        return [queue.get_nowait().seq for _ in range(queue.qsize())]
+
+    assert asyncio.run(scenario()) == [3, 4]
+    assert feed.position == 4
+    assert feed.gap_seconds == 0
@@ -0,0 +1,41 @@
+"""Тесты сжатия ответов в полном стеке middleware."""
+
+import re
+import pytest
+
+
+USER = {
+    "name": "Ivan",
+    "surname": "Ivanov",
+    "age": 30,
+    "hobbies": "chess",
+    "relationship_status": "single",
+}
+
+
+@pytest.fixture(autouse=True)
+def compress_everything(monkeypatch):
+    monkeypatch.setenv("COMPRESSION_ENABLED", "true")
+    monkeypatch.setenv("COMPRESSION_MINIMUM_SIZE", "0")
+    monkeypatch.setenv("METRICS_ENABLED", "true")
+
+
+def _requests_total(client, route: str) -> int:
+    metrics = client.get("/metrics").text
+    pattern = rf'^http_requests_total\{{method="GET",route="{re.escape(route)}",status="(\d+)"\}} (\d+)'
+    return sum(int(count) for _, count in re.findall(pattern, metrics, re.MULTILINE))
+
+
+def test_route_label_survives_compression(client):
+    user = client.post("/users", json=USER).json()
+    path = f"/users/{user['id']}"
+
+    response = client.get(path, headers={"Accept-Encoding": "gzip"})
+    etag = response.headers["ETag"]
+    assert etag.endswith('-gzip"')
+    conditional = client.get(
+        path, headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+    )
+    assert conditional.status_code == 304
+
+    assert _requests_total(client, "/users/{user_id}") >= 2
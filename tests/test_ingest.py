@@ -0,0 +1,65 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from src.crud.ingest import UsersIngestQueue, _Pending
+from src.schemas.users import BulkItemResult, BulkResult, IngestTicket, UserCreate
+
+
+class FlakyRepository:
+    def __init__(self, connect_failures=0, create_error=None):
+        self.connect_failures = connect_failures
+        self.create_error = create_error
+        self.creates = 0
+
+    async def connect(self):
+        if self.connect_failures:
+            self.connect_failures -= 1
+            raise ConnectionRefusedError("database is down")
+
+    async def create_users(self, users_data):
+        self.creates += 1
+        if self.create_error is not None:
+            raise self.create_error
+        return BulkResult.from_items(
+            BulkItemResult(index=index, id=index + 1, success=True)
+            for index in range(len(users_data))
+        )
+
+
+def _create(repository):
+    @asynccontextmanager
+    async def open_repository():
+        yield repository
+
+    async def scenario():
+        queue = UsersIngestQueue(
+            repository=open_repository,
+            queue_size=10,
+            batch_size=10,
+            flush_interval=0.01,
+        )
+        batch = [
+            _Pending(IngestTicket(tracking_id=str(index)), UserCreate.model_construct())
+            for index in range(2)
+        ]
+        return await queue._create(batch)
+
+    return asyncio.run(scenario())
+
+
+def test_connect_errors_are_retried():
+    repository = FlakyRepository(connect_failures=1)
+
+    items = _create(repository)
+
+    assert [item.success for item in items] == [True, True]
+    assert repository.creates == 1
+
+
+def test_errors_after_sending_are_not_retried():
+    repository = FlakyRepository(create_error=ConnectionResetError("lost"))
+
+    items = _create(repository)
+
+    assert [item.success for item in items] == [False, False]
+    assert repository.creates == 1
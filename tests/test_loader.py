@@ -0,0 +1,40 @@
+import asyncio
+
+from src.crud.loader import DataLoader
+
+
+def test_loads_in_one_tick_share_a_batch():
+    batches = []
+
+    async def batch_load(keys):
+        batches.append(sorted(keys))
+        return {key: key * 10 for key in keys if key != 3}
+
+    async def scenario():
+        loader = DataLoader(batch_load)
+        first = await asyncio.gather(
+            loader.load(1), loader.load(2), loader.load(1), loader.load(3)
+        )
+        second = await loader.load(4)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first == [10, 20, 10, None]
+    assert second == 40
+    assert batches == [[1, 2, 3], [4]]
+
+
+def test_batch_error_reaches_every_caller():
+    async def batch_load(keys):
+        raise RuntimeError("boom")
+
+    async def scenario():
+        loader = DataLoader(batch_load)
+        return await asyncio.gather(
+            loader.load(1), loader.load(2), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+
+    assert [type(result) for result in results] == [RuntimeError, RuntimeError]
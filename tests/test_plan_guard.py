@@ -0,0 +1,38 @@
+import asyncio
+import os
+
+import pytest
+
+from benchmarks.plan_guard import guard, prepare
+from src.config.config import get_engine, init_engines
+from src.settings.settings import get_settings
+
+
+# Проверка дополняет таблицы и выполняет VACUUM FULL, поэтому
+# запускается только на отдельной базе данных, заданной явно.
+PLAN_GUARD_DB_NAME = os.environ.get("PLAN_GUARD_DB_NAME")
+
+
+@pytest.mark.skipif(
+    not PLAN_GUARD_DB_NAME, reason="PLAN_GUARD_DB_NAME is not configured"
+)
+def test_query_plans_do_not_regress(monkeypatch):
+    monkeypatch.setenv("STORAGE_BACKEND", "postgres")
+    monkeypatch.setenv("DB_NAME", PLAN_GUARD_DB_NAME)
+    get_settings.cache_clear()
+
+    async def run():
+        init_engines()
+        await prepare(count=100000, batch_size=1000, seed_value=42)
+        try:
+            return await guard(max_cost_share=0.05, analyze=False)
+        finally:
+            await get_engine().dispose()
+
+    try:
+        results, regressed = asyncio.run(run())
+    finally:
+        get_settings.cache_clear()
+
+    problems = {name: case["problems"] for name, case in results.items()}
+    assert not regressed, {name: found for name, found in problems.items() if found}
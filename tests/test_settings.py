@@ -0,0 +1,30 @@
+import pytest
+from pydantic import ValidationError
+
+from src.settings.settings import Settings
+
+
+@pytest.fixture(autouse=True)
+def memory_storage(monkeypatch):
+    monkeypatch.setenv("STORAGE_BACKEND", "memory")
+    monkeypatch.delenv("CACHE_BACKEND", raising=False)
+
+
+def test_memory_cache_is_default_for_one_worker(monkeypatch):
+    monkeypatch.setenv("SERVER_WORKERS", "1")
+
+    assert Settings().CACHE_BACKEND == "memory"
+
+
+def test_memory_cache_is_off_by_default_for_several_workers(monkeypatch):
+    monkeypatch.setenv("SERVER_WORKERS", "4")
+
+    assert Settings().CACHE_BACKEND == "none"
+
+
+def test_memory_cache_is_refused_for_several_workers(monkeypatch):
+    monkeypatch.setenv("SERVER_WORKERS", "4")
+    monkeypatch.setenv("CACHE_BACKEND", "memory")
+
+    with pytest.raises(ValidationError, match="CACHE_BACKEND=memory"):
+        Settings()
@@ -0,0 +1,31 @@
+import asyncio
+
+from src.cache.memory import MemoryCacheBackend
+from src.cache.users import UsersCache
+
+
+def test_fill_skips_value_changed_during_load():
+    async def scenario():
+        cache = UsersCache(MemoryCacheBackend(max_size=10, ttl=60))
+        loading = asyncio.Event()
+        release = asyncio.Event()
+
+        async def stale_read():
+            loading.set()
+            await release.wait()
+            return '{"id":1,"version":1}'
+
+        fill = asyncio.create_task(cache.fill_json(1, stale_read))
+        await loading.wait()
+        await cache.invalidate(1)
+        release.set()
+        value = await fill
+        skipped = await cache.get_json(1)
+        await cache.fill_json(1, stale_read)
+        return value, skipped, await cache.get_json(1)
+
+    value, skipped, refilled = asyncio.run(scenario())
+
+    assert value == '{"id":1,"version":1}'
+    assert skipped is None
+    assert refilled == value